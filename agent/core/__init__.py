@@ -1,7 +1,15 @@
 from .orchestrator import FDEOrchestrator, OrchestratorConfig
+from .fleet import FleetOrchestrator, FleetConfig
 from .planner import FDEPlanner, TaskPlan, PlanStep
 from .executor import ToolExecutor, ExecutionResult
+from .governor import ResourceGovernor, ResourceLimits, TokenBucket
+from .locking import TicketLock, atomic_write_text
+from .records import Record, dump, dumps, write_json
+from .cassette import Cassette, CassetteEntry, CassetteRecorder, cassette_registry, replay_registry
+from .manifest import ManifestLog, manifest_diff, read_manifest
+from .profiling import Profiler
+from .simulation import LatencyModel, SimProfile, SimulatedTool, simulated_registry
 from .validator import ValidationEngine
 from .memory import SessionMemory, ConversationTurn
-from .state_machine import DeploymentStateMachine, DeploymentState
+from .state_machine import DeploymentStateMachine, DeploymentState, StateEvent, StateLog
 from .reasoner import LLMReasoner
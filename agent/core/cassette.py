@@ -0,0 +1,288 @@
+"""
+Record/replay of tool I/O.
+
+A cassette is a JSONL file with one line per tool call. Each line holds the
+request fields of the plan step, the tool's result and how long the call took.
+Requests are redacted like tool output, because cassettes get committed and
+shared; replay matches on the same redacted form.
+Recording wraps the handlers of an existing registry. Replay builds a registry
+that answers from the cassette at original or accelerated speed and never
+touches a real system.
+"""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from ..tools.redaction import redact
+from ..tools.registry import ToolCapabilities, ToolRegistry, default_registry
+from .records import Record, dumps
+
+# Fields that identify a call; descriptions are prose and may differ between plans
+REQUEST_FIELDS = ("command", "args", "method", "url", "schema")
+
+
+def request_of(step: Any) -> Dict[str, Any]:
+    """The step's request fields with secrets in args, URL and body redacted."""
+    get = step.get if isinstance(step, dict) else lambda f: getattr(step, f, None)
+    return {f: _redacted(get(f)) for f in REQUEST_FIELDS if get(f) is not None}
+
+
+def _redacted(value: Any) -> Any:
+    if isinstance(value, str):
+        return redact(value)
+    if isinstance(value, (list, tuple)):
+        return [_redacted(v) for v in value]
+    if isinstance(value, dict):
+        return {k: _redacted(v) for k, v in value.items()}
+    return value
+
+
+def request_key(request: Dict[str, Any]) -> str:
+    raw = json.dumps(request, sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:16]
+
+
+@dataclass(slots=True)
+class CassetteEntry(Record):
+    tool: str
+    request: Dict[str, Any]
+    response: Dict[str, Any]
+    duration_ms: float = 0.0
+    ticket_id: Optional[str] = None
+
+    @classmethod
+    def from_dict(cls, d: dict) -> "CassetteEntry":
+        return cls(d["tool"], d.get("request", {}), d.get("response", {}), float(d.get("duration_ms", 0.0)), d.get("ticket_id"))
+
+
+class Cassette:
+    """Recorded calls indexed by request; repeated requests replay in recorded order, then cycle."""
+
+    def __init__(self, entries: Iterable[CassetteEntry] = ()):
+        self._by_key: Dict[str, List[CassetteEntry]] = {}
+        self._cursor: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.size = 0
+        for e in entries:
+            self.add(e)
+
+    def add(self, entry: CassetteEntry) -> None:
+        self._by_key.setdefault(request_key(entry.request), []).append(entry)
+        self.size += 1
+
+    def tools(self) -> List[str]:
+        return sorted({e.tool for entries in self._by_key.values() for e in entries})
+
+    def entries(self) -> Iterable[CassetteEntry]:
+        for entries in self._by_key.values():
+            yield from entries
+
+    def next_for(self, request: Dict[str, Any]) -> Optional[CassetteEntry]:
+        key = request_key(request)
+        entries = self._by_key.get(key)
+        if not entries:
+            return None
+        with self._lock:
+            i = self._cursor.get(key, 0)
+            self._cursor[key] = i + 1
+        return entries[i % len(entries)]
+
+    @classmethod
+    def load(cls, path: Path) -> "Cassette":
+        with Path(path).open(encoding="utf-8") as f:
+            return cls(CassetteEntry.from_dict(json.loads(line)) for line in f if line.strip())
+
+    @classmethod
+    def from_history(cls, paths: Iterable[Path]) -> "Cassette":
+        """Build a cassette from session summaries and deployment manifests (plan + executed pairs).
+
+        Only steps that actually ran a tool are kept; prose steps and plans without
+        recorded outputs contribute nothing.
+        """
+        cassette = cls()
+        for path in paths:
+            try:
+                doc = json.loads(Path(path).read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                continue
+            plan = [p for p in doc.get("plan") or [] if isinstance(p, dict)]
+            executed = doc.get("executed") or (doc.get("execution") or {}).get("steps") or []
+            pending: Dict[str, List[dict]] = {}
+            for p in plan:
+                pending.setdefault(p.get("description", ""), []).append(p)
+            for ex in executed:
+                if not isinstance(ex, dict) or not ex.get("command") or ex.get("status") in (None, "planned", "skipped"):
+                    continue
+                candidates = pending.get(ex.get("description", ""))
+                if not candidates:
+                    continue
+                step = candidates.pop(0)
+                response = {k: ex[k] for k in ("status", "stdout", "stderr", "meta") if ex.get(k) is not None}
+                duration = float((ex.get("meta") or {}).get("duration_ms", 0.0))
+                cassette.add(CassetteEntry(ex["command"], request_of(step), response, duration, doc.get("ticket_id")))
+        return cassette
+
+    def save(self, path: Path) -> None:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with path.open("w", encoding="utf-8") as f:
+            for e in self.entries():
+                f.write(dumps(e) + "\n")
+
+
+class CassetteRecorder:
+    """Appends every call made through wrapped registries to one cassette file."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._fh = None
+
+    def record(self, entry: CassetteEntry) -> None:
+        line = dumps(entry) + "\n"
+        with self._lock:
+            if self._fh is None:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                self._fh = self.path.open("a", encoding="utf-8")
+            self._fh.write(line)
+            self._fh.flush()
+
+    def wrap(self, registry: ToolRegistry, ticket_id: Optional[str] = None) -> ToolRegistry:
+        """Same tools, permissions and capabilities; every call is also written to the cassette."""
+        wrapped = ToolRegistry()
+        for name in registry.names():
+            reg = registry.get(name)
+            async_handler = self._recording_async(name, reg.async_handler, ticket_id) if reg.async_handler else None
+            wrapped.register(name, reg.permission, self._recording(name, reg.handler, ticket_id), reg.capabilities, async_handler)
+        return wrapped
+
+    def _recording(self, name: str, handler, ticket_id: Optional[str]):
+        def call(step: Any) -> Dict[str, Any]:
+            start = time.perf_counter()
+            res = handler(step)
+            duration = round((time.perf_counter() - start) * 1000, 3)
+            self.record(CassetteEntry(name, request_of(step), dict(res), duration, ticket_id))
+            return res
+        return call
+
+    def _recording_async(self, name: str, handler, ticket_id: Optional[str]):
+        async def call(step: Any) -> Dict[str, Any]:
+            start = time.perf_counter()
+            res = await handler(step)
+            duration = round((time.perf_counter() - start) * 1000, 3)
+            # Redaction and the file append stay off the event loop
+            await asyncio.to_thread(lambda: self.record(CassetteEntry(name, request_of(step), dict(res), duration, ticket_id)))
+            return res
+        return call
+
+    def close(self) -> None:
+        with self._lock:
+            if self._fh is not None:
+                self._fh.close()
+                self._fh = None
+
+
+def replay_registry(cassette: Cassette, speed: float = 1.0) -> ToolRegistry:
+    """Registry whose tools answer from ``cassette``.
+
+    ``speed`` scales recorded durations: 1.0 is original timing, 10.0 ten times
+    faster, 0 replays instantly. Built-in tools keep their declared capabilities
+    so governor limits behave as they would live.
+    """
+    from ..tools.shell import ShellTool
+    from ..tools.http_client import HttpTool
+    from ..tools.git_ops import GitTool
+
+    builtin = {t.name: t for t in (ShellTool, HttpTool, GitTool)}
+    registry = ToolRegistry()
+    for name in sorted(set(builtin) | set(cassette.tools())):
+        tool = builtin.get(name)
+        handler, async_handler = _replaying(name, cassette, speed)
+        registry.register(
+            name,
+            tool.permission if tool else "replay",
+            handler,
+            tool.capabilities if tool else ToolCapabilities(),
+            async_handler,
+        )
+    return registry
+
+
+def _replay(name: str, cassette: Cassette, step: Any) -> Tuple[Dict[str, Any], float]:
+    """The recorded response for ``step`` and the recorded call's duration in seconds."""
+    entry = cassette.next_for(request_of(step))
+    if entry is None:
+        return {"status": "failed(replay-miss)", "stdout": "", "stderr": f"no recorded {name} call for this request"}, 0.0
+    res = dict(entry.response)
+    res["meta"] = dict(res.get("meta") or {}, replayed=True)
+    return res, entry.duration_ms / 1000.0
+
+
+def _replaying(name: str, cassette: Cassette, speed: float):
+    """Sync and async handlers answering from ``cassette``; async replays wait without holding a thread."""
+    def call(step: Any) -> Dict[str, Any]:
+        res, seconds = _replay(name, cassette, step)
+        if speed > 0 and seconds:
+            time.sleep(seconds / speed)
+        return res
+
+    async def call_async(step: Any) -> Dict[str, Any]:
+        res, seconds = _replay(name, cassette, step)
+        if speed > 0 and seconds:
+            await asyncio.sleep(seconds / speed)
+        return res
+    return call, call_async
+
+
+# Process-wide so every ticket in a fleet appends to, or replays from, the same file
+_recorders: Dict[Path, CassetteRecorder] = {}
+_cassettes: Dict[Path, Cassette] = {}
+_cache_lock = threading.Lock()
+
+
+def recorder_for(path: Path) -> CassetteRecorder:
+    key = Path(path).resolve()
+    with _cache_lock:
+        if key not in _recorders:
+            _recorders[key] = CassetteRecorder(key)
+        return _recorders[key]
+
+
+def cassette_for(path: Path) -> Cassette:
+    key = Path(path).resolve()
+    with _cache_lock:
+        if key not in _cassettes:
+            _cassettes[key] = Cassette.load(key)
+        return _cassettes[key]
+
+
+def cassette_registry(
+    record: Optional[Path] = None,
+    replay: Optional[Path] = None,
+    speed: float = 1.0,
+    ticket_id: Optional[str] = None,
+    audit_log: Optional[str] = None,
+    workdir: Optional[str] = None,
+    worktrees: bool = False,
+) -> Optional[ToolRegistry]:
+    """Registry for a record or replay run, or None to use the live default."""
+    if replay:
+        return replay_registry(cassette_for(replay), speed=speed)
+    if record:
+        live = default_registry(ticket_id=ticket_id, audit_log=audit_log, workdir=workdir, worktrees=worktrees)
+        return recorder_for(record).wrap(live, ticket_id=ticket_id)
+    return None
+
+
+def build_cassette(out: Path, sources: Iterable[Path]) -> Cassette:
+    """Write a cassette built from past session summaries/manifests to ``out``."""
+    cassette = Cassette.from_history(sources)
+    cassette.save(out)
+    return cassette
@@ -1,16 +1,31 @@
 from __future__ import annotations
 
-from dataclasses import dataclass, asdict
-from typing import Optional, List, Dict, Any
+import asyncio
+import hashlib
+import heapq
+import os
+import threading
+import time
+from concurrent.futures import Executor, Future, ThreadPoolExecutor, wait, FIRST_COMPLETED
+from dataclasses import dataclass, replace
+from pathlib import Path
+from typing import Callable, Optional, List, Dict, Any, Tuple
 
-from ..tools.shell import ShellTool
-from ..tools.http_client import HttpTool
-from ..tools.git_ops import GitTool
-from .planner import PlanStep
+from ..tools.pipes import pipe_meta
+from ..tools.registry import ToolRegistry, default_registry
+from .governor import ResourceGovernor
+from .planner import PlanStep, dependencies
+from .profiling import Profiler
+from .records import Record
 
+# Failures worth another attempt; anything else is the tool's real answer
+TRANSIENT = ("failed(timeout)", "failed(exception)")
+BLOCKED = "blocked: dependency failed"
+ARTIFACTS_DIR = Path(__file__).resolve().parent.parent / "artifacts"
 
-@dataclass
-class ExecutionResult:
+
+@dataclass(slots=True)
+class ExecutionResult(Record):
     description: str
     command: str
     status: str
@@ -18,47 +33,310 @@ class ExecutionResult:
     stderr: str
     meta: Optional[Dict[str, Any]] = None
 
-    def to_dict(self) -> Dict[str, Any]:
-        return {
-            "description": self.description,
-            "command": self.command,
-            "status": self.status,
-            "stdout": self.stdout,
-            "stderr": self.stderr,
-            "meta": self.meta,
-        }
-
 
 class ToolExecutor:
-    def __init__(self, ticket_id: Optional[str] = None, audit_log: Optional[str] = None):
-        self.shell = ShellTool(ticket_id=ticket_id, audit_log=audit_log)
-        self.http = HttpTool(ticket_id=ticket_id, audit_log=audit_log)
-        self.git = GitTool(ticket_id=ticket_id, audit_log=audit_log)
+    """Single execution engine: every step is dispatched through a ToolRegistry.
 
-    def execute(self, steps: List[PlanStep]) -> List[ExecutionResult]:
-        executed: List[ExecutionResult] = []
-        for s in steps:
-            cmd = s.command
-            if not cmd:
-                executed.append(ExecutionResult(s.description, cmd, "skipped", "", "non-executable step"))
-                continue
+    New tool types plug in by registering a handler; the loop below never changes.
+    Every call goes through the ResourceGovernor, so with max_parallel > 1 steps
+    queue for tool/host capacity instead of flooding a customer system.
+    Idempotent tools are retried on transient failures; once ``cancel`` is set,
+    steps that have not started are skipped. Steps honour ``depends_on``; in
+    parallel runs the ready step with the longest estimated remaining chain
+    starts first. A step with ``input_from`` reads the earlier step's output
+    from a pipe file under ``artifacts/<ticket>/pipes/``. execute_async()
+    runs the same loop on an event loop.
+    """
+    def __init__(
+        self,
+        ticket_id: Optional[str] = None,
+        audit_log: Optional[str] = None,
+        registry: Optional[ToolRegistry] = None,
+        governor: Optional[ResourceGovernor] = None,
+        max_parallel: int = 1,
+        workdir: Optional[str] = None,
+        pool: Optional[Executor] = None,
+        cancel: Optional[threading.Event] = None,
+        estimator: Optional[Callable[[PlanStep], float]] = None,
+        on_result: Optional[Callable[[int, ExecutionResult], None]] = None,
+        profiler: Optional[Profiler] = None,
+    ):
+        self.registry = registry or default_registry(ticket_id=ticket_id, audit_log=audit_log, workdir=workdir)
+        self.governor = governor or ResourceGovernor.from_contract_file(registry=self.registry)
+        self.max_parallel = max(1, max_parallel)
+        # A shared pool lets many tickets' steps draw from one set of workers
+        self.pool = pool
+        self.cancel = cancel or threading.Event()
+        # Expected step duration (ms) used to order ready steps; unknown steps count as equal
+        self.estimator = estimator
+        # Called with (step index, result) as each step finishes, in completion order
+        self.on_result = on_result
+        # Each synchronous tool call is a "tool:<name>" phase when profiling
+        self.profiler = profiler or Profiler()
+        self.pipe_dir = ARTIFACTS_DIR / (ticket_id or "default") / "pipes"
+
+    def _dispatch(self, step: PlanStep):
+        """The step's registration, or the result to return without running anything."""
+        cmd = step.command
+        if not cmd:
+            return None, ExecutionResult(step.description, cmd, "skipped", "", "non-executable step")
+        registration = self.registry.lookup(cmd)
+        if registration is None:
+            return None, ExecutionResult(step.description, cmd, "skipped", "", f"Unknown command: {cmd}")
+        if self.cancel.is_set():
+            return None, self._cancelled(step)
+        if step.input_from is not None and not (step.stdin_path and os.path.exists(step.stdin_path)):
+            return None, ExecutionResult(step.description, cmd, "skipped", "", f"blocked: no output from step {step.input_from}")
+        return registration, None
+
+    def _pipes(self, steps: List[PlanStep]) -> List[PlanStep]:
+        """Copies of the steps with pipe files resolved: each step another step reads from writes one."""
+        sources = {s.input_from for i, s in enumerate(steps) if s.input_from is not None and 0 <= s.input_from < i}
+        if not sources:
+            return steps
+        paths = {}
+        for i in sources:
+            path = self.pipe_dir / f"step-{i}.out"
+            # Output of an earlier run of this ticket must never feed this one
+            path.unlink(missing_ok=True)
+            paths[i] = str(path)
+        wired = []
+        for i, s in enumerate(steps):
+            stdin = paths.get(s.input_from) if s.input_from is not None and s.input_from < i else None
+            stdout = paths.get(i)
+            wired.append(replace(s, stdin_path=stdin, stdout_path=stdout) if stdin or stdout else s)
+        return wired
+
+    @staticmethod
+    def _cancelled(step: PlanStep) -> ExecutionResult:
+        return ExecutionResult(step.description, step.command, "skipped", "", "cancelled")
+
+    @staticmethod
+    def _attempts(registration) -> int:
+        caps = registration.capabilities
+        return 1 + (caps.retries if caps.idempotent else 0)
+
+    @staticmethod
+    def _backoff(attempt: int) -> float:
+        return min(0.05 * 2 ** (attempt - 1), 1.0)
+
+    @staticmethod
+    def _result(step: PlanStep, res: Dict[str, Any], elapsed: float, tries: int) -> ExecutionResult:
+        # Tool time only: governor queueing and retry backoff are excluded
+        meta = dict(res.get("meta") or {}, duration_ms=round(elapsed * 1000, 3))
+        if tries > 1:
+            meta["attempts"] = tries
+        if step.stdin_path:
+            meta["input"] = {"from": step.input_from, "path": step.stdin_path}
+        if step.stdout_path and res.get("status") == "ok" and not os.path.exists(step.stdout_path):
+            # Tools without pipe support (simulated, replayed, plugins) hand over their captured stdout
+            data = res.get("stdout", "").encode()
+            Path(step.stdout_path).parent.mkdir(parents=True, exist_ok=True)
+            Path(step.stdout_path).write_bytes(data)
+            meta["pipe"] = pipe_meta(step.stdout_path, len(data), hashlib.sha256(data).hexdigest())
+        return ExecutionResult(
+            step.description,
+            step.command,
+            res.get("status", "skipped"),
+            res.get("stdout", ""),
+            res.get("stderr", ""),
+            meta,
+        )
+
+    def _call(self, registration, step: PlanStep) -> Dict[str, Any]:
+        """A synchronous tool call, profiled as a "tool:<name>" phase on the calling thread."""
+        with self.profiler.phase(f"tool:{step.command}", snapshot=False):
+            return registration.handler(step)
+
+    def execute_step(self, step: PlanStep) -> ExecutionResult:
+        registration, early = self._dispatch(step)
+        if early is not None:
+            return early
+        cmd = step.command
+        elapsed = 0.0
+        tries = 0
+        for attempt in range(self._attempts(registration)):
+            # Exponential backoff between attempts, cut short by cancellation
+            if attempt and self.cancel.wait(self._backoff(attempt)):
+                break
             try:
-                if cmd == "shell":
-                    res = self.shell.run(s.args)
-                elif cmd == "http":
-                    res = self.http.request(method=s.method or "GET", url=s.url, data=s.args)
-                elif cmd == "git":
-                    res = self.git.run(s.args)
-                else:
-                    res = {"status": "skipped", "stdout": "", "stderr": f"Unknown command: {cmd}"}
+                with self.governor.slot(cmd, ResourceGovernor.host_of(step)):
+                    # Cancellation may have landed while this step queued for capacity
+                    if self.cancel.is_set():
+                        return self._cancelled(step)
+                    tries += 1
+                    start = time.perf_counter()
+                    try:
+                        res = self._call(registration, step)
+                    finally:
+                        elapsed += time.perf_counter() - start
             except Exception as e:
                 res = {"status": "failed(exception)", "stdout": "", "stderr": str(e)}
-            executed.append(ExecutionResult(
-                s.description,
-                cmd,
-                res.get("status", "skipped"),
-                res.get("stdout", ""),
-                res.get("stderr", ""),
-                res.get("meta")
-            ))
-        return executed
\ No newline at end of file
+            if not res.get("status", "").startswith(TRANSIENT):
+                break
+        return self._result(step, res, elapsed, tries)
+
+    async def execute_step_async(self, step: PlanStep) -> ExecutionResult:
+        """execute_step() as a coroutine; tools without an async handler run on a thread."""
+        registration, early = self._dispatch(step)
+        if early is not None:
+            return early
+        cmd = step.command
+        elapsed = 0.0
+        tries = 0
+        for attempt in range(self._attempts(registration)):
+            if attempt:
+                await asyncio.sleep(self._backoff(attempt))
+                if self.cancel.is_set():
+                    break
+            try:
+                async with self.governor.slot_async(cmd, ResourceGovernor.host_of(step)):
+                    if self.cancel.is_set():
+                        return self._cancelled(step)
+                    tries += 1
+                    start = time.perf_counter()
+                    try:
+                        if registration.async_handler is not None:
+                            async with self.profiler.phase_async(f"tool:{step.command}"):
+                                res = await registration.async_handler(step)
+                        else:
+                            res = await asyncio.to_thread(self._call, registration, step)
+                    finally:
+                        elapsed += time.perf_counter() - start
+            except Exception as e:
+                res = {"status": "failed(exception)", "stdout": "", "stderr": str(e)}
+            if not res.get("status", "").startswith(TRANSIENT):
+                break
+        return self._result(step, res, elapsed, tries)
+
+    def execute(self, steps: List[PlanStep]) -> List[ExecutionResult]:
+        steps = self._pipes(steps)
+        if self.max_parallel == 1 or len(steps) < 2:
+            deps = dependencies(steps)
+            results: List[ExecutionResult] = []
+            for i, (s, d) in enumerate(zip(steps, deps)):
+                results.append(self._blocked(s) if any(_failed(results[j]) for j in d) else self.execute_step(s))
+                self._report(i, results[i])
+            return results
+        if self.pool is not None:
+            return self._execute_on(self.pool, steps)
+        with ThreadPoolExecutor(max_workers=self.max_parallel, thread_name_prefix="fde-step") as pool:
+            return self._execute_on(pool, steps)
+
+    def _report(self, index: int, result: ExecutionResult) -> None:
+        if self.on_result is not None:
+            self.on_result(index, result)
+
+    @staticmethod
+    def _blocked(step: PlanStep) -> ExecutionResult:
+        return ExecutionResult(step.description, step.command, "skipped", "", BLOCKED)
+
+    def _ranks(self, steps: List[PlanStep], children: List[List[int]]) -> List[float]:
+        """Estimated duration of each step plus its longest chain of dependents."""
+        costs = [max(self.estimator(s), 0.0) if self.estimator and s.command else 0.0 for s in steps]
+        ranks = [0.0] * len(steps)
+        for i in range(len(steps) - 1, -1, -1):
+            # +1 per step so equal estimates still favour longer chains
+            ranks[i] = costs[i] + 1.0 + max((ranks[c] for c in children[i]), default=0.0)
+        return ranks
+
+    def _schedule(self, steps: List[PlanStep]) -> "_Schedule":
+        deps = dependencies(steps)
+        children: List[List[int]] = [[] for _ in steps]
+        for i, d in enumerate(deps):
+            for j in d:
+                children[j].append(i)
+        return _Schedule(steps, deps, children, self._ranks(steps, children))
+
+    def _flush(self, reports: List[Tuple[int, ExecutionResult]]) -> None:
+        for i, result in reports:
+            self._report(i, result)
+
+    def _execute_on(self, pool: Executor, steps: List[PlanStep]) -> List[ExecutionResult]:
+        sched = self._schedule(steps)
+        running: Dict[Future, int] = {}
+        # At most max_parallel in flight, so one ticket cannot monopolise a shared pool
+        while sched.ready or running:
+            while sched.ready and len(running) < self.max_parallel:
+                i = sched.pop()
+                running[pool.submit(self.execute_step, steps[i])] = i
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for f in done:
+                sched.finish(running.pop(f), f.result())
+            self._flush(sched.take_reports())
+        return sched.results  # type: ignore[return-value]
+
+    async def execute_async(self, steps: List[PlanStep]) -> List[ExecutionResult]:
+        """execute() on the running event loop: same ordering, dependencies and parallelism, no step threads.
+
+        on_result callbacks (manifest appends) run on a worker thread, off the loop.
+        """
+        steps = self._pipes(steps)
+        if self.max_parallel == 1 or len(steps) < 2:
+            deps = dependencies(steps)
+            results: List[ExecutionResult] = []
+            for i, (s, d) in enumerate(zip(steps, deps)):
+                results.append(self._blocked(s) if any(_failed(results[j]) for j in d) else await self.execute_step_async(s))
+                if self.on_result is not None:
+                    await asyncio.to_thread(self.on_result, i, results[i])
+            return results
+        sched = self._schedule(steps)
+        running: Dict[asyncio.Task, int] = {}
+        while sched.ready or running:
+            while sched.ready and len(running) < self.max_parallel:
+                i = sched.pop()
+                running[asyncio.ensure_future(self.execute_step_async(steps[i]))] = i
+            # Newly started steps overlap the previous round's reports
+            reports = sched.take_reports()
+            if reports and self.on_result is not None:
+                await asyncio.to_thread(self._flush, reports)
+            if not running:
+                continue
+            done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+            for t in done:
+                sched.finish(running.pop(t), t.result())
+        reports = sched.take_reports()
+        if reports and self.on_result is not None:
+            await asyncio.to_thread(self._flush, reports)
+        return sched.results  # type: ignore[return-value]
+
+
+class _Schedule:
+    """Ready set of a parallel run: the highest-ranked ready step first, and a
+    failed or blocked step blocks its dependents. Finished steps queue up for
+    on_result until the run loop takes them.
+    """
+
+    def __init__(self, steps: List[PlanStep], deps: List[List[int]], children: List[List[int]], ranks: List[float]):
+        self.steps = steps
+        self.deps = deps
+        self.children = children
+        self.ranks = ranks
+        self.waiting = [len(d) for d in deps]
+        self.ready = [(-ranks[i], i) for i, n in enumerate(self.waiting) if n == 0]
+        heapq.heapify(self.ready)
+        self.results: List[Optional[ExecutionResult]] = [None] * len(steps)
+        self._reports: List[Tuple[int, ExecutionResult]] = []
+
+    def pop(self) -> int:
+        return heapq.heappop(self.ready)[1]
+
+    def finish(self, i: int, result: ExecutionResult) -> None:
+        self.results[i] = result
+        self._reports.append((i, result))
+        for c in self.children[i]:
+            self.waiting[c] -= 1
+            if self.waiting[c] == 0:
+                if any(_failed(self.results[j]) for j in self.deps[c]):
+                    self.finish(c, ToolExecutor._blocked(self.steps[c]))
+                else:
+                    heapq.heappush(self.ready, (-self.ranks[c], c))
+
+    def take_reports(self) -> List[Tuple[int, ExecutionResult]]:
+        reports, self._reports = self._reports, []
+        return reports
+
+
+def _failed(result: ExecutionResult) -> bool:
+    # A step skipped as blocked (failed dependency, missing pipe input, preflight) never produced its output
+    return result.status.startswith("failed") or (result.status == "skipped" and result.stderr.startswith("blocked:"))
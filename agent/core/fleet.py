@@ -0,0 +1,146 @@
+"""
+Fleet orchestration - run many tickets concurrently in one process.
+Each ticket gets its own orchestrator, session directory and scratch workdir;
+all tickets share one ResourceGovernor and one step worker pool.
+"""
+from __future__ import annotations
+
+import asyncio
+import threading
+import uuid
+from concurrent.futures import CancelledError, Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Union
+
+from ..tools.registry import ToolRegistry, default_registry
+from .governor import ResourceGovernor
+from .orchestrator import FDEOrchestrator, OrchestratorConfig
+from .state_machine import DeploymentState, StateLog
+
+AGENT_DIR = Path(__file__).resolve().parent.parent
+WORKSPACES_DIR = AGENT_DIR / "workspaces"
+
+
+@dataclass
+class FleetConfig:
+    max_tickets: int = 4
+    max_workers: int = 16
+    max_parallel: int = 1
+    environment: Optional[str] = None
+    audit_log: Optional[Path] = None
+    compliance_target: Optional[Path] = None
+    record: Optional[Path] = None
+    replay: Optional[Path] = None
+    replay_speed: float = 1.0
+    # Concurrent tickets get their own git worktrees so they never share an index
+    worktrees: bool = True
+
+
+def new_ticket_id() -> str:
+    """Unique id for runs submitted without one, so they never share 'default' state."""
+    return f"adhoc-{datetime.utcnow().strftime('%Y%m%d%H%M%S')}-{uuid.uuid4().hex[:8]}"
+
+
+class FleetOrchestrator:
+    def __init__(
+        self,
+        config: Optional[FleetConfig] = None,
+        governor: Optional[ResourceGovernor] = None,
+        registry_factory: Optional[Callable[[str], ToolRegistry]] = None,
+        state_log: Optional[StateLog] = None,
+    ):
+        self.config = config or FleetConfig()
+        self.governor = governor or ResourceGovernor.from_contract_file(registry=default_registry())
+        # Builds each ticket's tool registry (e.g. simulated backends); None uses the live tools
+        self.registry_factory = registry_factory
+        # Transition log for every ticket; None uses the shared artifacts/.state log
+        self.state_log = state_log
+        self._cancel = threading.Event()
+        # Tickets and steps use separate pools so a ticket waiting on its steps never starves them
+        self._ticket_pool = ThreadPoolExecutor(max_workers=self.config.max_tickets, thread_name_prefix="fde-ticket")
+        self._step_pool = ThreadPoolExecutor(max_workers=self.config.max_workers, thread_name_prefix="fde-step")
+        # Ticket slots for run_async(); created on first use so they bind to the caller's loop
+        self._slots: Optional[asyncio.Semaphore] = None
+
+    def orchestrator_for(self, ticket_id: str, environment: Optional[str] = None) -> FDEOrchestrator:
+        cfg = OrchestratorConfig(
+            ticket_id=ticket_id,
+            environment=environment or self.config.environment,
+            audit_log=self.config.audit_log,
+            max_parallel=self.config.max_parallel,
+            workdir=WORKSPACES_DIR / ticket_id,
+            compliance_target=self.config.compliance_target,
+            record=self.config.record,
+            replay=self.config.replay,
+            replay_speed=self.config.replay_speed,
+            worktrees=self.config.worktrees,
+        )
+        registry = self.registry_factory(ticket_id) if self.registry_factory else None
+        return FDEOrchestrator(cfg, governor=self.governor, step_pool=self._step_pool, registry=registry, cancel=self._cancel, state_log=self.state_log)
+
+    def submit(self, task: str, ticket_id: Optional[str] = None, environment: Optional[str] = None) -> Future:
+        ticket_id = ticket_id or new_ticket_id()
+        orch = self.orchestrator_for(ticket_id, environment)
+        try:
+            return self._ticket_pool.submit(orch.run_task, task)
+        except RuntimeError:
+            if not self._cancel.is_set():
+                raise
+            # Submitted after cancel(): hand back an already-cancelled future
+            f: Future = Future()
+            f.cancel()
+            return f
+
+    def run_all(self, tasks: Iterable[Union[str, Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        """Run tasks (plain strings or {"task", "ticket_id", "environment"} dicts) and return summaries in order."""
+        futures = []
+        for t in tasks:
+            spec = {"task": t} if isinstance(t, str) else t
+            ticket_id = spec.get("ticket_id") or new_ticket_id()
+            futures.append((ticket_id, self.submit(spec["task"], ticket_id, spec.get("environment"))))
+        out = []
+        for ticket_id, f in futures:
+            try:
+                out.append(f.result())
+            except CancelledError:
+                out.append({"ticket_id": ticket_id, "status": DeploymentState.Cancelled.name})
+            except Exception as e:
+                out.append({"ticket_id": ticket_id, "status": DeploymentState.Failed.name, "error": str(e)})
+        return out
+
+    async def run_async(self, task: str, ticket_id: Optional[str] = None, environment: Optional[str] = None) -> Dict[str, Any]:
+        """One ticket on the running event loop, once one of max_tickets slots is free; never raises."""
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.config.max_tickets)
+        ticket_id = ticket_id or new_ticket_id()
+        async with self._slots:
+            if self._cancel.is_set():
+                return {"ticket_id": ticket_id, "status": DeploymentState.Cancelled.name}
+            try:
+                # Building one sets up session files and tool registries; keep that off the loop
+                orch = await asyncio.to_thread(self.orchestrator_for, ticket_id, environment)
+                return await orch.run_task_async(task)
+            except Exception as e:
+                return {"ticket_id": ticket_id, "status": DeploymentState.Failed.name, "error": str(e)}
+
+    async def run_all_async(self, tasks: Iterable[Union[str, Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        """run_all() for asyncio callers: tickets and their steps interleave as coroutines."""
+        specs = [{"task": t} if isinstance(t, str) else t for t in tasks]
+        return list(await asyncio.gather(*(self.run_async(s["task"], s.get("ticket_id"), s.get("environment")) for s in specs)))
+
+    def cancel(self) -> None:
+        """Stop the fleet: queued tickets never start and running tickets skip their remaining steps."""
+        self._cancel.set()
+        self._ticket_pool.shutdown(wait=False, cancel_futures=True)
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._ticket_pool.shutdown(wait=wait)
+        self._step_pool.shutdown(wait=wait)
+
+    def __enter__(self) -> "FleetOrchestrator":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.shutdown()
@@ -0,0 +1,218 @@
+"""
+Resource governor - per-tool and per-host concurrency and rate limits.
+Steps that exceed a limit wait for capacity (backpressure) rather than fail.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager, AsyncExitStack, ExitStack
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, Iterator, Optional
+from urllib.parse import urlparse
+
+from ..tools.registry import ToolRegistry
+
+AGENT_DIR = Path(__file__).resolve().parent.parent
+CONTRACT_PATH = AGENT_DIR / "tools" / "tooling_contract.json"
+
+
+@dataclass(frozen=True)
+class ResourceLimits:
+    max_in_flight: Optional[int] = None
+    rate_per_sec: Optional[float] = None
+    burst: Optional[int] = None
+
+    @classmethod
+    def from_dict(cls, d: Optional[dict]) -> "ResourceLimits":
+        d = d or {}
+        return cls(
+            max_in_flight=d.get("max_in_flight"),
+            rate_per_sec=d.get("rate_per_sec"),
+            burst=d.get("burst"),
+        )
+
+
+class TokenBucket:
+    """Thread-safe token bucket; acquire() blocks until a token is available."""
+    def __init__(self, rate: float, burst: Optional[int] = None):
+        self.rate = float(rate)
+        self.capacity = float(burst or max(1, int(rate)))
+        self._tokens = self.capacity
+        self._stamp = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self) -> float:
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._stamp) * self.rate)
+            self._stamp = now
+            # Go into debt so concurrent callers queue up in arrival order
+            self._tokens -= 1.0
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+    def acquire(self) -> float:
+        wait = self._reserve()
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    async def acquire_async(self) -> float:
+        wait = self._reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
+
+
+class _Gate:
+    """Semaphore plus token bucket for one key (a tool name or a host)."""
+    def __init__(self, limits: ResourceLimits):
+        self.limits = limits
+        self.semaphore = threading.BoundedSemaphore(limits.max_in_flight) if limits.max_in_flight else None
+        self.bucket = TokenBucket(limits.rate_per_sec, limits.burst) if limits.rate_per_sec else None
+        # Updated from many threads; the lock keeps the counters exact
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.waited = 0.0
+
+    def _enter(self, start: float) -> None:
+        with self._lock:
+            self.waited += time.monotonic() - start
+            self.in_flight += 1
+
+    def _exit(self) -> None:
+        with self._lock:
+            self.in_flight -= 1
+
+    @contextmanager
+    def hold(self) -> Iterator[None]:
+        start = time.monotonic()
+        if self.semaphore:
+            self.semaphore.acquire()
+        try:
+            if self.bucket:
+                self.bucket.acquire()
+            self._enter(start)
+            try:
+                yield
+            finally:
+                self._exit()
+        finally:
+            if self.semaphore:
+                self.semaphore.release()
+
+    @asynccontextmanager
+    async def hold_async(self) -> AsyncIterator[None]:
+        """hold() for coroutines: the same limits, waited out without blocking the event loop."""
+        start = time.monotonic()
+        if self.semaphore:
+            # Shared with threaded callers, so poll instead of blocking; backs off to 50ms
+            delay = 0.001
+            while not self.semaphore.acquire(blocking=False):
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 0.05)
+        try:
+            if self.bucket:
+                await self.bucket.acquire_async()
+            self._enter(start)
+            try:
+                yield
+            finally:
+                self._exit()
+        finally:
+            if self.semaphore:
+                self.semaphore.release()
+
+
+class ResourceGovernor:
+    """Scheduler-level limits keyed by tool type and by HTTP host.
+
+    Gates are always taken host-first, then tool. A step waiting on a slow or
+    rate-limited host therefore holds none of its tool's slots, and steps for
+    other hosts keep flowing. The fixed order means steps cannot deadlock.
+    """
+    def __init__(
+        self,
+        tool_limits: Optional[Dict[str, ResourceLimits]] = None,
+        host_limits: Optional[Dict[str, ResourceLimits]] = None,
+        default_host_limits: Optional[ResourceLimits] = None,
+    ):
+        self.tool_limits = dict(tool_limits or {})
+        self.host_limits = dict(host_limits or {})
+        self.default_host_limits = default_host_limits
+        self._gates: Dict[str, _Gate] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_contract(cls, contract: dict, registry: Optional[ToolRegistry] = None) -> "ResourceGovernor":
+        tool_limits: Dict[str, ResourceLimits] = {}
+        host_limits: Dict[str, ResourceLimits] = {}
+        default_host = None
+        for tool in contract.get("tools", []):
+            limits = tool.get("limits") or {}
+            tool_limits[tool["name"]] = ResourceLimits.from_dict(limits)
+            for host, host_cfg in (limits.get("per_host") or {}).items():
+                if host == "default":
+                    default_host = ResourceLimits.from_dict(host_cfg)
+                else:
+                    host_limits[host] = ResourceLimits.from_dict(host_cfg)
+        # Fall back to the concurrency a tool declares when the contract is silent
+        if registry is not None:
+            for name in registry.names():
+                declared = registry.get(name).capabilities.max_concurrency
+                current = tool_limits.get(name, ResourceLimits())
+                if current.max_in_flight is None and declared:
+                    tool_limits[name] = ResourceLimits(declared, current.rate_per_sec, current.burst)
+        return cls(tool_limits, host_limits, default_host)
+
+    @classmethod
+    def from_contract_file(cls, path: Optional[Path] = None, registry: Optional[ToolRegistry] = None) -> "ResourceGovernor":
+        try:
+            contract = json.loads((path or CONTRACT_PATH).read_text(encoding="utf-8"))
+        except Exception:
+            contract = {}
+        return cls.from_contract(contract, registry)
+
+    def _gate(self, key: str, limits: Optional[ResourceLimits]) -> Optional[_Gate]:
+        if limits is None or (limits.max_in_flight is None and limits.rate_per_sec is None):
+            return None
+        gate = self._gates.get(key)
+        if gate is None:
+            with self._lock:
+                gate = self._gates.setdefault(key, _Gate(limits))
+        return gate
+
+    @contextmanager
+    def slot(self, tool: str, host: Optional[str] = None) -> Iterator[None]:
+        with ExitStack() as stack:
+            if host:
+                host_gate = self._gate(f"host:{host}", self.host_limits.get(host, self.default_host_limits))
+                if host_gate:
+                    stack.enter_context(host_gate.hold())
+            tool_gate = self._gate(f"tool:{tool}", self.tool_limits.get(tool))
+            if tool_gate:
+                stack.enter_context(tool_gate.hold())
+            yield
+
+    @asynccontextmanager
+    async def slot_async(self, tool: str, host: Optional[str] = None) -> AsyncIterator[None]:
+        async with AsyncExitStack() as stack:
+            if host:
+                host_gate = self._gate(f"host:{host}", self.host_limits.get(host, self.default_host_limits))
+                if host_gate:
+                    await stack.enter_async_context(host_gate.hold_async())
+            tool_gate = self._gate(f"tool:{tool}", self.tool_limits.get(tool))
+            if tool_gate:
+                await stack.enter_async_context(tool_gate.hold_async())
+            yield
+
+    @staticmethod
+    def host_of(step: Any) -> Optional[str]:
+        url = getattr(step, "url", None)
+        return urlparse(url).hostname if url else None
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        return {key: {"in_flight": g.in_flight, "waited_s": round(g.waited, 3)} for key, g in self._gates.items()}
@@ -0,0 +1,313 @@
+"""
+Historical step latency, keyed by tool, command/URL pattern and environment.
+
+Every run appends its measured step durations to a log that is periodically
+folded into a small stats snapshot. Plans use the stats for duration estimates
+and a critical path, and the executor uses them to start long-pole steps first.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+from urllib.parse import urlparse
+
+from .locking import TicketLock, atomic_write_text
+from .planner import PlanStep, dependencies
+
+AGENT_DIR = Path(__file__).resolve().parent.parent
+STATS_DIR = AGENT_DIR / "artifacts" / ".stats"
+LATENCY_PATH = STATS_DIR / "latency.json"
+
+ANY = "*"
+_RECENT = 32
+_EWMA_ALPHA = 0.2
+_MAX_RUNS = 10_000
+_COMPACT_EVERY = 256
+_ID_SEGMENT = re.compile(r"/(?:\d+|[0-9a-fA-F-]{16,})(?=/|$)")
+_SUBCOMMAND = re.compile(r"[a-z][\w-]*")
+
+
+def step_pattern(step: Any) -> str:
+    """Normalised call shape: 'GET host/path/{id}', 'git status', 'kubectl rollout'."""
+    if step.command == "http":
+        u = urlparse(step.url or "")
+        return f"{(step.method or 'GET').upper()} {u.hostname or ''}{_ID_SEGMENT.sub('/{id}', u.path or '/')}"
+    args = step.args
+    words = [str(w) for w in args] if isinstance(args, (list, tuple)) else str(args or "").split()
+    if step.command == "git":
+        return f"git {words[0]}" if words else "git"
+    if not words:
+        return step.command or ""
+    prog = os.path.basename(words[0])
+    return f"{prog} {words[1]}" if len(words) > 1 and _SUBCOMMAND.fullmatch(words[1]) else prog
+
+
+def _key(tool: str, pattern: str, environment: Optional[str]) -> str:
+    return f"{tool}|{pattern}|{environment or ANY}"
+
+
+def _percentile(values: Sequence[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(pct / 100.0 * len(ordered)))]
+
+
+class LatencyStore:
+    """Incrementally updated stats, shared across processes through a snapshot and an append-only log.
+
+    Each key tracks count, mean, an EWMA, max and the most recent samples (for
+    percentiles). Every observation also updates the environment-wide and
+    pattern-wide rollups, so estimates can fall back when a key is unseen.
+
+    A run appends one line of samples to ``latency.jsonl``; readers fold the
+    lines they have not seen yet. Every ``_COMPACT_EVERY`` runs the folded stats
+    are written to the ``latency.json`` snapshot and the log starts over.
+    """
+
+    def __init__(self, path: Optional[Path] = None):
+        self.path = Path(path or LATENCY_PATH)
+        self.log_path = self.path.with_suffix(".jsonl")
+        self.stats: Dict[str, Dict[str, Any]] = {}
+        self.runs: List[str] = []
+        self._run_set: Set[str] = set()
+        self._mtime = None
+        # Bytes of the log folded into self.stats, and how many runs they hold
+        self._pos = 0
+        self._pending = 0
+        self._lock = threading.RLock()
+        self._reload()
+
+    def _reload(self) -> None:
+        with self._lock:
+            self._load_snapshot()
+            self._fold_log()
+
+    def _load_snapshot(self) -> None:
+        try:
+            st = self.path.stat()
+            # Snapshots are replaced by rename, so a new inode means a new snapshot
+            mtime = (st.st_ino, st.st_mtime_ns)
+        except OSError:
+            mtime = None
+        if mtime == self._mtime:
+            return
+        data: Dict[str, Any] = {}
+        if mtime is not None:
+            try:
+                data = json.loads(self.path.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                return
+        self.stats = data.get("stats", {})
+        self.runs = data.get("runs", [])
+        self._run_set = set(self.runs)
+        self._mtime = mtime
+        self._pos = self._pending = 0
+
+    def _fold_log(self) -> None:
+        try:
+            with self.log_path.open("rb") as f:
+                if os.fstat(f.fileno()).st_size < self._pos:
+                    # Compacted by another process: start again from its snapshot
+                    self._mtime = None
+                    self._load_snapshot()
+                f.seek(self._pos)
+                tail = f.read()
+        except OSError:
+            return
+        # A line without its newline is still being written
+        end = tail.rfind(b"\n") + 1
+        for line in tail[:end].splitlines():
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+            self._fold(entry)
+        self._pos += end
+
+    def _fold(self, entry: Dict[str, Any]) -> bool:
+        run_id = entry.get("run")
+        if run_id in self._run_set:
+            return False
+        for tool, pattern, ms in entry.get("samples") or []:
+            self._observe_call(tool, pattern, entry.get("env"), float(ms))
+        self.runs.append(run_id)
+        self._run_set.add(run_id)
+        self._pending += 1
+        return True
+
+    def _observe(self, key: str, ms: float) -> None:
+        s = self.stats.get(key)
+        if s is None:
+            s = self.stats[key] = {"count": 0, "mean_ms": 0.0, "ewma_ms": ms, "max_ms": 0.0, "recent": []}
+        s["count"] += 1
+        s["mean_ms"] += (ms - s["mean_ms"]) / s["count"]
+        s["ewma_ms"] += _EWMA_ALPHA * (ms - s["ewma_ms"])
+        s["max_ms"] = max(s["max_ms"], ms)
+        s["recent"] = (s["recent"] + [round(ms, 3)])[-_RECENT:]
+
+    def _observe_call(self, tool: str, pattern: str, environment: Optional[str], ms: float) -> None:
+        for key in {_key(tool, pattern, environment), _key(tool, pattern, ANY), _key(tool, ANY, environment), _key(tool, ANY, ANY)}:
+            self._observe(key, ms)
+
+    def observe(self, step: Any, ms: float, environment: Optional[str] = None) -> None:
+        self._observe_call(step.command, step_pattern(step), environment, ms)
+
+    def record_run(self, run_id: str, environment: Optional[str], steps: Sequence[Any], results: Sequence[Any]) -> int:
+        """Append one run's measured durations to the log; a run id is only counted once."""
+        samples = [[s.command, step_pattern(s), _measured_ms(r)] for s, r in zip(steps, results) if _measured_ms(r) is not None]
+        if not samples:
+            return 0
+        entry = {"run": run_id, "env": environment, "samples": samples}
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._lock, TicketLock(".latency-stats", lock_dir=self.path.parent):
+            self._reload()
+            if run_id in self._run_set:
+                return 0
+            with self.log_path.open("ab") as f:
+                # Drop a partial line left by a writer that died mid-append
+                f.truncate(self._pos)
+                f.write(json.dumps(entry).encode("utf-8") + b"\n")
+                self._pos = f.tell()
+            self._fold(entry)
+            if self._pending >= _COMPACT_EVERY:
+                self.save()
+        return len(samples)
+
+    def ingest(self, paths: Iterable[Path]) -> int:
+        """Backfill from session summaries and deployment manifests that carry step durations."""
+        total = 0
+        for path in paths:
+            try:
+                doc = json.loads(Path(path).read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                continue
+            plan = [PlanStep.from_dict(p) for p in doc.get("plan") or [] if isinstance(p, dict)]
+            executed = doc.get("executed") or (doc.get("execution") or {}).get("steps") or []
+            total += self.record_run(_run_id(doc, executed), doc.get("environment"), plan, executed)
+        return total
+
+    def save(self) -> None:
+        """Compact: write the folded stats as the snapshot and empty the log.
+
+        Callers hold the stats lock. Should the process die between the two
+        writes, the runs left in the log are already in the snapshot's run ids
+        and are skipped on the next fold.
+        """
+        del self.runs[:-_MAX_RUNS]
+        self._run_set = set(self.runs)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        atomic_write_text(self.path, json.dumps({"stats": self.stats, "runs": self.runs}, separators=(",", ":")))
+        st = self.path.stat()
+        self._mtime = (st.st_ino, st.st_mtime_ns)
+        with self.log_path.open("ab") as f:
+            f.truncate(0)
+        self._pos = self._pending = 0
+
+    def lookup(self, step: Any, environment: Optional[str] = None) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+        tool, pattern = step.command, step_pattern(step)
+        self._reload()
+        for key in (_key(tool, pattern, environment), _key(tool, pattern, ANY), _key(tool, ANY, environment), _key(tool, ANY, ANY)):
+            s = self.stats.get(key)
+            if s and s["recent"]:
+                return s, key
+        return None, None
+
+    def estimate(self, step: Any, environment: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        if not step.command:
+            return None
+        s, key = self.lookup(step, environment)
+        if s is None:
+            return None
+        return {
+            "p50_ms": round(_percentile(s["recent"], 50), 1),
+            "p95_ms": round(_percentile(s["recent"], 95), 1),
+            "samples": s["count"],
+            "basis": key,
+        }
+
+    def estimate_ms(self, step: Any, environment: Optional[str] = None) -> float:
+        est = self.estimate(step, environment)
+        return est["p50_ms"] if est else 0.0
+
+
+def _run_id(doc: Dict[str, Any], executed: Sequence[Any]) -> str:
+    """The run id a summary or manifest carries.
+
+    Older documents have none. For those the id is derived from the measured
+    durations, which the summary and the manifest of one run share, so each
+    run is counted once whichever file it is read from.
+    """
+    if doc.get("run_id"):
+        return str(doc["run_id"])
+    durations = [(r.get("meta") or {}).get("duration_ms") for r in executed if hasattr(r, "get")]
+    digest = hashlib.sha1(json.dumps([doc.get("ticket_id"), durations]).encode("utf-8")).hexdigest()[:16]
+    return f"legacy:{digest}"
+
+
+def _measured_ms(result: Any) -> Optional[float]:
+    get = result.get
+    meta = get("meta") or {}
+    # Replayed and simulated calls would skew the history
+    if get("status") != "ok" or "duration_ms" not in meta or meta.get("replayed") or meta.get("simulated"):
+        return None
+    return float(meta["duration_ms"])
+
+
+def critical_path(steps: Sequence[PlanStep], costs: Sequence[float]) -> Tuple[float, List[int]]:
+    """Longest chain through the depends_on DAG; steps without dependencies may all run at once."""
+    deps = dependencies(steps)
+    finish: List[float] = []
+    prev: List[Optional[int]] = []
+    for i, d in enumerate(deps):
+        best = max(d, key=lambda j: finish[j], default=None)
+        finish.append(costs[i] + (finish[best] if best is not None else 0.0))
+        prev.append(best)
+    if not finish:
+        return 0.0, []
+    i: Optional[int] = max(range(len(finish)), key=finish.__getitem__)
+    length = finish[i]
+    path: List[int] = []
+    while i is not None:
+        path.append(i)
+        i = prev[i]
+    return length, path[::-1]
+
+
+def estimate_plan(steps: Sequence[PlanStep], environment: Optional[str] = None, store: Optional[LatencyStore] = None) -> Dict[str, Any]:
+    """Predicted duration for a plan: sequential total, critical path and per-step basis."""
+    store = store or default_store()
+    per_step = [store.estimate(s, environment) for s in steps]
+    costs = [e["p50_ms"] if e else 0.0 for e in per_step]
+    length, path = critical_path(steps, costs)
+    return {
+        "sequential_ms": round(sum(costs), 1),
+        "sequential_p95_ms": round(sum(e["p95_ms"] for e in per_step if e), 1),
+        "critical_path_ms": round(length, 1),
+        "critical_path": [steps[i].description for i in path],
+        "unestimated_steps": sum(1 for s, e in zip(steps, per_step) if s.command and e is None),
+        "steps": [dict(e, description=s.description) for s, e in zip(steps, per_step) if e],
+    }
+
+
+_default_store: Optional[LatencyStore] = None
+_default_lock = threading.Lock()
+
+
+def default_store() -> LatencyStore:
+    """Process-wide store backed by artifacts/.stats/latency.json(l)."""
+    global _default_store
+    with _default_lock:
+        if _default_store is None:
+            _default_store = LatencyStore()
+        return _default_store
+
+
+def ingest_history(paths: Optional[Iterable[Path]] = None) -> int:
+    """Backfill the default store; with no paths, from every session summary and manifest."""
+    if paths is None:
+        paths = [*AGENT_DIR.glob("sessions/*/summary.json"), *AGENT_DIR.glob("artifacts/*/deployment_manifest.json")]
+    return default_store().ingest(paths)
@@ -0,0 +1,158 @@
+"""
+Per-ticket locking and atomic persistence for concurrent orchestration.
+A TicketLock is re-entrant within a thread, exclusive across threads, and
+backed by an OS file lock so separate processes serialize on the same ticket.
+"""
+from __future__ import annotations
+
+import asyncio
+import os
+import tempfile
+import threading
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import AsyncIterator, BinaryIO, Callable, Dict, Optional, TextIO
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+AGENT_DIR = Path(__file__).resolve().parent.parent
+LOCKS_DIR = AGENT_DIR / "artifacts" / ".locks"
+
+
+class _LockState:
+    """Shared by every TicketLock on the same path so nesting never re-flocks."""
+    def __init__(self) -> None:
+        self.rlock = threading.RLock()
+        self.depth = 0
+        self.fh = None
+
+
+_states: Dict[str, _LockState] = {}
+_states_guard = threading.Lock()
+
+
+def _state_for(key: str) -> _LockState:
+    with _states_guard:
+        state = _states.get(key)
+        if state is None:
+            state = _states[key] = _LockState()
+        return state
+
+
+class TicketLock:
+    def __init__(self, ticket_id: str, lock_dir: Optional[Path] = None):
+        self.ticket_id = ticket_id
+        self.path = (lock_dir or LOCKS_DIR) / f"{ticket_id}.lock"
+        self._state = _state_for(str(self.path))
+
+    def acquire(self) -> None:
+        st = self._state
+        st.rlock.acquire()
+        if st.depth == 0:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            fh = open(self.path, "a+b")
+            try:
+                if fcntl is not None:
+                    fcntl.flock(fh.fileno(), fcntl.LOCK_EX)
+                else:
+                    fh.seek(0)
+                    msvcrt.locking(fh.fileno(), msvcrt.LK_LOCK, 1)
+            except Exception:
+                fh.close()
+                st.rlock.release()
+                raise
+            st.fh = fh
+        st.depth += 1
+
+    def release(self) -> None:
+        st = self._state
+        st.depth -= 1
+        if st.depth == 0 and st.fh is not None:
+            try:
+                if fcntl is not None:
+                    fcntl.flock(st.fh.fileno(), fcntl.LOCK_UN)
+                else:
+                    st.fh.seek(0)
+                    msvcrt.locking(st.fh.fileno(), msvcrt.LK_UNLCK, 1)
+            finally:
+                st.fh.close()
+                st.fh = None
+        st.rlock.release()
+
+    def __enter__(self) -> "TicketLock":
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.release()
+
+    @asynccontextmanager
+    async def acquire_async(self) -> AsyncIterator["TicketLock"]:
+        """Hold the lock from a coroutine, polling so the event loop never blocks.
+
+        Not re-entrant; it excludes threaded holders of the same ticket through
+        the OS lock.
+        """
+        delay = 0.005
+        while (fh := try_lock_file(self.path)) is None:
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 0.1)
+        try:
+            yield self
+        finally:
+            unlock_file(fh)
+
+
+def atomic_write(path: Path, write: Callable[[TextIO], None]) -> None:
+    """Stream into a temp file and rename so readers never see a half-written file."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=str(path.parent), prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            write(f)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def atomic_write_text(path: Path, text: str) -> None:
+    atomic_write(path, lambda f: f.write(text))
+
+
+def try_lock_file(path: Path) -> Optional[BinaryIO]:
+    """Non-blocking exclusive OS lock, held until unlock_file() or process exit.
+
+    Unlike TicketLock it is not tied to a thread, so a lease taken on one
+    thread can be returned from another.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fh = open(path, "a+b")
+    try:
+        if fcntl is not None:
+            fcntl.flock(fh.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            fh.seek(0)
+            msvcrt.locking(fh.fileno(), msvcrt.LK_NBLCK, 1)
+    except OSError:
+        fh.close()
+        return None
+    return fh
+
+
+def unlock_file(fh: BinaryIO) -> None:
+    try:
+        if fcntl is not None:
+            fcntl.flock(fh.fileno(), fcntl.LOCK_UN)
+        else:
+            fh.seek(0)
+            msvcrt.locking(fh.fileno(), msvcrt.LK_UNLCK, 1)
+    finally:
+        fh.close()
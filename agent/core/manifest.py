@@ -0,0 +1,176 @@
+"""
+Incremental deployment manifest: planned vs actual, written as steps finish.
+
+Each run writes ``manifest.deltas.jsonl`` next to the manifest. The log starts
+with one ``plan`` line, then gets one ``step`` line per completed step and
+``fields`` lines for run-level facts (status, validation, rollback). Appending
+a step costs the same however long the plan is. A crash mid-run leaves every
+finished step on disk. ``deployment_manifest.json`` is the materialized view:
+it is rewritten when the run begins and when it finishes, and read_manifest()
+folds the deltas for an up-to-date view in between.
+"""
+from __future__ import annotations
+
+import json
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, TextIO
+
+from .locking import atomic_write_text
+from .records import dumps, write_json
+
+AGENT_DIR = Path(__file__).resolve().parent.parent
+ARTIFACTS_DIR = AGENT_DIR / "artifacts"
+DELTAS_NAME = "manifest.deltas.jsonl"
+VIEW_NAME = "deployment_manifest.json"
+
+
+class ManifestLog:
+    """Writer for one ticket's manifest; one run at a time (callers hold the ticket lock)."""
+
+    def __init__(self, ticket_id: str, root: Optional[Path] = None):
+        self.ticket_id = ticket_id
+        self.root = Path(root or ARTIFACTS_DIR / ticket_id)
+        self.deltas_path = self.root / DELTAS_NAME
+        self.view_path = self.root / VIEW_NAME
+        self.plan: List[Any] = []
+        self.results: Dict[int, Any] = {}
+        self.fields: Dict[str, Any] = {}
+        self.started = False
+        self._fh: Optional[TextIO] = None
+        self._lock = threading.Lock()
+
+    def begin(self, plan: Sequence[Any], **fields: Any) -> None:
+        """Start a run: a fresh delta log holding the plan, and a view with every step pending."""
+        fields.setdefault("time", datetime.utcnow().strftime("%Y-%m-%d %H:%M:%SZ"))
+        with self._lock:
+            self.close()
+            self.plan = [{"description": p} if isinstance(p, str) else p for p in plan]
+            self.results = {}
+            self.fields = dict(fields)
+            self.started = True
+            atomic_write_text(self.deltas_path, dumps({"op": "plan", "ticket_id": self.ticket_id, "steps": self.plan, **fields}) + "\n")
+            self._fh = self.deltas_path.open("a", encoding="utf-8")
+        self.materialize()
+
+    def _append(self, delta: dict) -> None:
+        line = dumps(delta) + "\n"
+        with self._lock:
+            if self._fh is None:
+                self._fh = self.deltas_path.open("a", encoding="utf-8")
+            self._fh.write(line)
+            self._fh.flush()
+
+    def record_step(self, index: int, result: Any) -> None:
+        """Executor callback: one finished step (ok, failed or skipped)."""
+        self.results[index] = result
+        self._append({"op": "step", "index": index, "result": result})
+
+    def update(self, **fields: Any) -> None:
+        self.fields.update(fields)
+        self._append({"op": "fields", **fields})
+
+    def finish(self, **fields: Any) -> Path:
+        """Record final fields and rewrite the materialized view."""
+        if fields:
+            self.update(**fields)
+        with self._lock:
+            self.close()
+        return self.materialize()
+
+    def close(self) -> None:
+        if self._fh is not None:
+            self._fh.close()
+            self._fh = None
+
+    def view(self) -> Dict[str, Any]:
+        return _view(self.ticket_id, self.plan, self.results, self.fields)
+
+    def materialize(self) -> Path:
+        write_json(self.view_path, self.view())
+        return self.view_path
+
+
+def _view(ticket_id: str, plan: List[Any], results: Dict[int, Any], fields: Dict[str, Any]) -> Dict[str, Any]:
+    out: Dict[str, Any] = {"ticket_id": ticket_id, "time": fields.get("time"), "environment": fields.get("environment")}
+    out["plan"] = plan
+    out["executed"] = [results.get(i) or {"description": _get(p, "description", ""), "status": "planned"} for i, p in enumerate(plan)]
+    out.update((k, v) for k, v in fields.items() if k not in ("time", "environment"))
+    out["progress"] = manifest_diff(out)["totals"]
+    return out
+
+
+def _get(item: Any, key: str, default: Any = None) -> Any:
+    return item.get(key, default) if hasattr(item, "get") else default
+
+
+def read_manifest(ticket_id: str, root: Optional[Path] = None) -> Optional[Dict[str, Any]]:
+    """Current manifest folded from the delta log, so it is complete up to the last finished step.
+
+    Falls back to the materialized view when there is no delta log; a partly
+    written last line (crash mid-append) is ignored.
+    """
+    root = Path(root or ARTIFACTS_DIR / ticket_id)
+    plan: Optional[List[Any]] = None
+    results: Dict[int, Any] = {}
+    fields: Dict[str, Any] = {}
+    try:
+        with (root / DELTAS_NAME).open(encoding="utf-8") as f:
+            for line in f:
+                if not line.endswith("\n"):
+                    break
+                delta = json.loads(line)
+                op = delta.pop("op", None)
+                if op == "plan":
+                    plan = delta.pop("steps", [])
+                    delta.pop("ticket_id", None)
+                    fields = delta
+                elif op == "step":
+                    results[int(delta["index"])] = delta["result"]
+                elif op == "fields":
+                    fields.update(delta)
+    except OSError:
+        pass
+    if plan is None:
+        try:
+            return json.loads((root / VIEW_NAME).read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+    return _view(ticket_id, plan, results, fields)
+
+
+def manifest_diff(manifest: Dict[str, Any]) -> Dict[str, Any]:
+    """Planned vs executed vs skipped: per-step status and timing, plus totals.
+
+    Works on a materialized view or on read_manifest() output.
+    """
+    plan = manifest.get("plan") or []
+    executed = manifest.get("executed") or []
+    groups: Dict[str, List[Dict[str, Any]]] = {"executed": [], "skipped": [], "pending": []}
+    duration = 0.0
+    for i, step in enumerate(plan):
+        result = executed[i] if i < len(executed) else None
+        status = _get(result, "status", "planned")
+        entry = {"index": i, "description": _get(step, "description", ""), "command": _get(step, "command"), "status": status}
+        ms = (_get(result, "meta") or {}).get("duration_ms")
+        if ms is not None:
+            entry["duration_ms"] = ms
+            duration += ms
+        if status == "planned":
+            groups["pending"].append(entry)
+        elif status == "skipped":
+            entry["reason"] = _get(result, "stderr", "")
+            groups["skipped"].append(entry)
+        else:
+            groups["executed"].append(entry)
+    failed = sum(1 for e in groups["executed"] if e["status"].startswith("failed"))
+    groups["totals"] = {
+        "planned": len(plan),
+        "executed": len(groups["executed"]),
+        "failed": failed,
+        "skipped": len(groups["skipped"]),
+        "pending": len(groups["pending"]),
+        "duration_ms": round(duration, 3),
+    }
+    return groups
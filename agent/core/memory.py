@@ -1,35 +1,196 @@
 from __future__ import annotations
 
 import json
-from dataclasses import dataclass
+from collections import deque
+from dataclasses import dataclass, field
 from datetime import datetime
+from itertools import islice
 from pathlib import Path
-from typing import Optional, List, Any
+from typing import Callable, Deque, Optional, List, Any
+
+from .records import Record, dumps, write_json
 
 AGENT_DIR = Path(__file__).resolve().parent.parent
 SESSIONS_DIR = AGENT_DIR / "sessions"
 
+# Archive lines between sparse byte-offset index entries used for paging
+INDEX_STRIDE = 256
+
+
+def _now() -> str:
+    return datetime.utcnow().strftime("%Y-%m-%d %H:%M:%SZ")
 
-@dataclass
-class ConversationTurn:
+
+@dataclass(slots=True)
+class ConversationTurn(Record):
     role: str
     content: str
-    time: str = datetime.utcnow().strftime("%Y-%m-%d %H:%M:%SZ")
+    time: str = field(default_factory=_now)
+
+
+Summarizer = Callable[[List[ConversationTurn]], str]
+
+
+def _clip(text: str, limit: int) -> str:
+    text = " ".join(text.split())
+    return text if len(text) <= limit else text[: limit - 3] + "..."
+
+
+def summarize_turns(turns: List[ConversationTurn]) -> str:
+    """Deterministic summary: span, role counts, and the first and last requests."""
+    if not turns:
+        return ""
+    roles: dict[str, int] = {}
+    for t in turns:
+        roles[t.role] = roles.get(t.role, 0) + 1
+    counts = ", ".join(f"{r}={n}" for r, n in sorted(roles.items()))
+    users = [t for t in turns if t.role == "user"] or turns
+    first, last = users[0], users[-1]
+    text = f"{len(turns)} turns {turns[0].time}..{turns[-1].time} ({counts}); first: {_clip(first.content, 120)}"
+    if last is not first:
+        text += f"; last: {_clip(last.content, 120)}"
+    return text
 
 
 class SessionMemory:
-    def __init__(self, ticket_id: Optional[str] = None):
+    """Windowed conversation memory.
+
+    The newest ``window`` turns are kept in a ring. Older turns are appended to
+    ``turns.archive.jsonl`` (readable via page()) and folded in batches into a
+    bounded list of summaries. Memory use and per-turn persistence cost stay
+    flat however long a session runs.
+    """
+    def __init__(
+        self,
+        ticket_id: Optional[str] = None,
+        window: int = 50,
+        summarizer: Optional[Summarizer] = None,
+        compact_batch: int = 25,
+        max_summaries: int = 8,
+        resume: bool = True,
+    ):
         self.ticket_id = ticket_id or "default"
         self.root = SESSIONS_DIR / self.ticket_id
         self.root.mkdir(parents=True, exist_ok=True)
-        self.turns: List[ConversationTurn] = []
+        self.window = max(1, window)
+        self.summarizer = summarizer or summarize_turns
+        self.compact_batch = max(1, compact_batch)
+        self.max_summaries = max(2, max_summaries)
+        self.turns: Deque[ConversationTurn] = deque(maxlen=self.window)
+        self.summaries: List[str] = []
+        self.archived = 0
+        self._pending: List[ConversationTurn] = []
+        self._index: List[int] = []
+        self.archive_path = self.root / "turns.archive.jsonl"
+        if resume:
+            self.resume()
+
+    def resume(self) -> None:
+        """Replace the in-memory state with the ticket's persisted window, summaries and archive index.
+
+        Runs that share a ticket call this under the ticket lock, so each starts
+        from the previous run's state rather than one read before it finished.
+        """
+        self.turns.clear()
+        self.summaries = []
+        self.archived = 0
+        self._pending = []
+        self._index = []
+        try:
+            meta = json.loads((self.root / "memory.json").read_text(encoding="utf-8"))
+        except Exception:
+            meta = {}
+        self.summaries = list(meta.get("summaries", []))
+        self._pending = [ConversationTurn(t["role"], t["content"], t["time"]) for t in meta.get("pending", [])]
+        size = self.archive_path.stat().st_size if self.archive_path.exists() else 0
+        if meta.get("archive_bytes") == size:
+            self.archived = int(meta.get("archived_turns", 0))
+            self._index = list(meta.get("index", []))
+        elif size:
+            # Archive changed outside this process: rebuild the sparse index once
+            offset = 0
+            with self.archive_path.open("rb") as f:
+                for line in f:
+                    if self.archived % INDEX_STRIDE == 0:
+                        self._index.append(offset)
+                    offset += len(line)
+                    self.archived += 1
+        try:
+            saved = json.loads((self.root / "turns.json").read_text(encoding="utf-8"))
+        except Exception:
+            saved = []
+        for t in saved:
+            self.record_turn(ConversationTurn(t.get("role", ""), t.get("content", ""), t.get("time") or _now()))
 
     def record_turn(self, turn: ConversationTurn) -> None:
+        if len(self.turns) == self.window:
+            self._evict(self.turns[0])
         self.turns.append(turn)
 
+    def _evict(self, turn: ConversationTurn) -> None:
+        line = (dumps(turn) + "\n").encode("utf-8")
+        with self.archive_path.open("ab") as f:
+            if self.archived % INDEX_STRIDE == 0:
+                self._index.append(f.tell())
+            f.write(line)
+        self.archived += 1
+        self._pending.append(turn)
+        if len(self._pending) >= self.compact_batch:
+            self.compact()
+
+    def compact(self) -> None:
+        """Fold pending evicted turns into a summary, merging the oldest summaries to stay bounded."""
+        if self._pending:
+            self.summaries.append(self.summarizer(self._pending))
+            self._pending = []
+        while len(self.summaries) > self.max_summaries:
+            merged = "; ".join(self.summaries[:2])
+            self.summaries[:2] = [_clip(merged, 600)]
+
+    def page(self, offset: int = 0, limit: int = 50) -> List[ConversationTurn]:
+        """Read archived turns [offset, offset+limit) from disk, oldest first."""
+        if offset >= self.archived or limit <= 0 or not self._index:
+            return []
+        block = offset // INDEX_STRIDE
+        out: List[ConversationTurn] = []
+        with self.archive_path.open("r", encoding="utf-8") as f:
+            f.seek(self._index[block])
+            for line in islice(f, offset - block * INDEX_STRIDE, offset - block * INDEX_STRIDE + limit):
+                d = json.loads(line)
+                out.append(ConversationTurn(d["role"], d["content"], d["time"]))
+        return out
+
+    def context(self, max_chars: int = 4000) -> str:
+        """Bounded reasoning context: up to a quarter for older-turn summaries, the rest for the newest turns."""
+        older: List[str] = []
+        budget = max_chars // 4
+        for s in reversed(self.summaries + ([self.summarizer(self._pending)] if self._pending else [])):
+            line = f"earlier: {s}"
+            if len(line) > budget:
+                break
+            older.append(line)
+            budget -= len(line) + 1
+        recent: List[str] = []
+        budget += max_chars - max_chars // 4
+        for t in reversed(self.turns):
+            line = f"{t.role}: {t.content}"
+            if len(line) > budget:
+                break
+            recent.append(line)
+            budget -= len(line) + 1
+        return "\n".join(older[::-1] + recent[::-1])
+
     def record_plan(self, plan: Any) -> None:
-        (self.root / "plan.json").write_text(json.dumps({"title": getattr(plan, "title", ""), "steps": [s.to_dict() for s in getattr(plan, "steps", [])]}, indent=2), encoding="utf-8")
+        write_json(self.root / "plan.json", {"title": getattr(plan, "title", ""), "steps": getattr(plan, "steps", [])})
 
     def persist_summary(self, summary: dict) -> None:
-        (self.root / "summary.json").write_text(json.dumps(summary, indent=2), encoding="utf-8")
-        (self.root / "turns.json").write_text(json.dumps([t.__dict__ for t in self.turns], indent=2), encoding="utf-8")
+        write_json(self.root / "summary.json", summary)
+        write_json(self.root / "turns.json", list(self.turns))
+        write_json(self.root / "memory.json", {
+            "window": self.window,
+            "archived_turns": self.archived,
+            "archive_bytes": self.archive_path.stat().st_size if self.archive_path.exists() else 0,
+            "index": self._index,
+            "summaries": self.summaries,
+            "pending": self._pending,
+        })
@@ -4,17 +4,32 @@ Coordinates planning, execution, validation, memory, and state transitions.
 """
 from __future__ import annotations
 
+import asyncio
+import threading
+import uuid
+from concurrent.futures import Executor, ThreadPoolExecutor
 from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
 from typing import Any, Optional
 
+from ..tools.registry import ToolRegistry, default_registry
+from ..tools import worktrees
+from .cassette import cassette_registry
 from .planner import FDEPlanner, TaskPlan
 from .executor import ToolExecutor, ExecutionResult
+from .governor import ResourceGovernor
+from .latency import default_store
+from .manifest import ManifestLog
+from .profiling import Profiler
+from .locking import TicketLock
 from .validator import ValidationEngine
 from .memory import SessionMemory, ConversationTurn
-from .state_machine import DeploymentStateMachine, DeploymentState
+from .reasoner import LLMReasoner
+from .state_machine import ACTIVE, DeploymentStateMachine, DeploymentState, StateLog
+from ..domains.base import BaseDomain, DomainContext
 from ..domains.registry import DomainRegistry
+from ..domains.probes import ComplianceTarget
 
 
 @dataclass
@@ -22,40 +37,223 @@ class OrchestratorConfig:
     ticket_id: Optional[str] = None
     environment: Optional[str] = None
     audit_log: Optional[Path] = None
+    max_parallel: int = 1
+    workdir: Optional[Path] = None
+    compliance_target: Optional[Path] = None
+    # Record every tool call to a cassette, or answer tool calls from one
+    record: Optional[Path] = None
+    replay: Optional[Path] = None
+    replay_speed: float = 1.0
+    # Run git steps in a per-ticket detached worktree instead of the user's checkout
+    worktrees: bool = False
+    # "sample" or "cprofile": write a per-phase profile to artifacts/<ticket>/profile/
+    profile: Optional[str] = None
 
 
 class FDEOrchestrator:
-    def __init__(self, config: OrchestratorConfig):
+    def __init__(
+        self,
+        config: OrchestratorConfig,
+        governor: Optional[ResourceGovernor] = None,
+        step_pool: Optional[Executor] = None,
+        registry: Optional[ToolRegistry] = None,
+        cancel: Optional[threading.Event] = None,
+        manifest: Optional[ManifestLog] = None,
+        profiler: Optional[Profiler] = None,
+        state_log: Optional[StateLog] = None,
+    ):
         self.config = config
+        # A caller's profiler spans its own phases too; otherwise config.profile gets one per run
+        self.profiler = profiler or Profiler()
+        self._own_profiler = profiler is None and bool(config.profile)
+        # Planned-vs-actual evidence, appended to as each step finishes
+        self.manifest = manifest
+        if config.workdir:
+            Path(config.workdir).mkdir(parents=True, exist_ok=True)
         self.planner = FDEPlanner()
-        self.executor = ToolExecutor(ticket_id=config.ticket_id, audit_log=config.audit_log)
+        workdir = str(config.workdir) if config.workdir else None
+        self.latency = default_store()
+        if registry is None:
+            registry = cassette_registry(
+                record=config.record,
+                replay=config.replay,
+                speed=config.replay_speed,
+                ticket_id=config.ticket_id,
+                audit_log=config.audit_log,
+                workdir=workdir,
+                worktrees=config.worktrees,
+            ) or default_registry(ticket_id=config.ticket_id, audit_log=config.audit_log, workdir=workdir, worktrees=config.worktrees)
+        self.executor = ToolExecutor(
+            ticket_id=config.ticket_id,
+            audit_log=config.audit_log,
+            registry=registry,
+            max_parallel=config.max_parallel,
+            workdir=workdir,
+            governor=governor,
+            pool=step_pool,
+            cancel=cancel,
+            estimator=lambda step: self.latency.estimate_ms(step, config.environment),
+            on_result=manifest.record_step if manifest else None,
+            profiler=self.profiler,
+        )
         self.validator = ValidationEngine()
-        self.memory = SessionMemory(ticket_id=config.ticket_id)
-        self.state = DeploymentStateMachine()
+        self.reasoner = LLMReasoner()
+        # Older turns are compacted by the reasoner so long sessions stay bounded
+        # Persisted turns are loaded by each run under the ticket lock, never before it
+        self.memory = SessionMemory(ticket_id=config.ticket_id, summarizer=self.reasoner.summarize, resume=False)
+        # Serializes runs that share a ticket id, across threads and processes
+        self.lock = TicketLock(self.memory.ticket_id)
+        self.state = DeploymentStateMachine(self.memory.ticket_id, state_log)
         self.domain_registry = DomainRegistry()
 
     def run_task(self, task: str) -> dict[str, Any]:
-        domain = self.domain_registry.detect(task)
+        if self._own_profiler:
+            self.profiler = self.executor.profiler = Profiler(self.config.profile)
+        try:
+            with self.lock:
+                try:
+                    with self.profiler.phase("run_task"):
+                        return self._run_task(task)
+                except Exception as e:
+                    self._abort(e)
+                    raise
+                finally:
+                    # The ticket's git worktrees go back to the pool for the next ticket
+                    worktrees.release_worktrees(self.memory.ticket_id)
+        finally:
+            if self._own_profiler:
+                self.profiler.finish(self.memory.ticket_id)
+
+    async def run_task_async(self, task: str) -> dict[str, Any]:
+        """run_task() for asyncio callers.
+
+        Steps run as coroutines (asyncio subprocesses, httpx when installed), so
+        many tickets interleave on one loop without a thread per step; file
+        writes and domain hooks run on worker threads, off the loop.
+        """
+        async with self.lock.acquire_async():
+            try:
+                return await self._run_task_async(task)
+            except Exception as e:
+                await asyncio.to_thread(self._abort, e)
+                raise
+            finally:
+                await asyncio.to_thread(worktrees.release_worktrees, self.memory.ticket_id)
+
+    def _abort(self, error: Exception) -> None:
+        # Leave the log saying why, rather than a ticket forever "Executing"
+        if self.state.current_state in ACTIVE:
+            self.state.set_state(DeploymentState.Failed, reason=f"{type(error).__name__}: {error}")
+
+    def _begin(self, task: str) -> tuple[str, Optional[BaseDomain], DomainContext]:
+        domain_name, domain = self.domain_registry.resolve(task)
+        ctx = DomainContext(
+            environment=self.config.environment,
+            target=ComplianceTarget.from_file(self.config.compliance_target) if self.config.compliance_target else None,
+        )
+        # One id per run, shared by the summary, the manifest and the latency history
+        self.run_id = uuid.uuid4().hex
+        self.memory.resume()
         self.memory.record_turn(ConversationTurn(role="user", content=task))
+        # We hold the ticket lock, so an in-flight state is left over from a run that died
+        if self.state.current_state in ACTIVE:
+            self.state.set_state(DeploymentState.Failed, reason="abandoned by an earlier run")
         self.state.set_state(DeploymentState.Planning)
+        return domain_name, domain, ctx
+
+    def _begin_manifest(self, plan: TaskPlan, domain_name: str) -> None:
+        if self.manifest is not None:
+            self.manifest.begin(plan.steps, environment=self.config.environment, domain=domain_name, run_id=self.run_id)
+
+    def _preflight_blocked(self, plan: TaskPlan) -> list[ExecutionResult]:
+        results = [ExecutionResult(s.description, s.command, "skipped", "", "blocked: domain preflight failed") for s in plan.steps]
+        if self.manifest is not None:
+            for i, r in enumerate(results):
+                self.manifest.record_step(i, r)
+        return results
+
+    def _run_task(self, task: str) -> dict[str, Any]:
+        domain_name, domain, ctx = self._begin(task)
+
+        # Domain hooks run on their own threads, overlapping planning and validation
+        with ThreadPoolExecutor(max_workers=2, thread_name_prefix="fde-hooks") as hooks:
+            pre = hooks.submit(domain.preflight, ctx) if domain else None
+            with self.profiler.phase("planning"):
+                plan: TaskPlan = self.planner.decompose(task, domain=domain_name)
+                self.memory.record_plan(plan)
+                self._begin_manifest(plan, domain_name)
+            preflight = pre.result() if pre else None
+
+            if preflight is None or preflight["ok"]:
+                self.state.set_state(DeploymentState.Executing)
+                results: list[ExecutionResult] = self.executor.execute(plan.steps)
+            else:
+                results = self._preflight_blocked(plan)
+
+            post = hooks.submit(domain.postflight, ctx) if domain and results else None
+            with self.profiler.phase("validation"):
+                validation_ok = bool(preflight is None or preflight["ok"]) and self.validator.validate(plan, results)
+            postflight = post.result() if post else None
+        return self._conclude(domain_name, plan, results, validation_ok, preflight, postflight)
+
+    async def _run_task_async(self, task: str) -> dict[str, Any]:
+        domain_name, domain, ctx = await asyncio.to_thread(self._begin, task)
+
+        pre = asyncio.ensure_future(asyncio.to_thread(domain.preflight, ctx)) if domain else None
+        plan: TaskPlan = self.planner.decompose(task, domain=domain_name)
+        await asyncio.to_thread(self.memory.record_plan, plan)
+        await asyncio.to_thread(self._begin_manifest, plan, domain_name)
+        preflight = await pre if pre else None
+
+        if preflight is None or preflight["ok"]:
+            await asyncio.to_thread(self.state.set_state, DeploymentState.Executing)
+            results: list[ExecutionResult] = await self.executor.execute_async(plan.steps)
+        else:
+            results = await asyncio.to_thread(self._preflight_blocked, plan)
 
-        plan: TaskPlan = self.planner.decompose(task, domain=domain)
-        self.memory.record_plan(plan)
-        self.state.set_state(DeploymentState.Executing)
+        post = asyncio.ensure_future(asyncio.to_thread(domain.postflight, ctx)) if domain and results else None
+        validation_ok = bool(preflight is None or preflight["ok"]) and self.validator.validate(plan, results)
+        postflight = await post if post else None
+        return await asyncio.to_thread(self._conclude, domain_name, plan, results, validation_ok, preflight, postflight)
 
-        results: list[ExecutionResult] = self.executor.execute(plan.steps)
-        validation_ok = self.validator.validate(plan, results)
-        self.state.set_state(DeploymentState.Validated if validation_ok else DeploymentState.Failed)
+    def _conclude(self, domain_name: str, plan: TaskPlan, results: list[ExecutionResult], validation_ok: bool,
+                  preflight: Optional[dict], postflight: Optional[dict]) -> dict[str, Any]:
+        """Final state, summary and persistence, shared by the sync and async pipelines."""
+        if self.executor.cancel.is_set():
+            self.state.set_state(DeploymentState.Cancelled)
+        elif validation_ok:
+            self.state.set_state(DeploymentState.Validated)
+        else:
+            self.state.set_state(DeploymentState.Failed, reason="preflight failed" if preflight and not preflight["ok"] else "validation failed")
 
         summary = {
             "time": datetime.utcnow().strftime("%Y-%m-%d %H:%M:%SZ"),
             "environment": self.config.environment,
             "ticket_id": self.config.ticket_id,
-            "domain": domain,
-            "plan": [s.to_dict() for s in plan.steps],
-            "executed": [r.to_dict() for r in results],
+            "run_id": self.run_id,
+            "domain": domain_name,
+            # Records are serialized in place by memory/manifest writers; callers get plain dicts
+            "plan": plan.steps,
+            "executed": results,
             "validation_ok": validation_ok,
             "status": self.state.current_state.name,
         }
-        self.memory.persist_summary(summary)
-        return summary
\ No newline at end of file
+        if preflight is not None:
+            compliance = preflight.pop("compliance", None)
+            summary["preflight"] = preflight
+            if compliance is not None:
+                summary["compliance"] = compliance
+        if postflight is not None:
+            summary["postflight"] = postflight
+        with self.profiler.phase("persistence"):
+            if self.manifest is not None:
+                self.manifest.finish(state=summary["status"], validation_ok=validation_ok)
+            self.memory.record_turn(ConversationTurn(role="assistant", content=f"{plan.title}: {summary['status']} ({len(results)} steps)"))
+            self.memory.persist_summary(summary)
+            try:
+                self.latency.record_run(self.run_id, self.config.environment, plan.steps, results)
+            except OSError:
+                # Latency history is advisory; never fail a ticket over it
+                pass
+        # The returned summary is plain JSON data, whatever the caller does with it
+        return dict(summary, plan=[s.to_dict() for s in plan.steps], executed=[r.to_dict() for r in results])
@@ -1,27 +1,71 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import Optional, List
+from typing import Any, Iterator, Optional, List, Sequence, Set, Tuple
 
+from .records import Record
 
-@dataclass
-class PlanStep:
+
+@dataclass(slots=True)
+class PlanStep(Record):
     description: str
     command: Optional[str] = None
     args: Optional[object] = None
     method: Optional[str] = None
     url: Optional[str] = None
+    # http only: JSON-schema subset checked while the body streams, and whether to keep the full body
+    schema: Optional[dict] = None
+    spool: bool = False
+    # Indices of earlier steps that must finish first; None means no ordering constraint
+    depends_on: Optional[List[int]] = None
+    # Index of an earlier step whose stdout this step reads: as stdin (shell, git) or request body (http)
+    input_from: Optional[int] = None
+    # Pipe files resolved by the executor for one run; never serialized
+    stdin_path: Optional[str] = None
+    stdout_path: Optional[str] = None
+
+    def _json_items(self) -> Iterator[Tuple[str, Any]]:
+        yield "description", self.description
+        if self.command: yield "command", self.command
+        if self.args is not None: yield "args", self.args
+        if self.method: yield "method", self.method
+        if self.url: yield "url", self.url
+        if self.schema: yield "schema", self.schema
+        if self.spool: yield "spool", self.spool
+        if self.depends_on is not None: yield "depends_on", self.depends_on
+        if self.input_from is not None: yield "input_from", self.input_from
+
+    @classmethod
+    def from_dict(cls, d: dict) -> "PlanStep":
+        # Runner plans use "cmd" for shell commands and "data" for http bodies
+        args = d.get("args")
+        if args is None:
+            args = d.get("cmd") if d.get("command") != "http" else d.get("data")
+        return cls(
+            description=d.get("description", ""),
+            command=d.get("command"),
+            args=args,
+            method=d.get("method"),
+            url=d.get("url"),
+            schema=d.get("schema"),
+            spool=bool(d.get("spool", False)),
+            depends_on=d.get("depends_on"),
+            input_from=d.get("input_from"),
+        )
+
 
-    def to_dict(self) -> dict:
-        out = {"description": self.description}
-        if self.command: out["command"] = self.command
-        if self.args is not None: out["args"] = self.args
-        if self.method: out["method"] = self.method
-        if self.url: out["url"] = self.url
-        return out
+def dependencies(steps: Sequence[PlanStep]) -> List[Set[int]]:
+    """Per-step dependency sets, ``input_from`` included; references to the step itself or to later steps are ignored."""
+    deps = []
+    for i, s in enumerate(steps):
+        wanted = set(s.depends_on or ())
+        if s.input_from is not None:
+            wanted.add(s.input_from)
+        deps.append({d for d in wanted if 0 <= d < i})
+    return deps
 
 
-@dataclass
+@dataclass(slots=True)
 class TaskPlan:
     title: str
     steps: List[PlanStep]
@@ -36,16 +80,18 @@ class FDEPlanner:
                 PlanStep("Start sync banner", command="shell", args="echo Starting patient record sync"),
                 PlanStep("Fetch API health (viz as placeholder)", command="http", method="GET", url="http://127.0.0.1:8000/index.html"),
                 PlanStep("Check repo status", command="git", args=["status"]),
-                PlanStep("Finalize sync", command="shell", args="echo Sync finalized"),
-                PlanStep("Validation: confirm sync outcomes via health endpoint", command="http", method="GET", url="http://127.0.0.1:8000/index.html"),
+                # Finalizing records the sync, and validation checks it; neither may overlap the steps before them
+                PlanStep("Finalize sync", command="shell", args="echo Sync finalized", depends_on=[0, 1, 2]),
+                PlanStep("Validation: confirm sync outcomes via health endpoint", command="http", method="GET", url="http://127.0.0.1:8000/index.html",
+                         depends_on=[0, 1, 2, 3]),
             ]
             return TaskPlan(title="Patient Records Sync", steps=steps)
-        # Default non-executable planning
+        # Default non-executable planning; each phase follows the one before it
         steps = [
             PlanStep("Discovery: confirm goals, success criteria, constraints, timeline"),
-            PlanStep("Approvals: prepare change request with validation and rollback"),
-            PlanStep("Delivery: execute in staging first; capture artifacts and logs"),
-            PlanStep("Validation: explicit checks tied to success criteria; record results"),
-            PlanStep("Handoff: provide runbooks, monitoring guidance, and escalation path"),
+            PlanStep("Approvals: prepare change request with validation and rollback", depends_on=[0]),
+            PlanStep("Delivery: execute in staging first; capture artifacts and logs", depends_on=[1]),
+            PlanStep("Validation: explicit checks tied to success criteria; record results", depends_on=[2]),
+            PlanStep("Handoff: provide runbooks, monitoring guidance, and escalation path", depends_on=[3]),
         ]
         return TaskPlan(title="General Delivery", steps=steps)
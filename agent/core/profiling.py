@@ -0,0 +1,274 @@
+"""
+Opt-in profiling of a run, phase by phase.
+
+A phase is a named block such as ``planning``, ``tool:http`` or
+``persistence``. For every phase the profiler records calls, wall time,
+thread CPU time and net traced allocations. These numbers are exclusive:
+time spent in a nested phase counts only there, so the phases add up to the
+run. CPU profiles come in two modes:
+
+- ``sample``: a background thread samples the stacks of threads that are
+  inside a phase every few milliseconds. It is cheap enough for production
+  and covers worker threads.
+- ``cprofile``: deterministic. Each phase runs under its own cProfile, and an
+  enclosing phase's profile is paused while a nested one runs.
+
+Phases other than tool calls also take tracemalloc snapshots on entry and
+exit, and their diff gives the top allocation sites. finish() writes the
+report to ``artifacts/<ticket>/profile/``.
+"""
+from __future__ import annotations
+
+import cProfile
+import os
+import pstats
+import re
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import asynccontextmanager, contextmanager, nullcontext
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional
+
+from .records import write_json
+
+AGENT_DIR = Path(__file__).resolve().parent.parent
+ARTIFACTS_DIR = AGENT_DIR / "artifacts"
+MODES = ("sample", "cprofile")
+_MAX_DEPTH = 64
+_SKIP_TRACES = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+)
+
+
+class _Frame:
+    """One active phase on one thread."""
+    __slots__ = ("name", "snapshot", "profile", "child_wall", "child_cpu", "child_alloc")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.snapshot: Optional[tracemalloc.Snapshot] = None
+        self.profile: Optional[cProfile.Profile] = None
+        self.child_wall = self.child_cpu = 0.0
+        self.child_alloc = 0
+
+
+class _PhaseStats:
+    __slots__ = ("calls", "wall", "cpu", "alloc", "max_wall", "sites", "pstats")
+
+    def __init__(self):
+        self.calls = 0
+        self.wall = self.cpu = self.max_wall = 0.0
+        self.alloc = 0
+        self.sites: Counter = Counter()
+        self.pstats: Optional[pstats.Stats] = None
+
+
+class Profiler:
+    """Per-phase CPU and allocation profile of one run; ``mode=None`` makes every phase a no-op."""
+
+    def __init__(self, mode: Optional[str] = None, interval: float = 0.005, top: int = 15):
+        if mode not in (None, *MODES):
+            raise ValueError(f"profile mode must be one of {MODES}")
+        self.mode = mode
+        self.interval = interval
+        self.top = top
+        self._phases: Dict[str, _PhaseStats] = {}
+        self._stacks: Dict[int, List[_Frame]] = {}
+        self._samples: Counter = Counter()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._sampler: Optional[threading.Thread] = None
+        self._own_tracing = False
+        self._started = time.perf_counter()
+        if mode:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._own_tracing = True
+            if mode == "sample":
+                self._sampler = threading.Thread(target=self._sample_loop, name="fde-profiler", daemon=True)
+                self._sampler.start()
+
+    @property
+    def enabled(self) -> bool:
+        return self.mode is not None
+
+    def phase(self, name: str, snapshot: bool = True):
+        """Context manager around one phase; tool calls pass ``snapshot=False`` to skip the costly snapshots."""
+        return self._phase(name, snapshot) if self.mode else nullcontext()
+
+    def phase_async(self, name: str):
+        """Async context manager around an awaited phase, such as a coroutine tool call.
+
+        Coroutines interleave on one thread, so these phases stay off the
+        per-thread stacks and record calls and wall time only.
+        """
+        return self._phase_async(name) if self.mode else nullcontext()
+
+    @asynccontextmanager
+    async def _phase_async(self, name: str) -> AsyncIterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._record(_Frame(name), time.perf_counter() - start, 0.0, 0, None)
+
+    @contextmanager
+    def _phase(self, name: str, snapshot: bool) -> Iterator[None]:
+        ident = threading.get_ident()
+        # The sampler thread reads every thread's stack; all changes to them go through the lock
+        with self._lock:
+            stack = self._stacks.setdefault(ident, [])
+            parent = stack[-1] if stack else None
+        frame = _Frame(name)
+        outer_wall, outer_cpu = time.perf_counter(), time.thread_time()
+        if parent is not None and parent.profile is not None:
+            parent.profile.disable()
+        if snapshot:
+            frame.snapshot = tracemalloc.take_snapshot()
+        if self.mode == "cprofile":
+            frame.profile = cProfile.Profile()
+            try:
+                frame.profile.enable()
+            except ValueError:
+                # Another profiler is active (e.g. a debugger); keep the timings
+                frame.profile = None
+        with self._lock:
+            stack.append(frame)
+        wall, cpu, alloc = time.perf_counter(), time.thread_time(), tracemalloc.get_traced_memory()[0]
+        try:
+            yield
+        finally:
+            wall, cpu, alloc = time.perf_counter() - wall, time.thread_time() - cpu, tracemalloc.get_traced_memory()[0] - alloc
+            with self._lock:
+                stack.pop()
+                if not stack:
+                    self._stacks.pop(ident, None)
+            if frame.profile is not None:
+                frame.profile.disable()
+            sites = frame.snapshot and tracemalloc.take_snapshot().filter_traces(_SKIP_TRACES).compare_to(
+                frame.snapshot.filter_traces(_SKIP_TRACES), "lineno")
+            self._record(frame, wall, cpu, alloc, sites)
+            if parent is not None:
+                # Everything this phase cost, snapshots included, is excluded from the parent
+                parent.child_wall += time.perf_counter() - outer_wall
+                parent.child_cpu += time.thread_time() - outer_cpu
+                parent.child_alloc += alloc
+                if parent.profile is not None:
+                    parent.profile.enable()
+
+    def _record(self, frame: _Frame, wall: float, cpu: float, alloc: int, sites) -> None:
+        wall = max(wall - frame.child_wall, 0.0)
+        with self._lock:
+            stats = self._phases.get(frame.name)
+            if stats is None:
+                stats = self._phases[frame.name] = _PhaseStats()
+            stats.calls += 1
+            stats.wall += wall
+            stats.max_wall = max(stats.max_wall, wall)
+            stats.cpu += max(cpu - frame.child_cpu, 0.0)
+            stats.alloc += alloc - frame.child_alloc
+            for diff in sites or ():
+                if diff.size_diff > 0:
+                    stats.sites[str(diff.traceback)] += diff.size_diff
+            if frame.profile is not None:
+                if stats.pstats is None:
+                    stats.pstats = pstats.Stats(frame.profile)
+                else:
+                    stats.pstats.add(frame.profile)
+
+    def _sample_loop(self) -> None:
+        me = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            frames = sys._current_frames()
+            with self._lock:
+                phases = [(ident, stack[-1].name) for ident, stack in self._stacks.items() if stack]
+            for ident, phase in phases:
+                frame = frames.get(ident)
+                if ident == me or frame is None:
+                    continue
+                calls = []
+                while frame is not None and len(calls) < _MAX_DEPTH:
+                    code = frame.f_code
+                    if code is _PHASE_CODE:
+                        # Entering or leaving a phase: the profiler's own snapshots, not the run's
+                        break
+                    calls.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                else:
+                    self._samples[(phase, tuple(reversed(calls)))] += 1
+
+    def _top_functions(self, name: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Hottest functions by self time, for one phase or the whole run."""
+        if self.mode == "sample":
+            own: Counter = Counter()
+            total: Counter = Counter()
+            for (phase, calls), n in self._samples.items():
+                if name is None or phase == name:
+                    own[calls[-1]] += n
+                    for fn in set(calls):
+                        total[fn] += n
+            ms = self.interval * 1000
+            return [{"function": fn, "self_ms": round(n * ms, 1), "total_ms": round(total[fn] * ms, 1)} for fn, n in own.most_common(self.top)]
+        merged = pstats.Stats()
+        for phase, stats in self._phases.items():
+            if stats.pstats is not None and name in (None, phase):
+                merged.add(stats.pstats)
+        rows = sorted(merged.stats.items(), key=lambda kv: kv[1][2], reverse=True)[:self.top]  # type: ignore[attr-defined]
+        return [{"function": f"{fn} ({os.path.basename(path)}:{line})", "calls": nc, "self_ms": round(tt * 1000, 1), "total_ms": round(ct * 1000, 1)}
+                for (path, line, fn), (_, nc, tt, ct, _) in rows]
+
+    def finish(self, ticket_id: Optional[str] = None, out_dir: Optional[Path] = None) -> Dict[str, Any]:
+        """Stop profiling and write the report; returns the summary (also saved as summary.json)."""
+        if not self.mode:
+            return {}
+        self._stop.set()
+        if self._sampler is not None:
+            self._sampler.join()
+        peak = tracemalloc.get_traced_memory()[1]
+        if self._own_tracing:
+            tracemalloc.stop()
+        out = Path(out_dir or ARTIFACTS_DIR / (ticket_id or "default") / "profile")
+        out.mkdir(parents=True, exist_ok=True)
+        phases = {}
+        for name, stats in sorted(self._phases.items(), key=lambda kv: -kv[1].wall):
+            phases[name] = {
+                "calls": stats.calls,
+                "wall_ms": round(stats.wall * 1000, 1),
+                "max_ms": round(stats.max_wall * 1000, 1),
+                "cpu_ms": round(stats.cpu * 1000, 1),
+                "alloc_kib": round(stats.alloc / 1024, 1) or 0.0,
+                "top_functions": self._top_functions(name),
+                "top_allocations": [{"site": site, "kib": round(size / 1024, 1)} for site, size in stats.sites.most_common(self.top)],
+            }
+            if stats.pstats is not None:
+                stats.pstats.dump_stats(out / f"{_file_name(name)}.pstats")
+        if self.mode == "sample":
+            # Collapsed stacks, one line per distinct stack: flamegraph.pl / speedscope input
+            with (out / "samples.folded").open("w", encoding="utf-8") as f:
+                for (phase, calls), n in self._samples.most_common():
+                    f.write(f"{';'.join((phase, *calls))} {n}\n")
+        summary = {
+            "mode": self.mode,
+            "wall_ms": round((time.perf_counter() - self._started) * 1000, 1),
+            "peak_traced_kib": round(peak / 1024, 1),
+            "phases": phases,
+            "top_functions": self._top_functions(),
+            "dir": str(out),
+        }
+        if self.mode == "sample":
+            summary["interval_ms"] = self.interval * 1000
+            summary["samples"] = sum(self._samples.values())
+        write_json(out / "summary.json", summary)
+        return summary
+
+
+_PHASE_CODE = Profiler._phase.__wrapped__.__code__
+
+
+def _file_name(phase: str) -> str:
+    return re.sub(r"[^\w.-]+", "-", phase)
@@ -1,11 +1,27 @@
 from __future__ import annotations
 
-from typing import Optional
+from typing import List, Optional
+
+from .memory import ConversationTurn, SessionMemory, summarize_turns
 
 
 class LLMReasoner:
     """Placeholder reasoner for future use.
     In production, this would perform multi-step reasoning to improve plan quality.
     """
-    def reflect(self, prompt: str, domain: Optional[str] = None) -> str:
-        return f"Reasoned on domain={domain or 'general'}: {prompt}"
\ No newline at end of file
+    def __init__(self, max_context_chars: int = 8000):
+        self.max_context_chars = max_context_chars
+
+    def reflect(self, prompt: str, domain: Optional[str] = None, memory: Optional[SessionMemory] = None) -> str:
+        """Reason over ``prompt`` and the session's bounded context, never more than max_context_chars in all."""
+        # Keep the newest text if a caller hands over more than the budget
+        prompt = prompt[-self.max_context_chars:]
+        budget = self.max_context_chars - len(prompt) - 1
+        context = memory.context(budget) if memory is not None and budget > 0 else ""
+        if context:
+            prompt = f"{context}\n{prompt}"
+        return f"Reasoned on domain={domain or 'general'}: {prompt}"
+
+    def summarize(self, turns: List[ConversationTurn]) -> str:
+        """Compact older turns for SessionMemory; deterministic until a model is wired in."""
+        return summarize_turns(turns)
\ No newline at end of file
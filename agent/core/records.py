@@ -0,0 +1,147 @@
+"""
+Compact record base and the single JSON serialization path for agent records.
+
+Records are slotted dataclasses. They serialize by yielding their fields straight
+into the output stream (no per-record dict copies). For older callers that
+treated plan/result entries as dicts, they also support read-only mapping
+access (``rec["status"]``, ``rec.get("meta")``).
+"""
+from __future__ import annotations
+
+import io
+import json
+from enum import Enum
+from pathlib import Path
+from typing import Any, Iterator, TextIO, Tuple
+
+from .locking import atomic_write
+
+_encode_str = json.encoder.encode_basestring_ascii
+_MISSING = object()
+
+
+class Record:
+    __slots__ = ()
+
+    def _json_items(self) -> Iterator[Tuple[str, Any]]:
+        for name in self.__slots__:
+            yield name, getattr(self, name)
+
+    def to_dict(self) -> dict:
+        return dict(self._json_items())
+
+    def get(self, key: str, default: Any = None) -> Any:
+        for k, v in self._json_items():
+            if k == key:
+                return v
+        return default
+
+    def __getitem__(self, key: str) -> Any:
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+
+def _encode_scalar(o: Any) -> str:
+    if isinstance(o, str):
+        return _encode_str(o)
+    if o is None:
+        return "null"
+    if o is True:
+        return "true"
+    if o is False:
+        return "false"
+    if isinstance(o, int):
+        return int.__repr__(o)
+    if isinstance(o, float):
+        return json.dumps(o)
+    raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
+
+
+def iter_json(o: Any, indent: int | None = None, _level: int = 0) -> Iterator[str]:
+    """Yield JSON text for records, dicts, lists/tuples and scalars.
+
+    Output is byte-for-byte what ``json.dumps(..., indent=indent)`` gives for the
+    equivalent dicts, so existing files keep their format.
+    """
+    if isinstance(o, Record):
+        items: Any = o._json_items()
+    elif isinstance(o, dict):
+        items = o.items()
+    elif isinstance(o, (list, tuple)):
+        yield from _iter_array(o, indent, _level)
+        return
+    elif isinstance(o, Enum):
+        # Enums serialize by name, matching how state is reported elsewhere
+        yield _encode_str(o.name)
+        return
+    else:
+        yield _encode_scalar(o)
+        return
+
+    if indent is None:
+        sep, open_, close = ", ", "{", "}"
+    else:
+        pad = "\n" + " " * (indent * (_level + 1))
+        sep, open_, close = "," + pad, "{" + pad, "\n" + " " * (indent * _level) + "}"
+    first = True
+    for k, v in items:
+        if first:
+            yield open_
+            first = False
+        else:
+            yield sep
+        yield _encode_str(str(k))
+        yield ": "
+        if isinstance(v, (str, int, float)) or v is None:
+            yield _encode_scalar(v)
+        else:
+            yield from iter_json(v, indent, _level + 1)
+    yield "{}" if first else close
+
+
+def _iter_array(seq: Any, indent: int | None, level: int) -> Iterator[str]:
+    if not seq:
+        yield "[]"
+        return
+    if indent is None:
+        sep, open_, close = ", ", "[", "]"
+    else:
+        pad = "\n" + " " * (indent * (level + 1))
+        sep, open_, close = "," + pad, "[" + pad, "\n" + " " * (indent * level) + "]"
+    yield open_
+    for i, v in enumerate(seq):
+        if i:
+            yield sep
+        if isinstance(v, (str, int, float)) or v is None:
+            yield _encode_scalar(v)
+        else:
+            yield from iter_json(v, indent, level + 1)
+    yield close
+
+
+def dump(o: Any, fp: TextIO, indent: int | None = None) -> None:
+    write = fp.write
+    buf: list[str] = []
+    size = 0
+    for chunk in iter_json(o, indent):
+        buf.append(chunk)
+        size += len(chunk)
+        if size >= 65536:
+            write("".join(buf))
+            buf.clear()
+            size = 0
+    if buf:
+        write("".join(buf))
+
+
+def dumps(o: Any, indent: int | None = None) -> str:
+    out = io.StringIO()
+    dump(o, out, indent)
+    return out.getvalue()
+
+
+def write_json(path: Path, o: Any, indent: int | None = 2) -> None:
+    """Stream ``o`` into ``path`` atomically."""
+    atomic_write(path, lambda f: dump(o, f, indent))
@@ -0,0 +1,152 @@
+"""
+Simulated tool backends for load and failure testing.
+
+A simulated tool stands in for shell, http or git behind the normal registry,
+so the executor, governor and orchestrator run unchanged. Each call samples a
+latency from a configurable distribution. It also samples whether the call
+errors or times out, and how large its output is.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import math
+import random
+import threading
+import time
+from dataclasses import dataclass, field, replace
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from ..tools.registry import ToolCapabilities, ToolRegistry
+
+# How each tool reports a failed call, so simulated failures look like real ones
+_FAILURE_STATUS = {"http": "failed(status=503)"}
+
+
+@dataclass(frozen=True)
+class LatencyModel:
+    distribution: str = "lognormal"  # lognormal | exponential | uniform | fixed
+    median_ms: float = 50.0
+    sigma: float = 0.5  # lognormal shape; larger means a heavier tail
+    spread_ms: float = 0.0  # uniform: median +/- spread
+
+    @classmethod
+    def from_dict(cls, d: Optional[dict]) -> "LatencyModel":
+        d = d or {}
+        return cls(
+            distribution=d.get("distribution", "lognormal"),
+            median_ms=float(d.get("median_ms", 50.0)),
+            sigma=float(d.get("sigma", 0.5)),
+            spread_ms=float(d.get("spread_ms", 0.0)),
+        )
+
+    def sample_ms(self, rng: random.Random) -> float:
+        if self.distribution == "fixed":
+            return self.median_ms
+        if self.distribution == "uniform":
+            return max(0.0, rng.uniform(self.median_ms - self.spread_ms, self.median_ms + self.spread_ms))
+        if self.distribution == "exponential":
+            return rng.expovariate(math.log(2) / self.median_ms) if self.median_ms > 0 else 0.0
+        if self.distribution == "lognormal":
+            return rng.lognormvariate(math.log(max(self.median_ms, 1e-3)), self.sigma)
+        raise ValueError(f"unknown latency distribution: {self.distribution}")
+
+
+@dataclass(frozen=True)
+class SimProfile:
+    latency: LatencyModel = field(default_factory=LatencyModel)
+    error_rate: float = 0.0
+    timeout_rate: float = 0.0
+    output_bytes: int = 64
+    # Override the real tool's declared timeout/idempotency/retries
+    timeout: Optional[float] = None
+    idempotent: Optional[bool] = None
+    retries: Optional[int] = None
+
+    @classmethod
+    def from_dict(cls, d: Optional[dict]) -> "SimProfile":
+        d = d or {}
+        return cls(
+            latency=LatencyModel.from_dict(d.get("latency")),
+            error_rate=float(d.get("error_rate", 0.0)),
+            timeout_rate=float(d.get("timeout_rate", 0.0)),
+            output_bytes=int(d.get("output_bytes", 64)),
+            timeout=d.get("timeout"),
+            idempotent=d.get("idempotent"),
+            retries=d.get("retries"),
+        )
+
+    def capabilities(self, base: ToolCapabilities) -> ToolCapabilities:
+        return replace(
+            base,
+            timeout=base.timeout if self.timeout is None else float(self.timeout),
+            idempotent=base.idempotent if self.idempotent is None else bool(self.idempotent),
+            retries=base.retries if self.retries is None else int(self.retries),
+        )
+
+
+DEFAULT_PROFILES: Dict[str, SimProfile] = {
+    "shell": SimProfile(LatencyModel(median_ms=20.0, sigma=0.6)),
+    "http": SimProfile(LatencyModel(median_ms=80.0, sigma=0.8), output_bytes=2048),
+    "git": SimProfile(LatencyModel(median_ms=40.0, sigma=0.5), output_bytes=256),
+}
+
+
+def load_profiles(path: Path) -> Dict[str, SimProfile]:
+    """Profiles from JSON ({"http": {"latency": {...}, "error_rate": 0.1}, ...}); unnamed tools keep the defaults."""
+    raw = json.loads(Path(path).read_text(encoding="utf-8"))
+    return dict(DEFAULT_PROFILES, **{name: SimProfile.from_dict(d) for name, d in raw.items()})
+
+
+class SimulatedTool:
+    def __init__(self, name: str, permission: str, capabilities: ToolCapabilities, profile: SimProfile, seed: Optional[int] = None):
+        self.name = name
+        self.permission = permission
+        self.profile = profile
+        self.capabilities = profile.capabilities(capabilities)
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def _draw(self) -> tuple[float, float]:
+        with self._lock:
+            return self.profile.latency.sample_ms(self._rng), self._rng.random()
+
+    def _outcome(self) -> tuple[float, dict]:
+        """How long the call takes (seconds) and what it returns."""
+        latency_ms, roll = self._draw()
+        p = self.profile
+        timeout = self.capabilities.timeout
+        if roll < p.timeout_rate or (timeout and latency_ms / 1000.0 > timeout):
+            # A timed-out call holds its slot for the full timeout, like a real hung call
+            res = {"status": "failed(timeout)", "stdout": "", "stderr": f"simulated timeout after {timeout}s",
+                   "meta": {"simulated": True, "latency_ms": round((timeout or 0) * 1000.0, 3)}}
+            return timeout or latency_ms / 1000.0, res
+        meta = {"simulated": True, "latency_ms": round(latency_ms, 3)}
+        if roll < p.timeout_rate + p.error_rate:
+            return latency_ms / 1000.0, {"status": _FAILURE_STATUS.get(self.name, "failed(code=1)"), "stdout": "", "stderr": "simulated error", "meta": meta}
+        return latency_ms / 1000.0, {"status": "ok", "stdout": "x" * p.output_bytes, "stderr": "", "meta": meta}
+
+    def invoke(self, step: Any) -> dict:
+        delay, res = self._outcome()
+        time.sleep(delay)
+        return res
+
+    async def invoke_async(self, step: Any) -> dict:
+        delay, res = self._outcome()
+        await asyncio.sleep(delay)
+        return res
+
+
+def simulated_registry(profiles: Optional[Dict[str, SimProfile]] = None, seed: Optional[int] = None) -> ToolRegistry:
+    """Registry of simulated shell/http/git tools with the real tools' permissions and capabilities."""
+    from ..tools.shell import ShellTool
+    from ..tools.http_client import HttpTool
+    from ..tools.git_ops import GitTool
+
+    profiles = dict(DEFAULT_PROFILES, **(profiles or {}))
+    registry = ToolRegistry()
+    for i, real in enumerate((ShellTool, HttpTool, GitTool)):
+        tool = SimulatedTool(real.name, real.permission, real.capabilities, profiles[real.name], None if seed is None else seed + i)
+        registry.register_tool(tool)
+    return registry
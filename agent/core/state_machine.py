@@ -1,6 +1,32 @@
+"""
+Event-sourced deployment state.
+
+Every transition is checked against a declared table and appended as one JSON
+line to a shared log. A StateLog folds the log into an index (current state
+and entry time per ticket, tickets per state) and tails new lines on demand,
+so time-in-state and "which tickets are stuck in Executing" are answered
+without opening any ticket's files. Every ``SNAPSHOT_EVERY`` appends the index
+is written next to the log with the byte offset it covers, so a new process
+replays only the lines after it.
+"""
 from __future__ import annotations
 
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass
 from enum import Enum
+from pathlib import Path
+from typing import Dict, FrozenSet, Iterator, List, Optional, Tuple
+
+from .locking import TicketLock
+from .records import Record, dumps, write_json
+
+AGENT_DIR = Path(__file__).resolve().parent.parent
+STATE_DIR = AGENT_DIR / "artifacts" / ".state"
+TRANSITIONS_PATH = STATE_DIR / "transitions.jsonl"
+SNAPSHOT_EVERY = 1000
 
 
 class DeploymentState(Enum):
@@ -9,11 +35,208 @@ class DeploymentState(Enum):
     Executing = 2
     Validated = 3
     Failed = 4
+    RollingBack = 5
+    Cancelled = 6
+
+
+_S = DeploymentState
+TRANSITIONS: Dict[DeploymentState, FrozenSet[DeploymentState]] = {
+    _S.Idle: frozenset({_S.Planning}),
+    _S.Planning: frozenset({_S.Executing, _S.Failed, _S.Cancelled}),
+    _S.Executing: frozenset({_S.Validated, _S.Failed, _S.Cancelled}),
+    _S.Validated: frozenset({_S.Planning, _S.Idle}),
+    _S.Failed: frozenset({_S.RollingBack, _S.Planning, _S.Idle}),
+    _S.RollingBack: frozenset({_S.Idle, _S.Failed}),
+    _S.Cancelled: frozenset({_S.Planning, _S.Idle}),
+}
+# States a ticket should pass through; lingering in one means work is stuck
+ACTIVE = frozenset({_S.Planning, _S.Executing, _S.RollingBack})
+CHECKPOINTS: Dict[DeploymentState, str] = {
+    _S.Idle: "Scope the request",
+    _S.Planning: "Discovery complete and approvals obtained.",
+    _S.Executing: "Validate outcomes",
+    _S.Validated: "Handoff artifacts",
+    _S.Failed: "Suggest rollback",
+    _S.RollingBack: "Confirm last known good state",
+    _S.Cancelled: "Re-run or close the ticket",
+}
+
+
+@dataclass(slots=True)
+class StateEvent(Record):
+    ticket_id: str
+    source: str
+    target: str
+    at: float
+    reason: Optional[str] = None
+
+    @classmethod
+    def from_dict(cls, d: dict) -> "StateEvent":
+        return cls(d["ticket_id"], d["source"], d["target"], float(d["at"]), d.get("reason"))
+
+
+class StateLog:
+    """Append-only transition log plus an in-memory index of where every ticket is.
+
+    ``by_state`` keeps tickets in entry order, so the oldest occupant of a
+    state comes first and a stuck scan stops at the first recent one.
+    """
+
+    def __init__(self, path: Optional[Path] = None):
+        self.path = Path(path or TRANSITIONS_PATH)
+        self.snapshot_path = self.path.with_suffix(".snapshot.json")
+        self.current: Dict[str, Tuple[DeploymentState, float]] = {}
+        self.by_state: Dict[DeploymentState, Dict[str, float]] = {s: {} for s in DeploymentState}
+        self._offset = 0
+        # Lines folded since the snapshot was last written
+        self._unsnapshotted = 0
+        self._lock = threading.RLock()
+        self._load_snapshot()
+        self.refresh()
+
+    def _load_snapshot(self) -> None:
+        try:
+            data = json.loads(self.snapshot_path.read_text(encoding="utf-8"))
+            offset = int(data["offset"])
+            by_state = {DeploymentState[name]: entries for name, entries in data["by_state"].items()}
+            # The snapshot must end on a line boundary of this log, or it belongs to another one
+            if offset:
+                with self.path.open("rb") as f:
+                    f.seek(offset - 1)
+                    if f.read(1) != b"\n":
+                        return
+        except (OSError, ValueError, KeyError, TypeError):
+            return
+        for state, entries in by_state.items():
+            for ticket, at in entries:
+                self.by_state[state][ticket] = at
+                self.current[ticket] = (state, at)
+        self._offset = offset
+
+    def _write_snapshot(self) -> None:
+        """Caller holds the log lock, so no line can land past ``_offset`` meanwhile."""
+        write_json(self.snapshot_path, {
+            "offset": self._offset,
+            "by_state": {s.name: [[t, at] for t, at in entries.items()] for s, entries in self.by_state.items() if entries},
+        }, indent=None)
+        self._unsnapshotted = 0
+
+    def _apply(self, event: StateEvent) -> None:
+        prev = self.current.get(event.ticket_id)
+        if prev is not None:
+            self.by_state[prev[0]].pop(event.ticket_id, None)
+        target = DeploymentState[event.target]
+        self.current[event.ticket_id] = (target, event.at)
+        self.by_state[target][event.ticket_id] = event.at
+
+    def refresh(self) -> None:
+        """Fold in lines other processes appended since the last read."""
+        with self._lock:
+            try:
+                if self.path.stat().st_size <= self._offset:
+                    return
+                with self.path.open("rb") as f:
+                    f.seek(self._offset)
+                    data = f.read()
+            except OSError:
+                return
+            # A line still being written stays unread until it is complete
+            end = data.rfind(b"\n") + 1
+            for line in data[:end].splitlines():
+                if line.strip():
+                    self._apply(StateEvent.from_dict(json.loads(line)))
+                    self._unsnapshotted += 1
+            self._offset += end
+
+    def append(self, event: StateEvent) -> None:
+        line = (dumps(event) + "\n").encode("utf-8")
+        with self._lock, TicketLock(".state-log", lock_dir=self.path.parent):
+            self.refresh()
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                os.write(fd, line)
+            finally:
+                os.close(fd)
+            self._apply(event)
+            self._offset += len(line)
+            self._unsnapshotted += 1
+            if self._unsnapshotted >= SNAPSHOT_EVERY:
+                self._write_snapshot()
+
+    def state_of(self, ticket_id: str) -> DeploymentState:
+        entry = self.current.get(ticket_id)
+        return entry[0] if entry else DeploymentState.Idle
+
+    def time_in_state(self, ticket_id: str, now: Optional[float] = None) -> float:
+        entry = self.current.get(ticket_id)
+        return (now or time.time()) - entry[1] if entry else 0.0
+
+    def tickets_in(self, state: DeploymentState) -> List[str]:
+        return list(self.by_state[state])
+
+    def counts(self) -> Dict[str, int]:
+        return {s.name: len(t) for s, t in self.by_state.items() if t}
+
+    def stuck(self, older_than: float, states=ACTIVE, now: Optional[float] = None) -> List[Tuple[str, DeploymentState, float]]:
+        """(ticket, state, seconds in state) for tickets in ``states`` longer than ``older_than`` seconds, oldest first."""
+        self.refresh()
+        now = now or time.time()
+        out = []
+        with self._lock:
+            for state in states:
+                for ticket, entered in self.by_state[state].items():
+                    if now - entered < older_than:
+                        break
+                    out.append((ticket, state, now - entered))
+        return sorted(out, key=lambda t: -t[2])
+
+    def history(self, ticket_id: str) -> Iterator[StateEvent]:
+        """Every transition of one ticket; reads the whole log, so meant for audits, not polling."""
+        try:
+            with self.path.open(encoding="utf-8") as f:
+                for line in f:
+                    if f'"{ticket_id}"' in line:
+                        event = StateEvent.from_dict(json.loads(line))
+                        if event.ticket_id == ticket_id:
+                            yield event
+        except OSError:
+            return
+
+
+_default_log: Optional[StateLog] = None
+_default_guard = threading.Lock()
+
+
+def default_log() -> StateLog:
+    """Process-wide log backed by artifacts/.state/transitions.jsonl."""
+    global _default_log
+    with _default_guard:
+        if _default_log is None:
+            _default_log = StateLog()
+        return _default_log
 
 
 class DeploymentStateMachine:
-    def __init__(self) -> None:
-        self.current_state = DeploymentState.Idle
+    """One ticket's state; every change is validated against TRANSITIONS and logged."""
+
+    def __init__(self, ticket_id: Optional[str] = None, log: Optional[StateLog] = None) -> None:
+        self.ticket_id = ticket_id or "default"
+        self.log = log or default_log()
+
+    @property
+    def current_state(self) -> DeploymentState:
+        return self.log.state_of(self.ticket_id)
+
+    def can_transition(self, new_state: DeploymentState) -> bool:
+        return new_state in TRANSITIONS[self.current_state]
+
+    def set_state(self, new_state: DeploymentState, reason: Optional[str] = None) -> None:
+        self.log.refresh()
+        current = self.current_state
+        if new_state not in TRANSITIONS[current]:
+            raise ValueError(f"{self.ticket_id}: invalid transition {current.name} -> {new_state.name}")
+        self.log.append(StateEvent(self.ticket_id, current.name, new_state.name, round(time.time(), 3), reason))
 
-    def set_state(self, new_state: DeploymentState) -> None:
-        self.current_state = new_state
\ No newline at end of file
+    def time_in_state(self) -> float:
+        return self.log.time_in_state(self.ticket_id)
@@ -1,2 +1,4 @@
 from .registry import DomainRegistry
-from .base import BaseDomain, DomainSpec
+from .base import BaseDomain, DomainSpec, DomainContext
+from .controls import ControlEngine, default_engine
+from .probes import ComplianceTarget
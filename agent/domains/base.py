@@ -1,7 +1,15 @@
 from __future__ import annotations
 
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
 from dataclasses import dataclass
-from typing import Dict, Any
+from typing import Any, ClassVar, Dict, List, Optional, Tuple
+
+from .probes import ComplianceTarget, Probe, FAIL, ERROR, manual, setting_equals, run_probe
+
+# Shared by every domain's pre/postflight probes; hooks themselves run elsewhere
+_CHECK_POOL = ThreadPoolExecutor(max_workers=16, thread_name_prefix="fde-domain-check")
 
 
 @dataclass
@@ -10,12 +18,87 @@ class DomainSpec:
     compliance: Dict[str, Any]
 
 
+@dataclass
+class DomainContext:
+    environment: Optional[str] = None
+    target: Optional[ComplianceTarget] = None
+
+    def cache_key(self) -> str:
+        return f"{self.environment or '-'}:{self.target.cache_key() if self.target else '-'}"
+
+    def effective_target(self) -> ComplianceTarget:
+        return self.target or ComplianceTarget(name=self.environment or "default")
+
+
 class BaseDomain:
-    def __init__(self, spec: DomainSpec):
-        self.spec = spec
+    SPEC: ClassVar[Optional[DomainSpec]] = None
+    cache_ttl: float = 300.0
+
+    def __init__(self, spec: Optional[DomainSpec] = None):
+        self.spec = spec or self.SPEC or DomainSpec(name="general", compliance={})
+        self._cache: Dict[Tuple[str, str], Tuple[float, Dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+
+    # Subclasses extend these lists; undeclared settings report as manual, not failed
+    def preflight_checks(self, ctx: DomainContext) -> List[Probe]:
+        return [
+            setting_equals("secrets available", "secrets.available", True),
+            setting_equals("observability configured", "observability.configured", True),
+        ]
+
+    def postflight_checks(self, ctx: DomainContext) -> List[Probe]:
+        return [
+            setting_equals("incident hooks active", "incident.hooks_active", True),
+            setting_equals("escalation paths ready", "incident.escalation_ready", True),
+        ]
+
+    def compliance_report(self, ctx: DomainContext) -> Optional[Dict[str, Any]]:
+        """Control-engine sweep for this domain, only when a target was supplied."""
+        if ctx.target is None:
+            return None
+        from .controls import default_engine
+        return default_engine().evaluate_domain(self.spec.name, ctx.target)
+
+    def preflight(self, ctx: Optional[DomainContext] = None) -> Dict[str, Any]:
+        ctx = ctx or DomainContext()
+        return self._cached("preflight", ctx, lambda: self._run_checks(self.preflight_checks(ctx), ctx, with_compliance=True))
+
+    def postflight(self, ctx: Optional[DomainContext] = None) -> Dict[str, Any]:
+        ctx = ctx or DomainContext()
+        return self._cached("postflight", ctx, lambda: self._run_checks(self.postflight_checks(ctx), ctx))
 
-    def preflight(self) -> Dict[str, Any]:
-        return {"ok": True, "checks": ["secrets available", "observability configured"]}
+    def _cached(self, phase: str, ctx: DomainContext, compute) -> Dict[str, Any]:
+        key = (phase, ctx.cache_key())
+        now = time.monotonic()
+        with self._lock:
+            hit = self._cache.get(key)
+        if hit and hit[0] > now:
+            return dict(hit[1], cached=True)
+        result = compute()
+        with self._lock:
+            self._cache[key] = (time.monotonic() + self.cache_ttl, result)
+        return dict(result, cached=False)
 
-    def postflight(self) -> Dict[str, Any]:
-        return {"ok": True, "checks": ["incident hooks active", "escalation paths ready"]}
+    def _run_checks(self, probes: List[Probe], ctx: DomainContext, with_compliance: bool = False) -> Dict[str, Any]:
+        target = ctx.effective_target()
+        futures: List[Future] = []
+        for p in probes:
+            if p.per_endpoint:
+                if target.endpoints:
+                    futures += [_CHECK_POOL.submit(run_probe, p, target, ep) for ep in target.endpoints]
+                else:
+                    # As in ControlEngine.evaluate: without endpoints the check is manual, not dropped
+                    futures.append(_CHECK_POOL.submit(run_probe, manual(p.step), target))
+            else:
+                futures.append(_CHECK_POOL.submit(run_probe, p, target))
+        compliance = self.compliance_report(ctx) if with_compliance else None
+        checks = [f.result() for f in futures]
+        out: Dict[str, Any] = {
+            "domain": self.spec.name,
+            "environment": ctx.environment,
+            "ok": not any(c["status"] in (FAIL, ERROR) for c in checks),
+            "checks": checks,
+        }
+        if compliance is not None:
+            out["compliance"] = compliance
+        return out
@@ -0,0 +1,135 @@
+"""
+Compliance control engine - runs every control's probes concurrently and caches
+each control's outcome per target for a TTL.
+"""
+from __future__ import annotations
+
+import importlib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from .probes import ComplianceTarget, Probe, PASS, FAIL, MANUAL, ERROR, manual, run_probe
+
+# domain -> (framework label, "module:attribute" holding its control list)
+FRAMEWORKS: Dict[str, Tuple[str, str]] = {
+    "healthcare": ("HIPAA", ".healthcare:HIPAA_SECURITY_CONTROLS"),
+    "fintech": ("PCI-DSS/SOC2", ".fintech:FINTECH_SECURITY_CONTROLS"),
+}
+
+
+def controls_for(domain: Optional[str]) -> Tuple[Optional[str], List[Any]]:
+    """Framework label and controls for a domain, importing its module only on demand."""
+    entry = FRAMEWORKS.get(domain or "")
+    if entry is None:
+        return None, []
+    label, ref = entry
+    module, _, attr = ref.partition(":")
+    return label, list(getattr(importlib.import_module(module, __package__), attr))
+
+
+def _rollup(statuses: Sequence[str]) -> str:
+    if not statuses:
+        return MANUAL
+    if ERROR in statuses:
+        return ERROR
+    if FAIL in statuses:
+        return FAIL
+    if MANUAL in statuses:
+        return MANUAL
+    return PASS
+
+
+class ControlEngine:
+    def __init__(self, ttl: float = 300.0, max_workers: int = 16):
+        self.ttl = ttl
+        self.max_workers = max_workers
+        self._cache: Dict[Tuple[str, str], Tuple[float, Dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+
+    def _probes(self, control: Any) -> List[Probe]:
+        probes = list(getattr(control, "probes", []) or [])
+        covered = {p.step for p in probes}
+        # Prose steps with no probe still appear in the report, as manual
+        probes += [manual(step) for step in control.validation_steps if step not in covered]
+        return probes
+
+    def evaluate(self, controls: Sequence[Any], target: ComplianceTarget, framework: Optional[str] = None) -> Dict[str, Any]:
+        """Run all uncached probes for ``controls`` in one concurrent sweep and return the report."""
+        target_key = target.cache_key()
+        now = time.monotonic()
+        reports: Dict[str, Dict[str, Any]] = {}
+        jobs: List[Tuple[str, Probe, Optional[str]]] = []
+        with self._lock:
+            for c in controls:
+                hit = self._cache.get((c.control_id, target_key))
+                if hit and hit[0] > now:
+                    reports[c.control_id] = dict(hit[1], cached=True)
+                    continue
+                for p in self._probes(c):
+                    if p.per_endpoint:
+                        if target.endpoints:
+                            jobs += [(c.control_id, p, ep) for ep in target.endpoints]
+                        else:
+                            jobs.append((c.control_id, manual(p.step), None))
+                    else:
+                        jobs.append((c.control_id, p, None))
+
+        checks: Dict[str, List[Dict[str, Any]]] = {}
+        if jobs:
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(jobs)), thread_name_prefix="fde-probe") as pool:
+                futures = [(cid, pool.submit(run_probe, p, target, ep)) for cid, p, ep in jobs]
+                for cid, f in futures:
+                    checks.setdefault(cid, []).append(f.result())
+
+        expires = time.monotonic() + self.ttl
+        for c in controls:
+            if c.control_id in reports:
+                continue
+            items = checks.get(c.control_id, [])
+            report = {
+                "control_id": c.control_id,
+                "description": c.description,
+                "status": _rollup([i["status"] for i in items]),
+                "checks": items,
+                "evaluated_at": datetime.utcnow().strftime("%Y-%m-%d %H:%M:%SZ"),
+            }
+            with self._lock:
+                self._cache[(c.control_id, target_key)] = (expires, report)
+            reports[c.control_id] = dict(report, cached=False)
+
+        ordered = [reports[c.control_id] for c in controls]
+        totals = {s: 0 for s in (PASS, FAIL, MANUAL, ERROR)}
+        for r in ordered:
+            totals[r["status"]] += 1
+        return {
+            "framework": framework,
+            "target": target.name,
+            "generated_at": datetime.utcnow().strftime("%Y-%m-%d %H:%M:%SZ"),
+            "status": _rollup([r["status"] for r in ordered]),
+            "totals": totals,
+            "controls": ordered,
+        }
+
+    def evaluate_domain(self, domain: Optional[str], target: ComplianceTarget) -> Optional[Dict[str, Any]]:
+        framework, controls = controls_for(domain)
+        if not controls:
+            return None
+        return self.evaluate(controls, target, framework)
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._cache.clear()
+
+
+_default_engine: Optional[ControlEngine] = None
+
+
+def default_engine() -> ControlEngine:
+    """Process-wide engine so cached control results are shared across tickets."""
+    global _default_engine
+    if _default_engine is None:
+        _default_engine = ControlEngine()
+    return _default_engine
@@ -0,0 +1,20 @@
+from typing import List
+
+from .base import BaseDomain, DomainContext, DomainSpec
+from .probes import Probe, cert_expiry, setting_equals, tls_min_version
+
+
+class EcommerceDomain(BaseDomain):
+    SPEC = DomainSpec(name="ecommerce", compliance={"frameworks": ["PCI-DSS SAQ-A"]})
+
+    def preflight_checks(self, ctx: DomainContext) -> List[Probe]:
+        return super().preflight_checks(ctx) + [
+            tls_min_version("Checkout endpoints enforce TLS 1.2+", "TLSv1.2"),
+            cert_expiry("Checkout certificates valid for 30+ days", min_days=30),
+            setting_equals("Card data tokenized by payment provider", "payments.tokenized", True),
+        ]
+
+    def postflight_checks(self, ctx: DomainContext) -> List[Probe]:
+        return super().postflight_checks(ctx) + [
+            setting_equals("Checkout synthetic monitor green", "monitoring.checkout_synthetic_ok", True),
+        ]
@@ -1,12 +1,16 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import List
 
+from .base import BaseDomain, DomainContext, DomainSpec
+from .probes import Probe, setting_at_most, setting_equals
+
 
 @dataclass
 class FintechControlMapping:
     control_id: str
     description: str
     validation_steps: List[str]
+    probes: List[Probe] = field(default_factory=list)
 
 
 FINTECH_SECURITY_CONTROLS = [
@@ -17,6 +21,10 @@ FINTECH_SECURITY_CONTROLS = [
             "Verify encryption at rest for cardholder data",
             "Confirm key management rotation schedule",
         ],
+        probes=[
+            setting_equals("Verify encryption at rest for cardholder data", "cardholder_data.encryption", "AES-256"),
+            setting_at_most("Confirm key management rotation schedule", "kms.rotation_days", 365),
+        ],
     ),
     FintechControlMapping(
         control_id="SOC2-CC6.1",
@@ -38,3 +46,12 @@ def get_fintech_checklist() -> List[dict]:
         }
         for control in FINTECH_SECURITY_CONTROLS
     ]
+
+
+class FintechDomain(BaseDomain):
+    SPEC = DomainSpec(name="fintech", compliance={"frameworks": ["PCI-DSS", "SOC2"], "controls": "FINTECH_SECURITY_CONTROLS"})
+
+    def preflight_checks(self, ctx: DomainContext) -> List[Probe]:
+        return super().preflight_checks(ctx) + [
+            setting_equals("Cardholder data environment scoped", "pci.scope_documented", True),
+        ]
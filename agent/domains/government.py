@@ -0,0 +1,25 @@
+from typing import List
+
+from .base import BaseDomain, DomainContext, DomainSpec
+from .probes import ComplianceTarget, Probe, ProbeResult, PASS, FAIL, MANUAL, setting_equals
+
+
+def fips_mode(step: str) -> Probe:
+    """Kernel FIPS mode as declared by the target; the agent's own host is not the system under assessment."""
+    def check(target: ComplianceTarget) -> ProbeResult:
+        if "host.fips_enabled" not in target.settings:
+            return ProbeResult(MANUAL, "host.fips_enabled not declared for target")
+        enabled = bool(target.settings["host.fips_enabled"])
+        return ProbeResult(PASS if enabled else FAIL, f"host.fips_enabled={enabled}")
+    return Probe("fips_mode", step, check)
+
+
+class GovernmentDomain(BaseDomain):
+    SPEC = DomainSpec(name="government", compliance={"frameworks": ["FedRAMP", "FISMA", "ITAR"]})
+
+    def preflight_checks(self, ctx: DomainContext) -> List[Probe]:
+        return super().preflight_checks(ctx) + [
+            fips_mode("FIPS 140 validated crypto enabled"),
+            setting_equals("FedRAMP authorization in place", "fedramp.authorization", ["Moderate", "High"]),
+            setting_equals("Data residency restricted to US regions", "data.us_only", True),
+        ]
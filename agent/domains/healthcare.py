@@ -1,6 +1,9 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import List
 
+from .base import BaseDomain, DomainContext, DomainSpec
+from .probes import Probe, cert_expiry, log_retention, no_legacy_tls, setting_equals, tls_min_version
+
 
 @dataclass
 class HIPAAControlMapping:
@@ -8,6 +11,7 @@ class HIPAAControlMapping:
     description: str
     implementation_spec: str
     validation_steps: List[str]
+    probes: List[Probe] = field(default_factory=list)
 
 
 HIPAA_SECURITY_CONTROLS = [
@@ -20,6 +24,10 @@ HIPAA_SECURITY_CONTROLS = [
             "Check no shared accounts exist",
             "Validate MFA enforcement",
         ],
+        probes=[
+            setting_equals("Check no shared accounts exist", "identity.shared_accounts", 0),
+            setting_equals("Validate MFA enforcement", "identity.mfa_enforced", True),
+        ],
     ),
     HIPAAControlMapping(
         control_id="164.312(a)(2)(iv)",
@@ -30,6 +38,10 @@ HIPAA_SECURITY_CONTROLS = [
             "Check encryption on file storage",
             "Validate key management procedures",
         ],
+        probes=[
+            setting_equals("Verify AES-256 encryption on databases", "database.encryption", "AES-256"),
+            setting_equals("Check encryption on file storage", "storage.encryption", ["AES-256", "AES-128"]),
+        ],
     ),
     HIPAAControlMapping(
         control_id="164.312(b)",
@@ -40,6 +52,11 @@ HIPAA_SECURITY_CONTROLS = [
             "Check log retention meets 6-year requirement",
             "Validate log integrity protection",
         ],
+        probes=[
+            setting_equals("Verify audit logs capture all PHI access", "audit.phi_access_logging", True),
+            log_retention("Check log retention meets 6-year requirement", min_days=6 * 365),
+            setting_equals("Validate log integrity protection", "audit.log_integrity", True),
+        ],
     ),
     HIPAAControlMapping(
         control_id="164.312(e)(1)",
@@ -50,6 +67,11 @@ HIPAA_SECURITY_CONTROLS = [
             "Check certificate validity",
             "Validate no insecure protocols",
         ],
+        probes=[
+            tls_min_version("Verify TLS 1.2+ on all endpoints", "TLSv1.2"),
+            cert_expiry("Check certificate validity", min_days=14),
+            no_legacy_tls("Validate no insecure protocols"),
+        ],
     ),
 ]
 
@@ -63,3 +85,12 @@ def get_hipaa_checklist() -> List[dict]:
         }
         for control in HIPAA_SECURITY_CONTROLS
     ]
+
+
+class HealthcareDomain(BaseDomain):
+    SPEC = DomainSpec(name="healthcare", compliance={"frameworks": ["HIPAA"], "controls": "HIPAA_SECURITY_CONTROLS"})
+
+    def preflight_checks(self, ctx: DomainContext) -> List[Probe]:
+        return super().preflight_checks(ctx) + [
+            setting_equals("Business Associate Agreement signed", "hipaa.baa_signed", True),
+        ]
@@ -0,0 +1,209 @@
+"""
+Executable compliance probes.
+
+Each probe automates one prose validation step of a control. A probe reads the
+ComplianceTarget it is given: endpoints for network checks, and ``settings`` for
+declared configuration such as encryption flags and retention periods. Anything
+the target does not describe is reported as ``manual``, never as a pass.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import socket
+import ssl
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+PASS, FAIL, MANUAL, ERROR = "pass", "fail", "manual", "error"
+
+
+@dataclass
+class ComplianceTarget:
+    name: str = "default"
+    endpoints: List[str] = field(default_factory=list)
+    settings: Dict[str, Any] = field(default_factory=dict)
+    log_dirs: List[str] = field(default_factory=list)
+    timeout: float = 5.0
+
+    @classmethod
+    def from_dict(cls, d: dict) -> "ComplianceTarget":
+        return cls(
+            name=d.get("name", "default"),
+            endpoints=list(d.get("endpoints", [])),
+            settings=dict(d.get("settings", {})),
+            log_dirs=list(d.get("log_dirs", [])),
+            timeout=float(d.get("timeout", 5.0)),
+        )
+
+    @classmethod
+    def from_file(cls, path: Path) -> "ComplianceTarget":
+        return cls.from_dict(json.loads(Path(path).read_text(encoding="utf-8")))
+
+    def cache_key(self) -> str:
+        raw = json.dumps([self.name, self.endpoints, self.settings, self.log_dirs], sort_keys=True, default=str)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:16]
+
+
+@dataclass
+class ProbeResult:
+    status: str
+    detail: str = ""
+    evidence: Dict[str, Any] = field(default_factory=dict)
+
+
+@dataclass
+class Probe:
+    name: str
+    step: str
+    check: Callable[..., ProbeResult]
+    per_endpoint: bool = False
+
+
+def _split_endpoint(endpoint: str) -> tuple[str, int]:
+    host, sep, port = endpoint.rpartition(":")
+    if not sep or not port.isdigit():
+        return endpoint, 443
+    return host, int(port)
+
+
+def _handshake(endpoint: str, timeout: float, verify: bool = True, max_version: Optional[ssl.TLSVersion] = None):
+    host, port = _split_endpoint(endpoint)
+    ctx = ssl.create_default_context()
+    if not verify:
+        ctx.check_hostname = False
+        ctx.verify_mode = ssl.CERT_NONE
+    if max_version is not None:
+        ctx.minimum_version = ssl.TLSVersion.MINIMUM_SUPPORTED
+        ctx.maximum_version = max_version
+        # Legacy protocols need legacy ciphers; OpenSSL's default security level hides both
+        ctx.set_ciphers("ALL:@SECLEVEL=0")
+    with socket.create_connection((host, port), timeout=timeout) as sock:
+        with ctx.wrap_socket(sock, server_hostname=host) as s:
+            return s.version(), s.getpeercert()
+
+
+# --- network probes -------------------------------------------------------
+
+def tls_min_version(step: str, minimum: str = "TLSv1.2") -> Probe:
+    order = ["SSLv3", "TLSv1", "TLSv1.1", "TLSv1.2", "TLSv1.3"]
+
+    def check(target: ComplianceTarget, endpoint: str) -> ProbeResult:
+        version, _ = _handshake(endpoint, target.timeout, verify=False)
+        ok = version in order and order.index(version) >= order.index(minimum)
+        return ProbeResult(PASS if ok else FAIL, f"{endpoint} negotiated {version}", {"endpoint": endpoint, "version": version})
+    return Probe("tls_min_version", step, check, per_endpoint=True)
+
+
+def cert_expiry(step: str, min_days: int = 14) -> Probe:
+    def check(target: ComplianceTarget, endpoint: str) -> ProbeResult:
+        try:
+            _, cert = _handshake(endpoint, target.timeout, verify=True)
+        except ssl.SSLCertVerificationError as e:
+            return ProbeResult(FAIL, f"{endpoint} certificate invalid: {e.verify_message}", {"endpoint": endpoint})
+        days = (ssl.cert_time_to_seconds(cert["notAfter"]) - time.time()) / 86400
+        ok = days >= min_days
+        return ProbeResult(PASS if ok else FAIL, f"{endpoint} certificate expires in {days:.0f} days", {"endpoint": endpoint, "days_left": round(days, 1)})
+    return Probe("cert_expiry", step, check, per_endpoint=True)
+
+
+def no_legacy_tls(step: str) -> Probe:
+    def check(target: ComplianceTarget, endpoint: str) -> ProbeResult:
+        try:
+            version, _ = _handshake(endpoint, target.timeout, verify=False, max_version=ssl.TLSVersion.TLSv1_1)
+        except ssl.SSLError as e:
+            if e.reason == "WRONG_VERSION_NUMBER":
+                return ProbeResult(FAIL, f"{endpoint} does not speak TLS", {"endpoint": endpoint})
+            if e.reason in ("NO_CIPHERS_AVAILABLE", "NO_PROTOCOLS_AVAILABLE"):
+                return ProbeResult(MANUAL, "local OpenSSL cannot offer TLS <= 1.1", {"endpoint": endpoint})
+            return ProbeResult(PASS, f"{endpoint} refuses TLS <= 1.1", {"endpoint": endpoint})
+        return ProbeResult(FAIL, f"{endpoint} accepted {version}", {"endpoint": endpoint, "version": version})
+    return Probe("no_legacy_tls", step, check, per_endpoint=True)
+
+
+# --- configuration probes -------------------------------------------------
+
+def setting_equals(step: str, key: str, expected: Any) -> Probe:
+    allowed = expected if isinstance(expected, (list, tuple, set)) else [expected]
+
+    def check(target: ComplianceTarget) -> ProbeResult:
+        if key not in target.settings:
+            return ProbeResult(MANUAL, f"{key} not declared for target")
+        value = target.settings[key]
+        return ProbeResult(PASS if value in allowed else FAIL, f"{key}={value!r}", {key: value})
+    return Probe(f"setting:{key}", step, check)
+
+
+def setting_at_least(step: str, key: str, minimum: float) -> Probe:
+    def check(target: ComplianceTarget) -> ProbeResult:
+        if key not in target.settings:
+            return ProbeResult(MANUAL, f"{key} not declared for target")
+        value = target.settings[key]
+        return ProbeResult(PASS if float(value) >= minimum else FAIL, f"{key}={value} (min {minimum})", {key: value})
+    return Probe(f"setting:{key}", step, check)
+
+
+def setting_at_most(step: str, key: str, maximum: float) -> Probe:
+    def check(target: ComplianceTarget) -> ProbeResult:
+        if key not in target.settings:
+            return ProbeResult(MANUAL, f"{key} not declared for target")
+        value = target.settings[key]
+        return ProbeResult(PASS if float(value) <= maximum else FAIL, f"{key}={value} (max {maximum})", {key: value})
+    return Probe(f"setting:{key}", step, check)
+
+
+def log_retention(step: str, min_days: int, key: str = "audit.log_retention_days") -> Probe:
+    """Declared retention must meet the minimum; on-disk logs (if given) must not be pruned early."""
+    def check(target: ComplianceTarget) -> ProbeResult:
+        declared = target.settings.get(key)
+        if declared is None and not target.log_dirs:
+            return ProbeResult(MANUAL, f"{key} not declared and no log_dirs given")
+        evidence: Dict[str, Any] = {key: declared}
+        if declared is not None and float(declared) < min_days:
+            return ProbeResult(FAIL, f"retention {declared}d < {min_days}d", evidence)
+        oldest = None
+        for d in target.log_dirs:
+            p = Path(d)
+            if not p.is_dir():
+                return ProbeResult(FAIL, f"log dir missing: {d}", evidence)
+            for f in p.iterdir():
+                if f.is_file():
+                    m = f.stat().st_mtime
+                    oldest = m if oldest is None else min(oldest, m)
+        if oldest is not None:
+            evidence["oldest_log_age_days"] = round((time.time() - oldest) / 86400, 1)
+        if declared is not None:
+            return ProbeResult(PASS, f"retention {declared}d declared", evidence)
+        if oldest is not None and time.time() - oldest >= min_days * 86400:
+            return ProbeResult(PASS, f"logs retained for {evidence['oldest_log_age_days']}d", evidence)
+        return ProbeResult(MANUAL, f"{key} not declared; on-disk logs do not yet prove {min_days}d", evidence)
+    return Probe("log_retention", step, check)
+
+
+def manual(step: str) -> Probe:
+    def check(target: ComplianceTarget) -> ProbeResult:
+        return ProbeResult(MANUAL, "requires human review")
+    return Probe("manual", step, check)
+
+
+def run_probe(probe: Probe, target: ComplianceTarget, endpoint: Optional[str] = None) -> Dict[str, Any]:
+    """Run one probe, never raising; returns the report entry for it."""
+    start = time.perf_counter()
+    try:
+        res = probe.check(target, endpoint) if probe.per_endpoint else probe.check(target)
+    except Exception as e:
+        res = ProbeResult(ERROR, f"{type(e).__name__}: {e}")
+    out: Dict[str, Any] = {
+        "step": probe.step,
+        "probe": probe.name,
+        "status": res.status,
+        "detail": res.detail,
+        "duration_ms": round((time.perf_counter() - start) * 1000, 1),
+    }
+    if endpoint:
+        out["endpoint"] = endpoint
+    if res.evidence:
+        out["evidence"] = res.evidence
+    return out
@@ -1,19 +1,81 @@
 from __future__ import annotations
 
-from typing import Optional
+import importlib
+import threading
+from importlib.metadata import entry_points
+from typing import Any, Dict, Optional, Tuple
+
+from .base import BaseDomain
+
+ENTRY_POINT_GROUP = "fde_agent.domains"
+
+# Built-in plugins as "module:Class" so nothing is imported until its domain is detected
+BUILTIN_DOMAINS: Dict[str, str] = {
+    "healthcare": ".healthcare:HealthcareDomain",
+    "fintech": ".fintech:FintechDomain",
+    "government": ".government:GovernmentDomain",
+    "ecommerce": ".ecommerce:EcommerceDomain",
+    "saas": ".saas:SaasDomain",
+}
+
+DOMAIN_KEYWORDS: Dict[str, Tuple[str, ...]] = {
+    "healthcare": ("patient", "hipaa", "fhir", "hl7"),
+    "fintech": ("pci", "sox", "finance", "payment", "card"),
+    "government": ("fedramp", "fisma", "itar", "government"),
+    "ecommerce": ("store", "cart", "checkout", "ecommerce"),
+    "saas": ("saas", "soc2", "iso 27001"),
+}
+
+# Loaded plugin instances are process-wide so their per-environment caches are shared
+_loaded: Dict[str, Optional[BaseDomain]] = {}
+_loaded_lock = threading.Lock()
 
 
 class DomainRegistry:
+    def __init__(self, discover: bool = True):
+        self._refs: Dict[str, Any] = dict(BUILTIN_DOMAINS)
+        if discover:
+            self._refs.update(self._discover())
+
+    @staticmethod
+    def _discover() -> Dict[str, Any]:
+        # Only entry point metadata is read here; plugin modules stay unimported
+        try:
+            return {ep.name: ep for ep in entry_points(group=ENTRY_POINT_GROUP)}
+        except Exception:
+            return {}
+
+    def names(self) -> list[str]:
+        return list(self._refs)
+
     def detect(self, task: str) -> Optional[str]:
         t = task.lower()
-        if any(k in t for k in ["patient", "hipaa", "fhir", "hl7"]):
-            return "healthcare"
-        if any(k in t for k in ["pci", "sox", "finance", "payment", "card"]):
-            return "fintech"
-        if any(k in t for k in ["fedramp", "fisma", "itar", "government"]):
-            return "government"
-        if any(k in t for k in ["store", "cart", "checkout", "ecommerce"]):
-            return "ecommerce"
-        if any(k in t for k in ["saas", "soc2", "iso 27001"]):
-            return "saas"
-        return "general"
\ No newline at end of file
+        for name, keywords in DOMAIN_KEYWORDS.items():
+            if any(k in t for k in keywords):
+                return name
+        # Third-party plugins are matched on their registered name
+        for name in self._refs:
+            if name not in DOMAIN_KEYWORDS and name.lower() in t:
+                return name
+        return "general"
+
+    def load(self, name: Optional[str]) -> Optional[BaseDomain]:
+        """Import and instantiate a domain plugin on first use."""
+        if not name or name not in self._refs:
+            return None
+        with _loaded_lock:
+            if name in _loaded:
+                return _loaded[name]
+            ref = self._refs[name]
+            if isinstance(ref, str):
+                module, _, attr = ref.partition(":")
+                factory = getattr(importlib.import_module(module, __package__), attr)
+            else:
+                factory = ref.load()
+            domain = factory() if callable(factory) else factory
+            _loaded[name] = domain
+            return domain
+
+    def resolve(self, task: str) -> Tuple[str, Optional[BaseDomain]]:
+        name = self.detect(task) or "general"
+        return name, self.load(name)
@@ -0,0 +1,14 @@
+from typing import List
+
+from .base import BaseDomain, DomainContext, DomainSpec
+from .probes import Probe, setting_equals
+
+
+class SaasDomain(BaseDomain):
+    SPEC = DomainSpec(name="saas", compliance={"frameworks": ["SOC2", "ISO 27001"]})
+
+    def preflight_checks(self, ctx: DomainContext) -> List[Probe]:
+        return super().preflight_checks(ctx) + [
+            setting_equals("Tenant isolation enforced", "tenant.isolation", True),
+            setting_equals("SOC2 report current", "soc2.report_current", True),
+        ]
@@ -1,6 +1,7 @@
 import argparse
+import asyncio
 import json
-import subprocess
+import sys
 from pathlib import Path
 from datetime import datetime
 
@@ -12,7 +13,15 @@ from rich.text import Text
 import requests
 
 # Orchestrator integration
-from .core import FDEOrchestrator, OrchestratorConfig
+from .core import FDEOrchestrator, OrchestratorConfig, ToolExecutor, PlanStep
+from .core import FleetOrchestrator, FleetConfig, TicketLock, atomic_write_text, dump, write_json
+from .core import cassette_registry
+from .core.cassette import build_cassette
+from .core.state_machine import CHECKPOINTS, DeploymentState, default_log
+from .core.latency import estimate_plan, ingest_history
+from .core.manifest import ManifestLog, manifest_diff, read_manifest
+from .core.profiling import MODES as PROFILE_MODES, Profiler
+from .tools.redaction import redact
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 AGENT_DIR = BASE_DIR / "agent"
@@ -79,7 +88,11 @@ def choose_references(task: str) -> list:
     return out
 
 
-def build_structured(task: str) -> dict:
+def set_status(data: dict, state: DeploymentState) -> None:
+    data["status"] = {"current": state.name, "next_checkpoint": CHECKPOINTS[state]}
+
+
+def build_structured(task: str, environment: str | None = None) -> dict:
     contract = load_contract()
     refs = choose_references(task)
     now = datetime.utcnow().strftime("%Y-%m-%d %H:%M:%SZ")
@@ -98,7 +111,7 @@ def build_structured(task: str) -> dict:
             "Validation: explicit checks tied to success criteria; record results.",
             "Handoff: provide runbooks, monitoring guidance, and escalation path."
         ],
-        "status": {"current": "Planning", "next_checkpoint": "Discovery complete and approvals obtained."},
+        "status": {},
         "risks": [
             {"description": "Environment mismatch, access gaps, or missing rollback.", "level": "Medium"},
             {"description": "Production impact without a change window or validation.", "level": "High"},
@@ -117,6 +130,7 @@ def build_structured(task: str) -> dict:
     }
 
     # Provide an executable plan for patient record sync tasks
+    state = DeploymentState.Planning
     t = task.lower()
     if ("sync patient records" in t) or ("patient sync" in t):
         data["plan"] = [
@@ -126,17 +140,32 @@ def build_structured(task: str) -> dict:
             {"description": "Finalize sync", "command": "shell", "args": "echo Sync finalized"},
             {"description": "Validation: confirm sync outcomes via health endpoint", "command": "http", "method": "GET", "url": "http://127.0.0.1:8000/index.html"}
         ]
-        data["status"]["current"] = "Executing"
-        data["status"]["next_checkpoint"] = "Validate outcomes"
+        state = DeploymentState.Executing
+    set_status(data, state)
+
+    # Duration forecast from past runs of the same tools/endpoints in this environment
+    steps = [PlanStep.from_dict(p) for p in data["plan"] if isinstance(p, dict)]
+    if any(s.command for s in steps):
+        data["estimate"] = estimate_plan(steps, environment)
 
     return data
 
 
+def fmt_ms(ms: float) -> str:
+    return f"{ms:.0f} ms" if ms < 1000 else f"{ms / 1000:.1f}s"
+
+
 def render_text(d: dict) -> str:
     lines = [f"Time: {d['time']}", f"Agent: {d['agent']}", "", "Summary"]
     s = d['summary']; lines += [f"- Request: {s['request']}", f"- Assumptions: {s['assumptions']}", f"- Outcome target: {s['outcome_target']}"]
     lines += ["", "Plan"] + [f"- {p}" for p in d['plan']]
     st = d['status']; lines += ["", "Status", f"- Current: {st['current']}", f"- Next checkpoint: {st['next_checkpoint']}"]
+    if d.get("estimate"):
+        e = d["estimate"]
+        lines += ["", "Estimate", f"- Sequential: {fmt_ms(e['sequential_ms'])} (p95 {fmt_ms(e['sequential_p95_ms'])})",
+                  f"- Critical path: {fmt_ms(e['critical_path_ms'])} via {' -> '.join(e['critical_path']) or 'n/a'}"]
+        if e["unestimated_steps"]:
+            lines.append(f"- {e['unestimated_steps']} step(s) have no history yet")
     # Render risks as descriptions for text mode
     risk_lines = []
     for r in d['risks']:
@@ -188,6 +217,10 @@ def render_rich(d: dict, environment: str | None) -> None:
     # Status
     st = d['status']
     console.print(f"[bold]Status[/bold]: {st['current']} (Next: {st['next_checkpoint']})")
+    if d.get("estimate"):
+        e = d["estimate"]
+        unknown = f", {e['unestimated_steps']} step(s) without history" if e["unestimated_steps"] else ""
+        console.print(f"[bold]Estimate[/bold]: {fmt_ms(e['sequential_ms'])} sequential (p95 {fmt_ms(e['sequential_p95_ms'])}), critical path {fmt_ms(e['critical_path_ms'])}{unknown}")
 
     # Risks table with styling for High/Critical
     risk_table = Table(title="Risks", show_lines=True)
@@ -241,27 +274,32 @@ def suggest_rollback_command() -> str:
     return "kubectl rollout undo deployment/<service>  # adjust to your stack"
 
 
-def generate_evidence_bundle(ticket_id: str, environment: str | None, d: dict, executed_steps: list[dict], validation_ok: bool, rollback_cmd: str | None) -> Path:
-    """Create artifacts/{ticket_id}/deployment_manifest.json with planned vs actual."""
-    root = AGENT_DIR / "artifacts" / ticket_id
-    root.mkdir(parents=True, exist_ok=True)
-    manifest = {
-        "ticket_id": ticket_id,
-        "time": d["time"],
-        "environment": environment,
-        "plan": [{"description": p} if isinstance(p, str) else p for p in d["plan"]],
-        "executed": executed_steps,
-        "status": d.get("status"),
-        "validation_ok": validation_ok,
-        "rollback_suggested": rollback_cmd,
-        "references": d.get("references"),
-    }
-    out = root / "deployment_manifest.json"
-    out.write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+def generate_evidence_bundle(ticket_id: str, environment: str | None, d: dict, executed_steps: list[dict], validation_ok: bool, rollback_cmd: str | None, compliance: dict | None = None, manifest: ManifestLog | None = None) -> Path:
+    """Finish artifacts/{ticket_id}/deployment_manifest.json with planned vs actual.
+
+    An executed run has already streamed its steps into ``manifest``; otherwise
+    the plan and any step results are recorded here. A compliance report, when
+    given, is embedded and also written as compliance_report.json.
+    """
+    manifest = manifest or ManifestLog(ticket_id)
+    fields = {"status": d.get("status"), "validation_ok": validation_ok, "rollback_suggested": rollback_cmd, "references": d.get("references")}
+    if compliance is not None:
+        fields["compliance"] = compliance
+    with TicketLock(ticket_id):
+        if not manifest.started:
+            manifest.begin(d["plan"], time=d["time"], environment=environment)
+            for i, step in enumerate(executed_steps):
+                if step.get("status") != "planned":
+                    manifest.record_step(i, step)
+        out = manifest.finish(**fields)
+        if compliance is not None:
+            write_json(manifest.root / "compliance_report.json", compliance)
     return out
 
 
 def write_audit(content: str, path: Path, append: bool = False):
+    # Tool output is redacted at the source; this also covers task text and summaries
+    content = redact(content)
     path.parent.mkdir(parents=True, exist_ok=True)
     mode = "a" if append and path.exists() else "w"
     with path.open(mode, encoding="utf-8") as f:
@@ -269,12 +307,20 @@ def write_audit(content: str, path: Path, append: bool = False):
 
 
 class ToolRunner:
-    def __init__(self, audit_log: str | None, ticket_id: str | None):
+    def __init__(self, audit_log: str | None, ticket_id: str | None, record: str | None = None, replay: str | None = None, replay_speed: float = 1.0):
         self.audit_log = Path(audit_log) if audit_log else None
         self.ticket_id = ticket_id or "default"
         self.state_dir = AGENT_DIR / "artifacts" / self.ticket_id
         self.state_dir.mkdir(parents=True, exist_ok=True)
         self.state_path = self.state_dir / "state.json"
+        registry = cassette_registry(
+            record=Path(record) if record else None,
+            replay=Path(replay) if replay else None,
+            speed=replay_speed,
+            ticket_id=self.ticket_id,
+            audit_log=audit_log,
+        )
+        self.executor = ToolExecutor(ticket_id=self.ticket_id, audit_log=audit_log, registry=registry)
 
     def _write_audit(self, text: str):
         if self.audit_log:
@@ -289,61 +335,21 @@ class ToolRunner:
 
     def save_state(self, step_index: int):
         payload = {"current_step": step_index}
-        self.state_path.write_text(json.dumps(payload, indent=2), encoding="utf-8")
+        atomic_write_text(self.state_path, json.dumps(payload, indent=2))
 
     def execute_step(self, step: dict) -> dict:
-        desc = step.get("description", "")
-        cmd_type = step.get("command")
-        result = {"description": desc, "command": cmd_type, "status": "skipped", "stdout": "", "stderr": ""}
-        if not cmd_type:
-            return result
-        try:
-            if cmd_type == "shell":
-                command = step.get("args") or step.get("cmd")
-                if not command:
-                    raise RuntimeError("shell step missing 'args' or 'cmd'")
-                proc = subprocess.run(command, shell=True, capture_output=True, text=True)
-                result["stdout"] = proc.stdout
-                result["stderr"] = proc.stderr
-                if proc.returncode == 0:
-                    result["status"] = "ok"
-                else:
-                    result["status"] = f"failed({proc.returncode})"
-            elif cmd_type == "http":
-                method = (step.get("method") or "GET").upper()
-                url = step.get("url")
-                data = step.get("data")
-                if not url:
-                    raise RuntimeError("http step missing 'url'")
-                resp = requests.request(method, url, json=data, timeout=10)
-                result["stdout"] = f"status={resp.status_code} body={resp.text[:500]}"
-                if resp.status_code < 400:
-                    result["status"] = "ok"
-                else:
-                    result["status"] = f"failed({resp.status_code})"
-            elif cmd_type == "git":
-                args = step.get("args")
-                if not args:
-                    raise RuntimeError("git step missing 'args'")
-                proc = subprocess.run(["git"] + args, capture_output=True, text=True)
-                result["stdout"] = proc.stdout
-                result["stderr"] = proc.stderr
-                if proc.returncode == 0:
-                    result["status"] = "ok"
-                else:
-                    result["status"] = f"failed({proc.returncode})"
-            else:
-                result["status"] = "skipped"
-                result["stderr"] = f"Unknown command type: {cmd_type}"
-        except Exception as e:
-            result["status"] = "failed(exception)"
-            result["stderr"] = str(e)
-        # log stderr if any
-        if result.get("stderr"):
-            self._write_audit(f"[ERROR] {desc}: {result['stderr']}")
+        # Same registry-dispatched engine the orchestrator uses
+        result = self.executor.execute_step(PlanStep.from_dict(step)).to_dict()
+        # log stderr if any (prose-only steps carry no command)
+        if result.get("command") and result.get("stderr"):
+            self._write_audit(f"[ERROR] {result['description']}: {result['stderr']}")
         return result
 
     def run(self, plan: list[dict]) -> tuple[list[dict], bool, int]:
+        with TicketLock(self.ticket_id):
+            return self._run(plan)
+
+    def _run(self, plan: list[dict]) -> tuple[list[dict], bool, int]:
         start_index = self.load_state()
         executed = []
         failed = False
@@ -361,61 +367,69 @@ class ToolRunner:
         return executed, failed, self.load_state()
 
 
-def one_off(task: str, json_mode: bool, audit_log: str | None, environment: str | None, ticket_id: str | None, execute: bool = False):
-    data = build_structured(task)
+def one_off(task: str, json_mode: bool, audit_log: str | None, environment: str | None, ticket_id: str | None, execute: bool = False, max_parallel: int = 1, compliance_target: str | None = None, record: str | None = None, replay: str | None = None, replay_speed: float = 1.0, profile: str | None = None, profile_top: int = 15, worktrees: bool = False):
+    profiler = Profiler(profile, top=profile_top)
+    with profiler.phase("build_structured"):
+        data = build_structured(task, environment)
 
     # Simulate execution status and validation
     executed_steps = [{"description": p if isinstance(p, str) else p.get('description', str(p)), "status": "planned"} for p in data["plan"]]
     needs_validation = any((isinstance(p, str) and "Validation:" in p) or (isinstance(p, dict) and "validation" in p.get("description"," ").lower()) for p in data["plan"])
     validation_ok = True
     rollback_cmd = None
+    compliance = None
+    manifest = None
 
     # Execute plan if requested and commands exist
     if execute:
-        cfg = OrchestratorConfig(ticket_id=ticket_id, environment=environment, audit_log=Path(audit_log) if audit_log else None)
-        orch = FDEOrchestrator(cfg)
+        cfg = OrchestratorConfig(ticket_id=ticket_id, environment=environment, audit_log=Path(audit_log) if audit_log else None, max_parallel=max_parallel, compliance_target=Path(compliance_target) if compliance_target else None, record=Path(record) if record else None, replay=Path(replay) if replay else None, replay_speed=replay_speed, worktrees=worktrees)
+        manifest = ManifestLog(ticket_id) if ticket_id else None
+        orch = FDEOrchestrator(cfg, manifest=manifest, profiler=profiler)
         summary = orch.run_task(task)
         exec_results = summary.get("executed", [])
+        compliance = summary.get("compliance")
         executed_steps = exec_results
         data.setdefault("execution", {})["steps"] = exec_results
-        all_ok = summary.get("validation_ok", False) and all(s.get("status") == "ok" for s in exec_results)
-        validation_ok = all_ok
-        if all_ok:
-            data["status"]["current"] = "Validated"
-            data["status"]["next_checkpoint"] = "Handoff artifacts"
-        else:
-            data["status"]["current"] = "FAILED - Awaiting Rollback"
-            data["status"]["next_checkpoint"] = "Suggest rollback"
+        validation_ok = summary.get("validation_ok", False) and all(s.get("status") == "ok" for s in exec_results)
+        state = DeploymentState[summary["status"]]
+        set_status(data, state)
+        if state is DeploymentState.Failed:
             rollback_cmd = suggest_rollback_command()
 
     if needs_validation and not execute:
-        validation_ok = try_validation()
+        with profiler.phase("validation"):
+            validation_ok = try_validation()
         if not validation_ok:
-            data["status"]["current"] = "ROLLING BACK"
+            set_status(data, DeploymentState.RollingBack)
             rollback_cmd = suggest_rollback_command()
 
-    if json_mode:
-        content = json.dumps(data, indent=2)
-        print(content)
-    else:
-        render_rich(data, environment)
-        if rollback_cmd:
-            console = Console()
-            console.print(Panel(Text(f"Validation/Execution issue → Suggested rollback: {rollback_cmd}", style="bold red"), border_style="red"))
+    with profiler.phase("render_json" if json_mode else "render_rich"):
+        if json_mode:
+            dump(data, sys.stdout, indent=2)
+            print()
+        else:
+            render_rich(data, environment)
+            if rollback_cmd:
+                console = Console()
+                console.print(Panel(Text(f"Validation/Execution issue → Suggested rollback: {rollback_cmd}", style="bold red"), border_style="red"))
 
-    # Write audit log with text-mode rendering
-    if audit_log:
-        log_path = Path(audit_log)
-        write_audit(render_text(data), log_path)
-        print(f"\n[AUDIT] Saved structured response to: {log_path}")
+    with profiler.phase("persistence"):
+        # Write audit log with text-mode rendering
+        if audit_log:
+            log_path = Path(audit_log)
+            write_audit(render_text(data), log_path)
+            print(f"\n[AUDIT] Saved structured response to: {log_path}")
 
-    # Evidence bundle
-    if ticket_id:
-        out = generate_evidence_bundle(ticket_id, environment, data, executed_steps, validation_ok, rollback_cmd)
-        print(f"[EVIDENCE] deployment_manifest saved to: {out}")
+        # Evidence bundle
+        if ticket_id:
+            out = generate_evidence_bundle(ticket_id, environment, data, executed_steps, validation_ok, rollback_cmd, compliance, manifest)
+            print(f"[EVIDENCE] deployment_manifest saved to: {out}")
 
+    if profiler.enabled:
+        profile_report(profiler.finish(ticket_id))
 
-def session(json_mode: bool, audit_log: str | None, environment: str | None, ticket_id: str | None, execute: bool = False):
+
+def session(json_mode: bool, audit_log: str | None, environment: str | None, ticket_id: str | None, execute: bool = False, max_parallel: int = 1, compliance_target: str | None = None, record: str | None = None, replay: str | None = None, replay_speed: float = 1.0, profile: str | None = None, profile_top: int = 15, worktrees: bool = False):
     print("FDE Agent session. Type 'exit' to quit.")
     log_path = Path(audit_log) if audit_log else None
     while True:
@@ -425,52 +439,166 @@ def session(json_mode: bool, audit_log: str | None, environment: str | None, tic
             break
         if not task or task.lower() in ("exit","quit"):
             break
-        data = build_structured(task)
+        profiler = Profiler(profile, top=profile_top)
+        with profiler.phase("build_structured"):
+            data = build_structured(task, environment)
 
         # Simulate execution and validation per turn
         executed_steps = [{"description": p if isinstance(p, str) else p.get('description', str(p)), "status": "planned"} for p in data["plan"]]
         needs_validation = any((isinstance(p, str) and "Validation:" in p) or (isinstance(p, dict) and "validation" in p.get("description"," ").lower()) for p in data["plan"])
         validation_ok = True
         rollback_cmd = None
+        compliance = None
+        manifest = None
 
         if execute:
-            cfg = OrchestratorConfig(ticket_id=ticket_id, environment=environment, audit_log=Path(audit_log) if audit_log else None)
-            orch = FDEOrchestrator(cfg)
+            cfg = OrchestratorConfig(ticket_id=ticket_id, environment=environment, audit_log=Path(audit_log) if audit_log else None, max_parallel=max_parallel, compliance_target=Path(compliance_target) if compliance_target else None, record=Path(record) if record else None, replay=Path(replay) if replay else None, replay_speed=replay_speed, worktrees=worktrees)
+            manifest = ManifestLog(ticket_id) if ticket_id else None
+            orch = FDEOrchestrator(cfg, manifest=manifest, profiler=profiler)
             summary = orch.run_task(task)
             exec_results = summary.get("executed", [])
+            compliance = summary.get("compliance")
             executed_steps = exec_results
             data.setdefault("execution", {})["steps"] = exec_results
-            all_ok = summary.get("validation_ok", False) and all(s.get("status") == "ok" for s in exec_results)
-            validation_ok = all_ok
-            if all_ok:
-                data["status"]["current"] = "Validated"
-                data["status"]["next_checkpoint"] = "Handoff artifacts"
-            else:
-                data["status"]["current"] = "FAILED - Awaiting Rollback"
-                data["status"]["next_checkpoint"] = "Suggest rollback"
+            validation_ok = summary.get("validation_ok", False) and all(s.get("status") == "ok" for s in exec_results)
+            state = DeploymentState[summary["status"]]
+            set_status(data, state)
+            if state is DeploymentState.Failed:
                 rollback_cmd = suggest_rollback_command()
 
         if needs_validation and not execute:
-            validation_ok = try_validation()
+            with profiler.phase("validation"):
+                validation_ok = try_validation()
             if not validation_ok:
-                data["status"]["current"] = "ROLLING BACK"
+                set_status(data, DeploymentState.RollingBack)
                 rollback_cmd = suggest_rollback_command()
 
-        if json_mode:
-            content = json.dumps(data, indent=2)
-            print(content)
-        else:
-            render_rich(data, environment)
-            if rollback_cmd:
-                console = Console()
-                console.print(Panel(Text(f"Validation/Execution issue → Suggested rollback: {rollback_cmd}", style="bold red"), border_style="red"))
-
-        if log_path:
-            write_audit(render_text(data), log_path, append=True)
-
-        if ticket_id:
-            out = generate_evidence_bundle(ticket_id, environment, data, executed_steps, validation_ok, rollback_cmd)
-            print(f"[EVIDENCE] deployment_manifest saved to: {out}")
+        with profiler.phase("render_json" if json_mode else "render_rich"):
+            if json_mode:
+                dump(data, sys.stdout, indent=2)
+                print()
+            else:
+                render_rich(data, environment)
+                if rollback_cmd:
+                    console = Console()
+                    console.print(Panel(Text(f"Validation/Execution issue → Suggested rollback: {rollback_cmd}", style="bold red"), border_style="red"))
+
+        with profiler.phase("persistence"):
+            if log_path:
+                write_audit(render_text(data), log_path, append=True)
+
+            if ticket_id:
+                out = generate_evidence_bundle(ticket_id, environment, data, executed_steps, validation_ok, rollback_cmd, compliance, manifest)
+                print(f"[EVIDENCE] deployment_manifest saved to: {out}")
+
+        if profiler.enabled:
+            profile_report(profiler.finish(ticket_id))
+
+
+def batch(tasks_file: str, json_mode: bool, audit_log: str | None, environment: str | None, max_tickets: int, max_parallel: int = 1, compliance_target: str | None = None, record: str | None = None, replay: str | None = None, replay_speed: float = 1.0, use_async: bool = False, worktrees: bool = True):
+    """Run every task in a file concurrently, one isolated ticket each.
+
+    Lines are plain task text or JSON objects with "task" and optional "ticket_id"/"environment".
+    """
+    specs = []
+    for line in Path(tasks_file).read_text(encoding="utf-8").splitlines():
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        specs.append(json.loads(line) if line.startswith("{") else {"task": line})
+    cfg = FleetConfig(
+        max_tickets=max_tickets,
+        max_parallel=max_parallel,
+        environment=environment,
+        audit_log=Path(audit_log) if audit_log else None,
+        compliance_target=Path(compliance_target) if compliance_target else None,
+        record=Path(record) if record else None,
+        replay=Path(replay) if replay else None,
+        replay_speed=replay_speed,
+        worktrees=worktrees,
+    )
+    with FleetOrchestrator(cfg) as fleet:
+        summaries = asyncio.run(fleet.run_all_async(specs)) if use_async else fleet.run_all(specs)
+    if json_mode:
+        dump(summaries, sys.stdout, indent=2)
+        print()
+        return
+    table = Table(title="Tickets", show_lines=True)
+    table.add_column("Ticket", style="cyan", no_wrap=True)
+    table.add_column("Domain")
+    table.add_column("Status", no_wrap=True)
+    for s in summaries:
+        status = s.get("status", "")
+        table.add_row(str(s.get("ticket_id")), str(s.get("domain", "")), Text(status, style="bold green" if status == "Validated" else "bold red"))
+    Console().print(table)
+
+
+def diff_report(ticket_id: str, json_mode: bool = False):
+    manifest = read_manifest(ticket_id)
+    if manifest is None:
+        print(f"No manifest for {ticket_id}")
+        return
+    diff = manifest_diff(manifest)
+    if json_mode:
+        dump(diff, sys.stdout, indent=2)
+        print()
+        return
+    table = Table(title=f"{ticket_id}: planned vs actual", show_lines=False)
+    table.add_column("#", justify="right")
+    table.add_column("Step")
+    table.add_column("Status", no_wrap=True)
+    table.add_column("Time", justify="right")
+    rows = sorted(diff["executed"] + diff["skipped"] + diff["pending"], key=lambda e: e["index"])
+    for e in rows:
+        style = "green" if e["status"] == "ok" else "red" if e["status"].startswith("failed") else "yellow"
+        table.add_row(str(e["index"]), e["description"], Text(e["status"], style=style), fmt_ms(e["duration_ms"]) if "duration_ms" in e else "")
+    console = Console()
+    console.print(table)
+    t = diff["totals"]
+    console.print(f"{t['executed']}/{t['planned']} executed ({t['failed']} failed), {t['skipped']} skipped, {t['pending']} pending, {fmt_ms(t['duration_ms'])} tool time")
+
+
+def profile_report(summary: dict):
+    """Per-phase table and hottest functions, on stderr so --json output stays clean."""
+    console = Console(stderr=True)
+    table = Table(title=f"Profile ({summary['mode']}, {fmt_ms(summary['wall_ms'])}, peak {summary['peak_traced_kib']:g} KiB traced)")
+    table.add_column("Phase", style="cyan", no_wrap=True)
+    table.add_column("Calls", justify="right")
+    table.add_column("Wall", justify="right")
+    table.add_column("CPU", justify="right")
+    table.add_column("Alloc KiB", justify="right")
+    table.add_column("Hottest function")
+    for name, p in summary["phases"].items():
+        hottest = p["top_functions"][0]["function"] if p["top_functions"] else ""
+        table.add_row(name, str(p["calls"]), fmt_ms(p["wall_ms"]), fmt_ms(p["cpu_ms"]), f"{p['alloc_kib']:g}", hottest)
+    console.print(table)
+    top = Table(title=f"Top {len(summary['top_functions'])} functions by self time")
+    top.add_column("Function")
+    top.add_column("Self", justify="right")
+    top.add_column("Total", justify="right")
+    for f in summary["top_functions"]:
+        top.add_row(f["function"], fmt_ms(f["self_ms"]), fmt_ms(f["total_ms"]))
+    console.print(top)
+    console.print(f"[PROFILE] report saved to: {summary['dir']}")
+
+
+def stuck_report(minutes: float, json_mode: bool = False):
+    """Tickets lingering in an active state, straight from the transition log index."""
+    log = default_log()
+    stuck = [{"ticket_id": t, "state": s.name, "minutes": round(secs / 60, 1)} for t, s, secs in log.stuck(minutes * 60)]
+    if json_mode:
+        dump({"counts": log.counts(), "stuck": stuck}, sys.stdout, indent=2)
+        print()
+        return
+    table = Table(title=f"Stuck > {minutes:g} min", show_lines=True)
+    table.add_column("Ticket", style="cyan", no_wrap=True)
+    table.add_column("State")
+    table.add_column("Minutes", justify="right")
+    for s in stuck:
+        table.add_row(s["ticket_id"], s["state"], f"{s['minutes']:g}")
+    console = Console()
+    console.print(table)
+    console.print(", ".join(f"{k}: {v}" for k, v in log.counts().items()) or "No tickets recorded")
 
 
 def main():
@@ -482,14 +610,58 @@ def main():
     parser.add_argument("--environment", choices=["staging","production"], help="Target environment tag for UI guard")
     parser.add_argument("--ticket-id", help="Change ticket or request identifier for evidence bundle")
     parser.add_argument("--execute", action="store_true", help="Execute plan commands with ToolRunner")
+    parser.add_argument("--compliance-target", metavar="FILE", help="JSON description of endpoints/settings to run domain compliance probes against")
+    parser.add_argument("--batch", metavar="FILE", help="Run every task in FILE concurrently as isolated tickets")
+    parser.add_argument("--max-tickets", type=int, default=4, help="Tickets to run at once in --batch mode")
+    parser.add_argument("--async", dest="use_async", action="store_true", help="In --batch mode, run tickets as coroutines on one event loop")
+    parser.add_argument("--worktrees", action=argparse.BooleanOptionalAction, default=None,
+                        help="Run git steps in a per-ticket detached worktree of HEAD; uncommitted changes and detached commits there are "
+                             "discarded when the ticket ends (default: on for --batch, off otherwise)")
+    parser.add_argument("--max-parallel", type=int, default=1, help="Run up to N plan steps concurrently (bounded by tooling_contract limits)")
+    parser.add_argument("--record", metavar="CASSETTE", help="Append every tool call (inputs, outputs, timings) to a cassette file")
+    parser.add_argument("--replay", metavar="CASSETTE", help="Answer tool calls from a cassette instead of real systems")
+    parser.add_argument("--replay-speed", type=float, default=1.0, help="Replay speed factor (1 = recorded timing, 0 = no delay)")
+    parser.add_argument("--build-cassette", nargs="+", metavar=("OUT", "SOURCE"), help="Build a cassette OUT from session summaries/manifests")
+    parser.add_argument("--manifest-diff", metavar="TICKET", help="Show planned vs executed vs skipped steps (with timings) for a ticket, including a run in progress")
+    parser.add_argument("--stuck", type=float, metavar="MINUTES", help="List tickets in Planning/Executing/RollingBack for longer than MINUTES")
+    parser.add_argument("--profile", nargs="?", const="sample", choices=PROFILE_MODES, help="Profile CPU and allocations per phase (default: sample) into artifacts/<ticket>/profile/")
+    parser.add_argument("--profile-top", type=int, default=15, metavar="N", help="Functions and allocation sites to report per profile")
+    parser.add_argument("--ingest-latency", nargs="*", metavar="SOURCE", help="Backfill step latency history (default: all sessions and artifacts)")
     args = parser.parse_args()
-
-    if args.session:
-        session(json_mode=args.json, audit_log=args.audit_log, environment=args.environment, ticket_id=args.ticket_id, execute=args.execute)
+    if args.record and args.replay:
+        parser.error("--record and --replay are mutually exclusive")
+    cassette = dict(record=args.record, replay=args.replay, replay_speed=args.replay_speed)
+
+    if args.build_cassette:
+        if len(args.build_cassette) < 2:
+            parser.error("--build-cassette needs OUT and at least one SOURCE")
+        out, *sources = args.build_cassette
+        built = build_cassette(Path(out), [Path(p) for p in sources])
+        print(f"{built.size} calls ({', '.join(built.tools()) or 'none'}) -> {out}")
+        return
+    if args.manifest_diff:
+        diff_report(args.manifest_diff, json_mode=args.json)
+        return
+    if args.stuck is not None:
+        stuck_report(args.stuck, json_mode=args.json)
+        return
+    if args.ingest_latency is not None:
+        added = ingest_history([Path(p) for p in args.ingest_latency] or None)
+        print(f"{added} step timings ingested")
+        return
+
+    if args.batch and args.profile:
+        # Concurrent tickets share tracemalloc and the interpreter's profiler hooks, so their phases cannot be told apart
+        parser.error("--profile profiles one ticket; it cannot be combined with --batch")
+
+    if args.batch:
+        batch(args.batch, json_mode=args.json, audit_log=args.audit_log, environment=args.environment, max_tickets=args.max_tickets, max_parallel=args.max_parallel, compliance_target=args.compliance_target, use_async=args.use_async, worktrees=args.worktrees is not False, **cassette)
+    elif args.session:
+        session(json_mode=args.json, audit_log=args.audit_log, environment=args.environment, ticket_id=args.ticket_id, execute=args.execute, max_parallel=args.max_parallel, compliance_target=args.compliance_target, profile=args.profile, profile_top=args.profile_top, worktrees=bool(args.worktrees), **cassette)
     else:
         if not args.task:
             parser.error("--task is required for one-off runs (or use --session)")
-        one_off(task=args.task, json_mode=args.json, audit_log=args.audit_log, environment=args.environment, ticket_id=args.ticket_id, execute=args.execute)
+        one_off(task=args.task, json_mode=args.json, audit_log=args.audit_log, environment=args.environment, ticket_id=args.ticket_id, execute=args.execute, max_parallel=args.max_parallel, compliance_target=args.compliance_target, profile=args.profile, profile_top=args.profile_top, worktrees=bool(args.worktrees), **cassette)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+import io
+import json
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+from agent.core import PlanStep, ExecutionResult, dump
+from agent.core.memory import ConversationTurn
+
+
+@dataclass
+class LegacyResult:
+    """The pre-slots ExecutionResult layout, kept here as the comparison baseline."""
+    description: str
+    command: str
+    status: str
+    stdout: str
+    stderr: str
+    meta: Optional[Dict[str, Any]] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return dict(self.__dict__)
+
+
+def measure_alloc(build: Callable[[], List[Any]]) -> tuple[List[Any], int]:
+    tracemalloc.start()
+    objs = build()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return objs, size
+
+
+def timed(fn: Callable[[], Any]) -> float:
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def main(n: int = 10_000) -> int:
+    # Share payload strings so the numbers reflect per-object overhead only
+    out, err = "ok\n", ""
+
+    _, plan_bytes = measure_alloc(lambda: [PlanStep(f"step {i}", command="shell", args="echo ok") for i in range(n)])
+    _, turn_bytes = measure_alloc(lambda: [ConversationTurn("user", "status?") for _ in range(n)])
+    results, slot_bytes = measure_alloc(lambda: [ExecutionResult(f"step {i}", "shell", "ok", out, err) for i in range(n)])
+    legacy, legacy_bytes = measure_alloc(lambda: [LegacyResult(f"step {i}", "shell", "ok", out, err) for i in range(n)])
+
+    stream_s = timed(lambda: dump({"executed": results}, io.StringIO(), indent=2))
+    legacy_s = timed(lambda: io.StringIO().write(json.dumps({"executed": [r.to_dict() for r in legacy]}, indent=2)))
+
+    print(f"{n} PlanStep records:          {plan_bytes / 1024:8.1f} KiB")
+    print(f"{n} ConversationTurn records:  {turn_bytes / 1024:8.1f} KiB")
+    print(f"{n} ExecutionResult (slots):   {slot_bytes / 1024:8.1f} KiB")
+    print(f"{n} ExecutionResult (legacy):  {legacy_bytes / 1024:8.1f} KiB")
+    print(f"serialize (stream, no copies): {stream_s * 1000:8.1f} ms")
+    print(f"serialize (to_dict + dumps):   {legacy_s * 1000:8.1f} ms")
+    return 0 if slot_bytes < legacy_bytes else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(int(sys.argv[1]) if len(sys.argv) > 1 else 10_000))
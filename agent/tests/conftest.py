@@ -0,0 +1,39 @@
+from __future__ import annotations
+
+import asyncio
+from pathlib import Path
+from typing import Callable, List, Optional, Sequence
+
+import pytest
+
+from agent.core.executor import ExecutionResult, ToolExecutor
+from agent.core.governor import ResourceGovernor
+from agent.core.planner import PlanStep
+from agent.tools.registry import ToolRegistry, default_registry
+
+TEST_TICKET = "test-agent"
+
+
+@pytest.fixture
+def make_executor(tmp_path: Path) -> Callable[..., ToolExecutor]:
+    """Factory for ToolExecutors with their own governor and pipe files under tmp_path.
+
+    ``registry`` defaults to the live shell/http/git tools; other keyword
+    arguments go to ToolExecutor.
+    """
+    def make(registry: Optional[ToolRegistry] = None, max_parallel: int = 1, **kw) -> ToolExecutor:
+        kw.setdefault("ticket_id", TEST_TICKET)
+        if registry is None:
+            registry = default_registry(ticket_id=kw["ticket_id"])
+        executor = ToolExecutor(registry=registry, governor=ResourceGovernor(), max_parallel=max_parallel, **kw)
+        executor.pipe_dir = tmp_path / "pipes"
+        return executor
+    return make
+
+
+@pytest.fixture
+def run_steps() -> Callable[..., List[ExecutionResult]]:
+    """run_steps(executor, steps, use_async): execute(), or execute_async() on a fresh event loop."""
+    def run(executor: ToolExecutor, steps: Sequence[PlanStep], use_async: bool = False) -> List[ExecutionResult]:
+        return asyncio.run(executor.execute_async(list(steps))) if use_async else executor.execute(list(steps))
+    return run
@@ -0,0 +1,195 @@
+"""
+Load driver: run N synthetic tickets through the fleet against simulated tool backends.
+
+    python -m agent.tests.load_sim --tickets 500 --concurrency 32 --profile storm.json
+
+Reports throughput, ticket and per-tool step latency percentiles, status counts
+(timeouts, errors, retries, cancellations) and memory. The tickets' state
+transitions go to a log of their own, never the shared one. That log and the
+tickets' session and workspace directories are removed afterwards unless
+--keep is given.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import resource
+import shutil
+import sys
+import threading
+import time
+import tracemalloc
+import uuid
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from agent.core import FleetOrchestrator, FleetConfig, ResourceGovernor
+from agent.core.fleet import WORKSPACES_DIR
+from agent.core.locking import LOCKS_DIR
+from agent.core.memory import SESSIONS_DIR
+from agent.core.state_machine import STATE_DIR, StateLog
+from agent.core.simulation import DEFAULT_PROFILES, load_profiles, simulated_registry
+
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, int(round(pct / 100.0 * len(ordered) + 0.5)) - 1))
+    return ordered[rank]
+
+
+def latency_row(values: List[float]) -> Dict[str, float]:
+    return {f"p{p}": round(percentile(values, p), 1) for p in (50, 95, 99)} | {"max": round(max(values, default=0.0), 1)}
+
+
+def drive_threads(fleet: FleetOrchestrator, task: str, ids: List[str], durations: Dict[str, float], cancel_after: Optional[float]) -> List[Dict[str, Any]]:
+    timer = threading.Timer(cancel_after, fleet.cancel) if cancel_after else None
+    if timer:
+        timer.start()
+    futures = []
+    for t in ids:
+        submitted = time.perf_counter()
+        f = fleet.submit(task, ticket_id=t)
+        f.add_done_callback(lambda _f, t=t, s=submitted: durations.__setitem__(t, (time.perf_counter() - s) * 1000.0))
+        futures.append((t, f))
+    summaries = []
+    for t, f in futures:
+        try:
+            summaries.append(f.result())
+        except Exception as e:
+            summaries.append({"ticket_id": t, "status": "Cancelled" if f.cancelled() else "Failed", "error": str(e)})
+    if timer:
+        timer.cancel()
+    return summaries
+
+
+async def drive_async(fleet: FleetOrchestrator, task: str, ids: List[str], durations: Dict[str, float], cancel_after: Optional[float]) -> List[Dict[str, Any]]:
+    """Every ticket as a coroutine on one loop; steps use the simulated tools' async handlers."""
+    timer = asyncio.get_running_loop().call_later(cancel_after, fleet.cancel) if cancel_after else None
+
+    async def one(t: str) -> Dict[str, Any]:
+        submitted = time.perf_counter()
+        summary = await fleet.run_async(task, ticket_id=t)
+        durations[t] = (time.perf_counter() - submitted) * 1000.0
+        return summary
+
+    try:
+        return list(await asyncio.gather(*(one(t) for t in ids)))
+    finally:
+        if timer:
+            timer.cancel()
+
+
+def run(
+    tickets: int = 100,
+    concurrency: int = 16,
+    max_parallel: int = 1,
+    profiles: Optional[Dict[str, Any]] = None,
+    seed: Optional[int] = None,
+    limits: bool = True,
+    task: str = "Sync patient records",
+    cancel_after: Optional[float] = None,
+    trace_memory: bool = False,
+    keep: bool = False,
+    use_async: bool = False,
+) -> Dict[str, Any]:
+    run_id = f"sim-{uuid.uuid4().hex[:8]}"
+    ids = [f"{run_id}-{i:05d}" for i in range(tickets)]
+    index = {t: i for i, t in enumerate(ids)}
+
+    def registry_for(ticket_id: str):
+        return simulated_registry(profiles, None if seed is None else seed + 3 * index[ticket_id])
+
+    governor = ResourceGovernor.from_contract_file(registry=simulated_registry(profiles)) if limits else ResourceGovernor()
+    cfg = FleetConfig(max_tickets=concurrency, max_workers=max(16, concurrency * max_parallel), max_parallel=max_parallel)
+    durations: Dict[str, float] = {}
+    # Synthetic tickets must not show up in the shared transition log's stuck/count queries
+    state_log = StateLog(STATE_DIR / f"{run_id}.jsonl")
+
+    if trace_memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    with FleetOrchestrator(cfg, governor=governor, registry_factory=registry_for, state_log=state_log) as fleet:
+        if use_async:
+            summaries = asyncio.run(drive_async(fleet, task, ids, durations, cancel_after))
+        else:
+            summaries = drive_threads(fleet, task, ids, durations, cancel_after)
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1] if trace_memory else None
+    if trace_memory:
+        tracemalloc.stop()
+
+    ticket_status = Counter(s.get("status") for s in summaries)
+    step_status: Counter = Counter()
+    step_latency: Dict[str, List[float]] = defaultdict(list)
+    retried = 0
+    for s in summaries:
+        for r in s.get("executed", []):
+            step_status[r["status"] if r["status"] != "skipped" else f"skipped({r['stderr']})"] += 1
+            meta = r["meta"] or {}
+            if "latency_ms" in meta:
+                step_latency[r["command"]].append(meta["latency_ms"])
+            retried += meta.get("attempts", 1) > 1
+
+    if not keep:
+        for t in ids:
+            shutil.rmtree(SESSIONS_DIR / t, ignore_errors=True)
+            shutil.rmtree(WORKSPACES_DIR / t, ignore_errors=True)
+            (LOCKS_DIR / f"{t}.lock").unlink(missing_ok=True)
+        state_log.path.unlink(missing_ok=True)
+        state_log.snapshot_path.unlink(missing_ok=True)
+
+    completed = [durations[s["ticket_id"]] for s in summaries if s.get("status") != "Cancelled" and s.get("ticket_id") in durations]
+    return {
+        "tickets": tickets,
+        "concurrency": concurrency,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_tickets_per_s": round(tickets / elapsed, 2) if elapsed else None,
+        "ticket_latency_ms": latency_row(completed),
+        "step_latency_ms": {tool: latency_row(v) for tool, v in sorted(step_latency.items())},
+        "ticket_status": dict(ticket_status),
+        "step_status": dict(step_status),
+        "steps_retried": retried,
+        "governor": governor.stats(),
+        "tracemalloc_peak_mib": round(peak / 2**20, 2) if peak is not None else None,
+        "max_rss_mib": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Run synthetic tickets against simulated tool backends")
+    parser.add_argument("--tickets", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=16, help="Tickets in flight at once")
+    parser.add_argument("--max-parallel", type=int, default=1, help="Steps in flight per ticket")
+    parser.add_argument("--profile", metavar="FILE", help="JSON simulation profiles per tool (latency, error_rate, timeout_rate, output_bytes, timeout, idempotent, retries)")
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--no-limits", action="store_true", help="Ignore tooling_contract limits to measure the pipeline itself")
+    parser.add_argument("--task", default="Sync patient records")
+    parser.add_argument("--cancel-after", type=float, metavar="SECONDS", help="Cancel the fleet mid-run")
+    parser.add_argument("--tracemalloc", action="store_true", help="Track peak Python heap (slows the run)")
+    parser.add_argument("--async", dest="use_async", action="store_true", help="Run tickets as coroutines on one event loop (run_task_async)")
+    parser.add_argument("--keep", action="store_true", help="Keep the synthetic tickets' session directories and state log")
+    args = parser.parse_args(argv)
+
+    report = run(
+        tickets=args.tickets,
+        concurrency=args.concurrency,
+        max_parallel=args.max_parallel,
+        profiles=load_profiles(Path(args.profile)) if args.profile else DEFAULT_PROFILES,
+        seed=args.seed,
+        limits=not args.no_limits,
+        task=args.task,
+        cancel_after=args.cancel_after,
+        trace_memory=args.tracemalloc,
+        keep=args.keep,
+        use_async=args.use_async,
+    )
+    print(json.dumps(report, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
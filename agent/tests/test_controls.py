@@ -0,0 +1,178 @@
+from __future__ import annotations
+
+import os
+import ssl
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+from agent.domains import probes
+from agent.domains.controls import ControlEngine
+from agent.domains.probes import (
+    ComplianceTarget, Probe, ProbeResult, PASS, FAIL, MANUAL, ERROR,
+    cert_expiry, log_retention, no_legacy_tls, run_probe, setting_at_least, setting_at_most, setting_equals, tls_min_version,
+)
+
+DAY = 86400
+
+
+def _handshake(version: str = "TLSv1.3", days_left: float = 90, error: Exception = None):
+    """Stand-in for probes._handshake: one endpoint's negotiated version and certificate."""
+    def handshake(endpoint, timeout, verify=True, max_version=None):
+        if error is not None:
+            raise error
+        return version, {"notAfter": time.strftime("%b %d %H:%M:%S %Y GMT", time.gmtime(time.time() + days_left * DAY))}
+    return handshake
+
+
+def _ssl_error(reason: str) -> ssl.SSLError:
+    e = ssl.SSLError(1, reason)
+    e.reason = reason
+    return e
+
+
+def _status(probe: Probe, target: ComplianceTarget = None, endpoint: str = None) -> str:
+    return run_probe(probe, target or ComplianceTarget(), endpoint)["status"]
+
+
+@pytest.mark.parametrize("version,status", [("TLSv1.3", PASS), ("TLSv1.2", PASS), ("TLSv1.1", FAIL), ("SSLv3", FAIL)])
+def test_tls_min_version(monkeypatch, version: str, status: str):
+    monkeypatch.setattr(probes, "_handshake", _handshake(version))
+    result = run_probe(tls_min_version("TLS 1.2+"), ComplianceTarget(), "db.internal:5432")
+    assert result["status"] == status
+    assert result["evidence"] == {"endpoint": "db.internal:5432", "version": version}
+
+
+@pytest.mark.parametrize("days_left,status", [(90, PASS), (3, FAIL)])
+def test_cert_expiry(monkeypatch, days_left: float, status: str):
+    monkeypatch.setattr(probes, "_handshake", _handshake(days_left=days_left))
+    result = run_probe(cert_expiry("Certificate valid", min_days=14), ComplianceTarget(), "api.example")
+    assert result["status"] == status
+    assert abs(result["evidence"]["days_left"] - days_left) < 1
+
+
+def test_cert_that_fails_verification_fails(monkeypatch):
+    error = ssl.SSLCertVerificationError(1, "certificate verify failed")
+    error.verify_message = "self-signed certificate"
+    monkeypatch.setattr(probes, "_handshake", _handshake(error=error))
+    result = run_probe(cert_expiry("Certificate valid"), ComplianceTarget(), "api.example")
+    assert result["status"] == FAIL and "self-signed" in result["detail"]
+
+
+@pytest.mark.parametrize("outcome,status", [
+    (_ssl_error("TLSV1_ALERT_PROTOCOL_VERSION"), PASS),
+    (_ssl_error("WRONG_VERSION_NUMBER"), FAIL),
+    (_ssl_error("NO_PROTOCOLS_AVAILABLE"), MANUAL),
+    ("TLSv1.1", FAIL),
+])
+def test_no_legacy_tls(monkeypatch, outcome, status: str):
+    stub = _handshake(error=outcome) if isinstance(outcome, Exception) else _handshake(outcome)
+    monkeypatch.setattr(probes, "_handshake", stub)
+    assert _status(no_legacy_tls("No TLS <= 1.1"), endpoint="api.example") == status
+
+
+def test_unreachable_endpoint_is_an_error_not_a_pass():
+    # Nothing listens on port 1 of localhost
+    target = ComplianceTarget(timeout=1.0)
+    result = run_probe(tls_min_version("TLS 1.2+"), target, "127.0.0.1:1")
+    assert result["status"] == ERROR and result["endpoint"] == "127.0.0.1:1"
+
+
+@pytest.mark.parametrize("probe,settings,status", [
+    (setting_equals("MFA", "identity.mfa_enforced", True), {"identity.mfa_enforced": True}, PASS),
+    (setting_equals("MFA", "identity.mfa_enforced", True), {"identity.mfa_enforced": False}, FAIL),
+    (setting_equals("MFA", "identity.mfa_enforced", True), {}, MANUAL),
+    (setting_equals("Cipher", "db.encryption", ["AES-256", "AES-GCM"]), {"db.encryption": "AES-GCM"}, PASS),
+    (setting_at_least("Backups", "backup.retention_days", 30), {"backup.retention_days": "45"}, PASS),
+    (setting_at_least("Backups", "backup.retention_days", 30), {"backup.retention_days": 7}, FAIL),
+    (setting_at_most("Rotation", "kms.rotation_days", 365), {"kms.rotation_days": 400}, FAIL),
+    (setting_at_most("Rotation", "kms.rotation_days", 365), {}, MANUAL),
+])
+def test_setting_probes(probe: Probe, settings: dict, status: str):
+    assert _status(probe, ComplianceTarget(settings=settings)) == status
+
+
+def _log_dir(path: Path, age_days: float) -> str:
+    path.mkdir()
+    log = path / "audit.log"
+    log.write_text("entry\n", encoding="utf-8")
+    then = time.time() - age_days * DAY
+    os.utime(log, (then, then))
+    return str(path)
+
+
+def test_log_retention(tmp_path: Path):
+    probe = log_retention("Audit logs kept 6 years", min_days=2190)
+    assert _status(probe, ComplianceTarget()) == MANUAL
+    assert _status(probe, ComplianceTarget(settings={"audit.log_retention_days": 2555})) == PASS
+    assert _status(probe, ComplianceTarget(settings={"audit.log_retention_days": 90})) == FAIL
+    assert _status(probe, ComplianceTarget(log_dirs=[str(tmp_path / "missing")])) == FAIL
+    # Without a declaration, on-disk logs prove retention only once they are old enough
+    old = _log_dir(tmp_path / "old", age_days=2200)
+    new = _log_dir(tmp_path / "new", age_days=10)
+    assert _status(probe, ComplianceTarget(log_dirs=[old])) == PASS
+    result = run_probe(probe, ComplianceTarget(log_dirs=[new]))
+    assert result["status"] == MANUAL and result["evidence"]["oldest_log_age_days"] == pytest.approx(10, abs=0.1)
+
+
+def test_probe_exceptions_become_errors():
+    def boom(target):
+        raise ValueError("bad setting")
+
+    result = run_probe(Probe("boom", "Explode", boom), ComplianceTarget())
+    assert (result["status"], result["detail"]) == (ERROR, "ValueError: bad setting")
+
+
+def _counting(status: str, calls: list, per_endpoint: bool = False) -> Probe:
+    def check(target, endpoint=None):
+        calls.append(endpoint or target.name)
+        return ProbeResult(status, status)
+    return Probe(f"stub:{status}", f"Check {status}", check, per_endpoint=per_endpoint)
+
+
+def _control(control_id: str, steps: list, probe_list: list):
+    return SimpleNamespace(control_id=control_id, description=control_id, validation_steps=steps, probes=probe_list)
+
+
+def test_control_engine_rolls_up_pass_fail_and_manual():
+    calls: list = []
+    controls = [
+        _control("ok", ["Check pass"], [_counting(PASS, calls)]),
+        _control("bad", ["Check pass", "Check fail"], [_counting(PASS, calls), _counting(FAIL, calls)]),
+        # A prose step without a probe stays in the report as manual
+        _control("review", ["Check pass", "Interview the DPO"], [_counting(PASS, calls)]),
+        # Endpoint probes without endpoints are manual too
+        _control("tls", ["Check pass"], [_counting(PASS, calls, per_endpoint=True)]),
+    ]
+    report = ControlEngine().evaluate(controls, ComplianceTarget(name="prod"), framework="TEST")
+    by_id = {c["control_id"]: c for c in report["controls"]}
+    assert {cid: c["status"] for cid, c in by_id.items()} == {"ok": PASS, "bad": FAIL, "review": MANUAL, "tls": MANUAL}
+    assert [c["status"] for c in by_id["review"]["checks"]] == [PASS, MANUAL]
+    assert report["status"] == FAIL and report["framework"] == "TEST" and report["target"] == "prod"
+    assert report["totals"] == {PASS: 1, FAIL: 1, MANUAL: 2, ERROR: 0}
+    assert len(calls) == 4
+
+
+def test_control_engine_runs_endpoint_probes_per_endpoint_and_caches_per_target():
+    calls: list = []
+    controls = [_control("tls", ["Check pass"], [_counting(PASS, calls, per_endpoint=True)])]
+    engine = ControlEngine(ttl=60)
+    target = ComplianceTarget(endpoints=["a:443", "b:443"])
+    first = engine.evaluate(controls, target)
+    assert first["status"] == PASS and sorted(calls) == ["a:443", "b:443"]
+    assert engine.evaluate(controls, ComplianceTarget(endpoints=["a:443", "b:443"]))["controls"][0]["cached"] is True
+    assert len(calls) == 2
+    # A different target, or an invalidated cache, runs the probes again
+    engine.evaluate(controls, ComplianceTarget(endpoints=["c:443"]))
+    engine.invalidate()
+    assert engine.evaluate(controls, target)["controls"][0]["cached"] is False
+    assert len(calls) == 5
+
+
+def test_domain_sweep_without_evidence_is_manual():
+    report = ControlEngine().evaluate_domain("healthcare", ComplianceTarget(name="empty"))
+    assert report["framework"] == "HIPAA" and report["controls"]
+    assert report["status"] == MANUAL and report["totals"][FAIL] == report["totals"][PASS] == 0
+    assert ControlEngine().evaluate_domain("general", ComplianceTarget()) is None
@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+import pytest
+
+from agent.domains import registry as domain_registry
+from agent.domains.base import BaseDomain, DomainContext
+from agent.domains.government import GovernmentDomain, fips_mode
+from agent.domains.probes import ComplianceTarget, Probe, ProbeResult, PASS, run_probe
+from agent.domains.registry import DomainRegistry
+
+
+def _endpoint_probe(calls: list) -> Probe:
+    def check(target, endpoint):
+        calls.append(endpoint)
+        return ProbeResult(PASS, endpoint)
+    return Probe("tls_min_version", "TLS 1.2+ on every endpoint", check, per_endpoint=True)
+
+
+class EndpointDomain(BaseDomain):
+    def __init__(self, calls: list):
+        super().__init__()
+        self.calls = calls
+
+    def preflight_checks(self, ctx):
+        return [_endpoint_probe(self.calls)]
+
+
+def _non_fips_host(monkeypatch):
+    # Whatever the agent's own machine reports must not matter
+    monkeypatch.setattr(Path, "exists", lambda self: True)
+    monkeypatch.setattr(Path, "read_text", lambda self, *a, **kw: "0\n")
+
+
+def test_fips_mode_reads_only_the_target_declaration(monkeypatch):
+    _non_fips_host(monkeypatch)
+    probe = fips_mode("FIPS enabled")
+    assert run_probe(probe, ComplianceTarget())["status"] == "manual"
+    assert run_probe(probe, ComplianceTarget(settings={"host.fips_enabled": True}))["status"] == "pass"
+    assert run_probe(probe, ComplianceTarget(settings={"host.fips_enabled": 0}))["status"] == "fail"
+
+
+def test_government_preflight_without_a_target_is_not_failed(monkeypatch):
+    _non_fips_host(monkeypatch)
+    report = GovernmentDomain().preflight(DomainContext(environment="staging"))
+    assert report["ok"]
+    assert {c["status"] for c in report["checks"]} == {"manual"}
+
+
+def test_per_endpoint_check_without_endpoints_is_manual():
+    calls: list = []
+    report = EndpointDomain(calls).preflight(DomainContext(environment="test-domains"))
+    assert [(c["step"], c["status"]) for c in report["checks"]] == [("TLS 1.2+ on every endpoint", "manual")]
+    assert calls == [] and report["ok"]
+    target = ComplianceTarget(endpoints=["a:443", "b:443"])
+    report = EndpointDomain(calls).preflight(DomainContext(target=target))
+    assert [c["endpoint"] for c in report["checks"]] == ["a:443", "b:443"]
+    assert sorted(calls) == ["a:443", "b:443"]
+
+
+class CountingDomain(BaseDomain):
+    def __init__(self, calls: list):
+        super().__init__()
+        self.calls = calls
+
+    def preflight_checks(self, ctx):
+        self.calls.append(ctx.cache_key())
+        return super().preflight_checks(ctx)
+
+
+def test_hook_results_are_cached_per_context_until_the_ttl(monkeypatch):
+    calls: list = []
+    domain = CountingDomain(calls)
+    staging = DomainContext(environment="staging")
+    assert domain.preflight(staging)["cached"] is False
+    assert domain.preflight(DomainContext(environment="staging"))["cached"] is True
+    # Another environment or another target is another key
+    assert domain.preflight(DomainContext(environment="prod"))["cached"] is False
+    target = ComplianceTarget(settings={"secrets.available": True})
+    assert domain.preflight(DomainContext(environment="staging", target=target))["cached"] is False
+    assert len(calls) == 3
+    # Postflight has its own entries
+    assert domain.postflight(staging)["cached"] is False
+    domain.cache_ttl = 0
+    assert domain.preflight(DomainContext(environment="qa"))["cached"] is False
+    assert domain.preflight(DomainContext(environment="qa"))["cached"] is False
+    assert len(calls) == 5
+
+
+@pytest.fixture
+def plugins(tmp_path: Path, monkeypatch):
+    """A fresh plugin cache and an importable, not yet imported, plugin module."""
+    monkeypatch.setattr(domain_registry, "_loaded", {})
+    (tmp_path / "fde_test_plugin.py").write_text(
+        "from agent.domains.base import BaseDomain, DomainSpec\n"
+        "class AcmeDomain(BaseDomain):\n"
+        "    SPEC = DomainSpec(name='acme', compliance={})\n",
+        encoding="utf-8",
+    )
+    monkeypatch.syspath_prepend(str(tmp_path))
+    monkeypatch.delitem(sys.modules, "fde_test_plugin", raising=False)
+    yield "fde_test_plugin"
+    sys.modules.pop("fde_test_plugin", None)
+
+
+def test_builtin_plugins_are_imported_on_first_load(plugins: str, monkeypatch):
+    monkeypatch.setitem(domain_registry.BUILTIN_DOMAINS, "acme", f"{plugins}:AcmeDomain")
+    registry = DomainRegistry(discover=False)
+    assert registry.detect("ship the acme release") == "acme"
+    assert plugins not in sys.modules
+    domain = registry.load("acme")
+    assert plugins in sys.modules and domain.spec.name == "acme"
+    # One instance per process, so hook caches are shared across tickets
+    assert DomainRegistry(discover=False).load("acme") is domain
+    assert registry.load("unknown") is None and registry.load(None) is None
+
+
+class FakeEntryPoint:
+    def __init__(self, name: str, value: str):
+        self.name = name
+        self.value = value
+        self.loads = 0
+
+    def load(self):
+        self.loads += 1
+        module, _, attr = self.value.partition(":")
+        __import__(module)
+        return getattr(sys.modules[module], attr)
+
+
+def test_entry_point_plugins_are_discovered_without_importing(plugins: str, monkeypatch):
+    ep = FakeEntryPoint("acme", f"{plugins}:AcmeDomain")
+    groups = []
+    monkeypatch.setattr(domain_registry, "entry_points", lambda group: groups.append(group) or [ep])
+    registry = DomainRegistry()
+    assert groups == [domain_registry.ENTRY_POINT_GROUP]
+    assert "acme" in registry.names() and "healthcare" in registry.names()
+    assert ep.loads == 0 and plugins not in sys.modules
+    name, domain = registry.resolve("Roll out ACME billing")
+    assert name == "acme" and isinstance(domain, BaseDomain)
+    registry.load("acme")
+    assert ep.loads == 1
+
+
+def test_broken_entry_point_metadata_leaves_the_builtins(monkeypatch):
+    def broken(group):
+        raise RuntimeError("bad metadata")
+
+    monkeypatch.setattr(domain_registry, "entry_points", broken)
+    assert DomainRegistry().names() == list(domain_registry.BUILTIN_DOMAINS)
+    assert DomainRegistry().detect("deploy the payment service") == "fintech"
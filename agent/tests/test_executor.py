@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from agent.core.executor import BLOCKED
+from agent.core.planner import FDEPlanner, PlanStep
+from agent.tools.registry import ToolRegistry
+
+
+def _registry(calls: list) -> ToolRegistry:
+    def fake(step):
+        calls.append(step.description)
+        return {"status": str(step.args), "stdout": step.description, "stderr": "", "meta": {}}
+
+    registry = ToolRegistry()
+    registry.register("fake", "read", fake)
+    return registry
+
+
+@pytest.mark.parametrize("use_async", [False, True])
+@pytest.mark.parametrize("max_parallel", [1, 3])
+def test_blocked_skips_block_their_dependents(make_executor, run_steps, use_async: bool, max_parallel: int):
+    calls: list = []
+    executor = make_executor(_registry(calls), max_parallel)
+    steps = [
+        PlanStep("a", "fake", "failed(exit 1)"),
+        PlanStep("b", "fake", "ok", depends_on=[0]),
+        # Reads b's output, which never exists
+        PlanStep("c", "fake", "ok", input_from=1),
+        PlanStep("d", "fake", "ok", depends_on=[2]),
+        PlanStep("e", "fake", "ok", depends_on=[]),
+    ]
+    results = run_steps(executor, steps, use_async)
+    assert [r.status for r in results] == ["failed(exit 1)", "skipped", "skipped", "skipped", "ok"]
+    assert results[1].stderr == BLOCKED
+    assert results[2].stderr == BLOCKED
+    assert results[3].stderr == BLOCKED
+    assert sorted(calls) == ["a", "e"]
+
+
+@pytest.mark.parametrize("use_async", [False, True])
+def test_pipe_block_is_a_failure_for_dependents(make_executor, run_steps, use_async: bool):
+    calls: list = []
+    executor = make_executor(_registry(calls))
+    # A non-executable step is not a failure, but it leaves nothing to read
+    steps = [PlanStep("a"), PlanStep("b", "fake", "ok", input_from=0), PlanStep("c", "fake", "ok", depends_on=[1])]
+    results = run_steps(executor, steps, use_async)
+    assert results[1].stderr == "blocked: no output from step 0"
+    assert results[2].stderr == BLOCKED
+    assert calls == []
+
+
+@pytest.mark.parametrize("max_parallel", [1, 4])
+def test_async_results_are_reported_off_the_loop_in_completion_order(make_executor, max_parallel: int):
+    calls: list = []
+    reports: list = []
+    loop_thread: list = []
+
+    def on_result(i, result):
+        reports.append((i, threading.get_ident()))
+
+    executor = make_executor(_registry(calls), max_parallel, on_result=on_result)
+    steps = [PlanStep(f"s{i}", "fake", "ok", depends_on=[i - 1] if i % 2 else []) for i in range(6)]
+
+    async def main():
+        loop_thread.append(threading.get_ident())
+        return await executor.execute_async(steps)
+
+    results = asyncio.run(main())
+    assert all(r.status == "ok" for r in results)
+    assert sorted(i for i, _ in reports) == list(range(6))
+    assert all(t != loop_thread[0] for _, t in reports)
+    # A step is reported only after the step it depends on
+    order = [i for i, _ in reports]
+    assert all(order.index(i - 1) < order.index(i) for i in range(1, 6, 2))
+
+
+def test_parallel_run_reports_every_step_once(make_executor):
+    calls: list = []
+    reports: list = []
+    executor = make_executor(_registry(calls), 4, on_result=lambda i, r: reports.append(i))
+    steps = [PlanStep("a", "fake", "failed(exit 2)")] + [PlanStep(f"s{i}", "fake", "ok", depends_on=[0]) for i in range(5)]
+    results = executor.execute(steps)
+    assert sorted(reports) == list(range(6))
+    assert [r.stderr for r in results[1:]] == [BLOCKED] * 5
+
+
+@pytest.mark.parametrize("use_async", [False, True])
+def test_planned_validation_waits_for_the_steps_it_validates(make_executor, run_steps, use_async: bool):
+    spans = {}
+
+    def timed(step):
+        start = time.perf_counter()
+        time.sleep(0.02)
+        spans[step.description] = (start, time.perf_counter())
+        return {"status": "ok", "stdout": "", "stderr": ""}
+
+    registry = ToolRegistry()
+    for name in ("shell", "http", "git"):
+        registry.register(name, "read", timed)
+    plan = FDEPlanner().decompose("Sync patient records")
+    # Longest-first ordering would start validation before anything else if it were ready
+    estimator = lambda step: 1e6 if step.description.startswith("Validation") else 1.0
+    executor = make_executor(registry, 5, estimator=estimator)
+    results = run_steps(executor, plan.steps, use_async)
+    assert all(r.status == "ok" for r in results)
+    start = [spans[s.description][0] for s in plan.steps]
+    end = [spans[s.description][1] for s in plan.steps]
+    # The independent steps overlap; finalize and validation each start after their prerequisites end
+    assert max(start[:3]) < min(end[:3])
+    assert start[3] >= max(end[:3])
+    assert start[4] >= max(end[:4])
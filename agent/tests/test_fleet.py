@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import shutil
+import threading
+import uuid
+from pathlib import Path
+
+import pytest
+
+from agent.core.fleet import WORKSPACES_DIR, FleetConfig, FleetOrchestrator
+from agent.core.governor import ResourceGovernor
+from agent.core.locking import LOCKS_DIR
+from agent.core.memory import SESSIONS_DIR
+from agent.core.state_machine import StateLog
+from agent.tools.registry import ToolRegistry
+
+
+def _registry(ticket_id: str, started: threading.Event = None, gate: threading.Event = None) -> ToolRegistry:
+    def handler(step):
+        if gate is not None:
+            started.set()
+            gate.wait(5)
+        return {"status": "ok", "stdout": "done", "stderr": "", "meta": {"code": 0}}
+
+    registry = ToolRegistry()
+    for name in ("shell", "http", "git"):
+        registry.register(name, "read", handler)
+    return registry
+
+
+@pytest.fixture
+def tickets():
+    """Unique ticket ids whose session, lock and workspace are removed afterwards."""
+    made = []
+
+    def new(prefix: str = "test-fleet") -> str:
+        made.append(f"{prefix}-{uuid.uuid4().hex[:8]}")
+        return made[-1]
+
+    yield new
+    for ticket in made:
+        shutil.rmtree(SESSIONS_DIR / ticket, ignore_errors=True)
+        shutil.rmtree(WORKSPACES_DIR / ticket, ignore_errors=True)
+        (LOCKS_DIR / f"{ticket}.lock").unlink(missing_ok=True)
+
+
+def _fleet(tmp_path: Path, registry_factory=_registry, max_tickets: int = 4) -> FleetOrchestrator:
+    return FleetOrchestrator(FleetConfig(max_tickets=max_tickets, worktrees=False), governor=ResourceGovernor(),
+                             registry_factory=registry_factory, state_log=StateLog(tmp_path / "transitions.jsonl"))
+
+
+def _turns(ticket: str) -> list:
+    return json.loads((SESSIONS_DIR / ticket / "turns.json").read_text(encoding="utf-8"))
+
+
+@pytest.mark.parametrize("use_async", [False, True])
+def test_runs_sharing_a_ticket_keep_each_others_turns(tmp_path: Path, tickets, use_async: bool):
+    ticket = tickets()
+    specs = [{"task": f"Sync patient records batch {i}", "ticket_id": ticket} for i in range(3)]
+    with _fleet(tmp_path) as fleet:
+        summaries = asyncio.run(fleet.run_all_async(specs)) if use_async else fleet.run_all(specs)
+    assert [s["status"] for s in summaries] == ["Validated"] * 3
+    users = sorted(t["content"] for t in _turns(ticket) if t["role"] == "user")
+    assert users == sorted(s["task"] for s in specs)
+    assert len(_turns(ticket)) == 6
+
+
+def test_tickets_run_concurrently_with_their_own_state(tmp_path: Path, tickets):
+    ids = [tickets() for _ in range(3)]
+    with _fleet(tmp_path) as fleet:
+        summaries = fleet.run_all([{"task": "Sync patient records", "ticket_id": t, "environment": "staging"} for t in ids])
+    assert [s["ticket_id"] for s in summaries] == ids
+    assert all(s["status"] == "Validated" and s["environment"] == "staging" for s in summaries)
+    for t in ids:
+        assert len(_turns(t)) == 2 and (WORKSPACES_DIR / t).is_dir()
+
+
+def test_cancel_stops_queued_and_running_tickets(tmp_path: Path, tickets):
+    started, gate = threading.Event(), threading.Event()
+    ids = [tickets() for _ in range(3)]
+    with _fleet(tmp_path, registry_factory=lambda t: _registry(t, started, gate), max_tickets=1) as fleet:
+        futures = [fleet.submit("Sync patient records", t) for t in ids]
+        assert started.wait(5)
+        fleet.cancel()
+        gate.set()
+        assert futures[1].cancelled() and futures[2].cancelled()
+        running = futures[0].result()
+        assert running["status"] == "Cancelled"
+        assert any(r["stderr"] == "cancelled" for r in running["executed"])
+        # Submitted after cancel(): already cancelled, never run
+        assert fleet.submit("Sync patient records", tickets()).cancelled()
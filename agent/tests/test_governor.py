@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from agent.core.governor import ResourceGovernor, ResourceLimits, TokenBucket
+
+
+class _Peak:
+    """Tracks how many callers are inside a block at once."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.now = self.peak = 0
+
+    def __enter__(self):
+        with self.lock:
+            self.now += 1
+            self.peak = max(self.peak, self.now)
+
+    def __exit__(self, *exc):
+        with self.lock:
+            self.now -= 1
+
+
+def test_tool_concurrency_limit_is_respected():
+    gov = ResourceGovernor({"shell": ResourceLimits(max_in_flight=3)})
+    peak = _Peak()
+
+    def step(_):
+        with gov.slot("shell"), peak:
+            time.sleep(0.01)
+
+    with ThreadPoolExecutor(max_workers=12) as pool:
+        list(pool.map(step, range(36)))
+    assert peak.peak == 3
+    stats = gov.stats()["tool:shell"]
+    assert stats["in_flight"] == 0 and stats["waited_s"] > 0
+
+
+def test_per_host_limit_and_default_host_limit():
+    gov = ResourceGovernor({}, {"api.example": ResourceLimits(max_in_flight=1)}, ResourceLimits(max_in_flight=2))
+    peaks = {"api.example": _Peak(), "other.example": _Peak()}
+
+    def step(host):
+        with gov.slot("http", host), peaks[host]:
+            time.sleep(0.01)
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(step, ["api.example", "other.example"] * 8))
+    assert peaks["api.example"].peak == 1
+    assert peaks["other.example"].peak == 2
+
+
+def test_slow_host_does_not_starve_other_hosts():
+    # Two http slots in total; the slow host allows one request at a time
+    gov = ResourceGovernor({"http": ResourceLimits(max_in_flight=2)}, {"slow.example": ResourceLimits(max_in_flight=1)})
+    release = threading.Event()
+
+    def slow(_):
+        with gov.slot("http", "slow.example"):
+            release.wait(5)
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        futures = [pool.submit(slow, i) for i in range(3)]
+        time.sleep(0.05)
+        start = time.monotonic()
+        # Queued slow-host requests must not be holding http slots
+        with gov.slot("http", "fast.example"):
+            elapsed = time.monotonic() - start
+        release.set()
+        for f in futures:
+            f.result()
+    assert elapsed < 1.0
+
+
+def test_rate_limit_spaces_out_calls():
+    bucket = TokenBucket(rate=50, burst=1)
+    start = time.monotonic()
+    for _ in range(6):
+        bucket.acquire()
+    # One token up front, then 5 more at 50/s
+    assert time.monotonic() - start >= 0.09
+
+
+def test_async_slots_share_limits_with_threads():
+    gov = ResourceGovernor({"http": ResourceLimits(max_in_flight=2)})
+    peak = _Peak()
+
+    async def step():
+        async with gov.slot_async("http", "api.example"):
+            with peak:
+                await asyncio.sleep(0.01)
+
+    async def main():
+        await asyncio.gather(*(step() for _ in range(10)))
+
+    def threaded(_):
+        with gov.slot("http", "api.example"), peak:
+            time.sleep(0.01)
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        futures = [pool.submit(threaded, i) for i in range(8)]
+        asyncio.run(main())
+        for f in futures:
+            f.result()
+    assert peak.peak == 2
+    assert gov.stats()["tool:http"]["in_flight"] == 0
@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+import json
+import random
+
+import pytest
+
+from agent.tools.json_stream import StreamingJsonCheck
+
+
+def check(body: bytes, schema: dict, chunk: int = 0) -> str | None:
+    c = StreamingJsonCheck(schema)
+    parts = [body[i:i + chunk] for i in range(0, len(body), chunk)] if chunk else [body]
+    for part in parts:
+        err = c.feed(part)
+        if err:
+            return err
+    return c.finish()
+
+
+@pytest.mark.parametrize("key", ["café", 'quo"te', "back\\slash", "new\nline", "tab\t", "emoji 😀", "\x00nul"])
+@pytest.mark.parametrize("ensure_ascii", [True, False])
+def test_escaped_keys_satisfy_required_and_property_types(key: str, ensure_ascii: bool):
+    body = json.dumps({"other": [1, {"x": "y"}], key: 5}, ensure_ascii=ensure_ascii).encode()
+    assert check(body, {"type": "object", "required": [key], "properties": {key: {"type": "integer"}}}) is None
+    assert check(body, {"properties": {key: {"type": "string"}}}) == f"expected '{key}' to be string, got number"
+    # Every split point, including ones inside an escape sequence
+    for n in range(1, 8):
+        assert check(body, {"required": [key]}, chunk=n) is None
+
+
+def test_missing_and_wrong_types_are_reported():
+    body = b'{"items": [1, 2], "count": "3"}'
+    assert check(body, {"required": ["items", "total"]}) == "missing required keys: total"
+    assert check(body, {"properties": {"count": {"type": "integer"}}}) == "expected 'count' to be integer, got string"
+    assert check(b"[1, 2]", {"type": "object"}) == "expected top-level object, got array"
+    assert check(b'{"a": [1, 2', {}) == "truncated JSON document"
+    assert check(b"", {}) == "empty body"
+
+
+_ALPHABET = ['a', 'b', '"', '\\', '/', '\n', 'é', ' ', '😀', '{', '}', '[', ']', ':', ',', ' ']
+
+
+def _random_value(rng: random.Random, depth: int = 0):
+    kind = rng.choice(["int", "str", "list", "dict", "null", "bool", "float"] if depth < 3 else ["int", "str", "null"])
+    if kind == "int":
+        return rng.randint(-10**6, 10**6)
+    if kind == "float":
+        return rng.random() * 1000
+    if kind == "str":
+        return "".join(rng.choice(_ALPHABET) for _ in range(rng.randint(0, 6)))
+    if kind == "list":
+        return [_random_value(rng, depth + 1) for _ in range(rng.randint(0, 3))]
+    if kind == "dict":
+        return {"".join(rng.choice(_ALPHABET) for _ in range(rng.randint(0, 4))): _random_value(rng, depth + 1) for _ in range(rng.randint(0, 3))}
+    return None if kind == "null" else rng.random() < 0.5
+
+
+def _type_of(value) -> str:
+    if isinstance(value, bool):
+        return "boolean"
+    if value is None:
+        return "null"
+    return {dict: "object", list: "array", str: "string", int: "number", float: "number"}[type(value)]
+
+
+def test_agrees_with_json_loads_on_random_documents():
+    rng = random.Random(1234)
+    for _ in range(2000):
+        doc = {"".join(rng.choice(_ALPHABET) for _ in range(rng.randint(0, 5))): _random_value(rng) for _ in range(rng.randint(1, 5))}
+        body = json.dumps(doc, ensure_ascii=rng.random() < 0.5).encode()
+        parsed = json.loads(body)
+        schema = {"type": "object", "required": list(parsed), "properties": {k: {"type": _type_of(v)} for k, v in parsed.items()}}
+        assert check(body, schema, chunk=rng.randint(1, 16)) is None, body
+        absent = "absent-" + rng.choice(_ALPHABET)
+        assert check(body, {"required": [absent]}, chunk=rng.randint(1, 16)) == f"missing required keys: {absent}"
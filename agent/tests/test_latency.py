@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+from agent.core.latency import LatencyStore
+from agent.core.planner import PlanStep
+
+PLAN = [{"description": "status", "command": "git", "args": ["status"]}]
+
+
+def _executed(ms: float) -> list:
+    return [{"description": "status", "status": "ok", "meta": {"duration_ms": ms}}]
+
+
+def _write(path: Path, doc: dict) -> Path:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(doc), encoding="utf-8")
+    return path
+
+
+def _count(store: LatencyStore) -> int:
+    s, _ = store.lookup(PlanStep(description="status", command="git", args=["status"]))
+    return s["count"] if s else 0
+
+
+def test_summary_and_manifest_of_one_run_count_once(tmp_path: Path):
+    store = LatencyStore(tmp_path / "stats" / "latency.json")
+    run = {"ticket_id": "T1", "run_id": "abc", "plan": PLAN}
+    summary = _write(tmp_path / "summary.json", dict(run, time="2026-01-01 10:00:00Z", executed=_executed(12.0)))
+    # The manifest is stamped when the run begins, so its time differs from the summary's
+    manifest = _write(tmp_path / "manifest.json", dict(run, time="2026-01-01 09:59:58Z", executed=_executed(12.0)))
+    assert store.ingest([summary, manifest]) == 1
+    assert _count(store) == 1
+
+
+def test_legacy_documents_without_run_id_count_once(tmp_path: Path):
+    store = LatencyStore(tmp_path / "stats" / "latency.json")
+    summary = _write(tmp_path / "summary.json", {"ticket_id": "T1", "time": "10:00:00", "plan": PLAN, "executed": _executed(12.5)})
+    manifest = _write(tmp_path / "manifest.json", {"ticket_id": "T1", "time": "09:59:58", "plan": PLAN, "executed": _executed(12.5)})
+    assert store.ingest([summary, manifest]) == 1
+
+
+def test_distinct_runs_in_the_same_second_are_both_counted(tmp_path: Path):
+    store = LatencyStore(tmp_path / "stats" / "latency.json")
+    step = PlanStep.from_dict(PLAN[0])
+    assert store.record_run("run-a", None, [step], _executed(10.0)) == 1
+    assert store.record_run("run-b", None, [step], _executed(10.0)) == 1
+    assert store.record_run("run-a", None, [step], _executed(10.0)) == 0
+    assert _count(store) == 2
+
+
+def test_record_appends_to_the_log_and_compacts_periodically(tmp_path: Path, monkeypatch):
+    monkeypatch.setattr("agent.core.latency._COMPACT_EVERY", 4)
+    store = LatencyStore(tmp_path / "latency.json")
+    step = PlanStep.from_dict(PLAN[0])
+    for i in range(3):
+        store.record_run(f"run-{i}", "prod", [step], _executed(10.0 + i))
+    # No snapshot rewrite per run: one log line each
+    assert not store.path.exists()
+    assert len(store.log_path.read_text(encoding="utf-8").splitlines()) == 3
+    store.record_run("run-3", "prod", [step], _executed(13.0))
+    assert store.log_path.read_text(encoding="utf-8") == ""
+    snapshot = json.loads(store.path.read_text(encoding="utf-8"))
+    assert snapshot["runs"] == [f"run-{i}" for i in range(4)]
+    assert _count(LatencyStore(store.path)) == 4
+
+
+def test_stores_see_each_others_runs_across_compaction(tmp_path: Path, monkeypatch):
+    monkeypatch.setattr("agent.core.latency._COMPACT_EVERY", 3)
+    a = LatencyStore(tmp_path / "latency.json")
+    b = LatencyStore(tmp_path / "latency.json")
+    step = PlanStep.from_dict(PLAN[0])
+    for i in range(5):
+        writer = a if i % 2 else b
+        writer.record_run(f"run-{i}", None, [step], _executed(float(i)))
+        assert _count(a) == _count(b) == i + 1
+    # Already-seen runs are skipped whichever store sees them again
+    assert b.record_run("run-1", None, [step], _executed(1.0)) == 0
+
+
+def test_partial_log_line_is_ignored_and_overwritten(tmp_path: Path):
+    store = LatencyStore(tmp_path / "latency.json")
+    step = PlanStep.from_dict(PLAN[0])
+    store.record_run("run-a", None, [step], _executed(5.0))
+    with store.log_path.open("ab") as f:
+        f.write(b'{"run": "half", "samp')
+    other = LatencyStore(store.path)
+    assert _count(other) == 1
+    other.record_run("run-b", None, [step], _executed(6.0))
+    assert [json.loads(l)["run"] for l in store.log_path.read_text(encoding="utf-8").splitlines()] == ["run-a", "run-b"]
+    assert _count(store) == 2
@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+import asyncio
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+from agent.core.locking import TicketLock, atomic_write, atomic_write_text, try_lock_file, unlock_file
+
+
+def test_ticket_lock_is_reentrant_within_a_thread(tmp_path: Path):
+    lock = TicketLock("T1", lock_dir=tmp_path)
+    with lock:
+        # A second TicketLock on the same ticket shares the state, so nesting never re-flocks
+        with TicketLock("T1", lock_dir=tmp_path):
+            assert try_lock_file(lock.path) is None
+        assert try_lock_file(lock.path) is None
+    fh = try_lock_file(lock.path)
+    assert fh is not None
+    unlock_file(fh)
+
+
+def test_ticket_lock_excludes_other_threads(tmp_path: Path):
+    inside = []
+    overlaps = []
+
+    def work():
+        for _ in range(20):
+            with TicketLock("T1", lock_dir=tmp_path):
+                inside.append(1)
+                overlaps.append(len(inside))
+                time.sleep(0.0005)
+                inside.pop()
+
+    threads = [threading.Thread(target=work) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(overlaps) == 80 and max(overlaps) == 1
+
+
+def test_ticket_lock_excludes_other_processes(tmp_path: Path):
+    probe = (
+        "import sys; from pathlib import Path; from agent.core.locking import try_lock_file;"
+        "print('free' if try_lock_file(Path(sys.argv[1])) else 'held')"
+    )
+    root = Path(__file__).resolve().parents[2]
+    lock = TicketLock("T1", lock_dir=tmp_path)
+
+    def other_process() -> str:
+        return subprocess.run([sys.executable, "-c", probe, str(lock.path)], cwd=root, capture_output=True, text=True, check=True).stdout.strip()
+
+    with lock:
+        assert other_process() == "held"
+    assert other_process() == "free"
+
+
+def test_async_holder_and_thread_holder_exclude_each_other(tmp_path: Path):
+    lock = TicketLock("T1", lock_dir=tmp_path)
+    order = []
+
+    async def hold():
+        async with lock.acquire_async():
+            order.append("async in")
+            await asyncio.sleep(0.05)
+            order.append("async out")
+
+    def thread_holder():
+        time.sleep(0.01)
+        with lock:
+            order.append("thread")
+
+    t = threading.Thread(target=thread_holder)
+    t.start()
+    asyncio.run(hold())
+    t.join()
+    assert order == ["async in", "async out", "thread"]
+
+
+def test_atomic_write_replaces_whole_files_only(tmp_path: Path):
+    path = tmp_path / "state" / "summary.json"
+    atomic_write_text(path, "first")
+
+    def half_written(f):
+        f.write("partial")
+        raise RuntimeError("disk full")
+
+    with pytest.raises(RuntimeError):
+        atomic_write(path, half_written)
+    assert path.read_text(encoding="utf-8") == "first"
+    assert [p.name for p in path.parent.iterdir()] == ["summary.json"]
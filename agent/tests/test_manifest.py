@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+from agent.core.executor import ExecutionResult
+from agent.core.manifest import DELTAS_NAME, VIEW_NAME, ManifestLog, manifest_diff, read_manifest
+from agent.core.planner import PlanStep
+from agent.core.records import dumps
+
+PLAN = [
+    PlanStep("Banner", "shell", "echo start"),
+    PlanStep("Health", "http", method="GET", url="http://127.0.0.1:8000/"),
+    PlanStep("Status", "git", ["status"]),
+    PlanStep("Explain"),
+]
+
+
+def _result(step: PlanStep, status: str = "ok", ms: float = 10.0, stderr: str = "") -> ExecutionResult:
+    return ExecutionResult(step.description, step.command, status, "out", stderr, {"duration_ms": ms})
+
+
+def _plain(view: dict) -> dict:
+    return json.loads(dumps(view))
+
+
+def test_deltas_fold_into_the_full_manifest(tmp_path: Path):
+    log = ManifestLog("T1", root=tmp_path)
+    log.begin(PLAN, environment="staging", run_id="r1")
+    # Steps finish out of order
+    log.record_step(2, _result(PLAN[2]))
+    log.record_step(0, _result(PLAN[0], ms=5.0))
+    log.update(status="Executing")
+
+    current = read_manifest("T1", root=tmp_path)
+    assert current == _plain(log.view())
+    assert [e["status"] for e in current["executed"]] == ["ok", "planned", "ok", "planned"]
+    assert current["environment"] == "staging" and current["run_id"] == "r1" and current["status"] == "Executing"
+    assert current["progress"]["executed"] == 2 and current["progress"]["pending"] == 2
+    # The materialized view is only rewritten at begin and finish; the deltas carry the rest
+    on_disk = json.loads((tmp_path / VIEW_NAME).read_text(encoding="utf-8"))
+    assert [e["status"] for e in on_disk["executed"]] == ["planned"] * 4
+    assert len((tmp_path / DELTAS_NAME).read_text(encoding="utf-8").splitlines()) == 4
+
+    log.record_step(1, _result(PLAN[1], "failed(status=503)"))
+    log.record_step(3, _result(PLAN[3], "skipped", stderr="non-executable step"))
+    view = log.finish(status="Failed", validation_ok=False)
+    final = json.loads(view.read_text(encoding="utf-8"))
+    assert final == read_manifest("T1", root=tmp_path)
+    assert final["status"] == "Failed" and final["validation_ok"] is False
+    assert final["progress"] == {"planned": 4, "executed": 3, "failed": 1, "skipped": 1, "pending": 0, "duration_ms": 35.0}
+
+
+def test_later_deltas_replace_earlier_ones(tmp_path: Path):
+    log = ManifestLog("T1", root=tmp_path)
+    log.begin(PLAN[:2])
+    log.record_step(0, _result(PLAN[0], "failed(timeout)"))
+    log.record_step(0, _result(PLAN[0], "ok"))
+    log.update(status="Executing")
+    log.update(status="Validated")
+    current = read_manifest("T1", root=tmp_path)
+    assert current["executed"][0]["status"] == "ok" and current["status"] == "Validated"
+    # A new run starts a fresh log: nothing from the previous run carries over
+    log.begin(PLAN[2:], run_id="r2")
+    current = read_manifest("T1", root=tmp_path)
+    assert [e["status"] for e in current["executed"]] == ["planned", "planned"]
+    assert current["run_id"] == "r2" and "status" not in current
+
+
+def test_a_torn_last_line_is_ignored(tmp_path: Path):
+    log = ManifestLog("T1", root=tmp_path)
+    log.begin(PLAN)
+    log.record_step(0, _result(PLAN[0]))
+    log.close()
+    with (tmp_path / DELTAS_NAME).open("a", encoding="utf-8") as f:
+        f.write('{"op": "step", "index": 1, "result": {"stat')
+    current = read_manifest("T1", root=tmp_path)
+    assert [e["status"] for e in current["executed"]] == ["ok", "planned", "planned", "planned"]
+
+
+def test_without_deltas_the_view_is_read(tmp_path: Path):
+    assert read_manifest("T1", root=tmp_path) is None
+    view = {"ticket_id": "T1", "plan": [{"description": "Banner"}], "executed": [{"description": "Banner", "status": "ok"}]}
+    (tmp_path / VIEW_NAME).write_text(json.dumps(view), encoding="utf-8")
+    assert read_manifest("T1", root=tmp_path) == view
+
+
+def test_diff_groups_executed_skipped_and_pending_steps():
+    manifest = {
+        "plan": [s.to_dict() for s in PLAN],
+        "executed": [
+            {"description": "Banner", "status": "ok", "meta": {"duration_ms": 1.5}},
+            {"description": "Health", "status": "failed(status=503)", "meta": {"duration_ms": 2.0}},
+            {"description": "Status", "status": "skipped", "stderr": "blocked: dependency failed"},
+            # Results past the end of the plan are not part of it
+            {"description": "Extra", "status": "ok", "meta": {"duration_ms": 99.0}},
+        ],
+    }
+    # One planned step with no result yet
+    manifest["executed"] = manifest["executed"][:3] + [None] + manifest["executed"][3:]
+    diff = manifest_diff(manifest)
+    assert [(e["index"], e["status"]) for e in diff["executed"]] == [(0, "ok"), (1, "failed(status=503)")]
+    assert diff["executed"][0] == {"index": 0, "description": "Banner", "command": "shell", "status": "ok", "duration_ms": 1.5}
+    assert [(e["index"], e["reason"]) for e in diff["skipped"]] == [(2, "blocked: dependency failed")]
+    assert [(e["index"], e["description"], e["command"]) for e in diff["pending"]] == [(3, "Explain", None)]
+    assert diff["totals"] == {"planned": 4, "executed": 2, "failed": 1, "skipped": 1, "pending": 1, "duration_ms": 3.5}
+    # A plan with fewer results than steps, or none at all
+    assert manifest_diff({"plan": manifest["plan"]})["totals"]["pending"] == 4
+    assert manifest_diff({})["totals"]["planned"] == 0
@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import pytest
+
+from agent.core import memory
+from agent.core.memory import ConversationTurn, SessionMemory
+from agent.core.reasoner import LLMReasoner
+
+
+@pytest.fixture(autouse=True)
+def sessions(tmp_path: Path, monkeypatch) -> Path:
+    monkeypatch.setattr(memory, "SESSIONS_DIR", tmp_path)
+    return tmp_path
+
+
+def _turn(i: int, role: str = "user") -> ConversationTurn:
+    return ConversationTurn(role, f"message {i}", f"2026-01-01 00:00:{i % 60:02d}Z")
+
+
+def _fill(mem: SessionMemory, n: int, start: int = 0) -> None:
+    for i in range(start, start + n):
+        mem.record_turn(_turn(i))
+
+
+def test_window_keeps_the_newest_turns_and_archives_the_rest():
+    mem = SessionMemory("T1", window=5)
+    _fill(mem, 12)
+    assert [t.content for t in mem.turns] == [f"message {i}" for i in range(7, 12)]
+    assert mem.archived == 7
+    assert [t.content for t in mem.page(0, 100)] == [f"message {i}" for i in range(7)]
+    assert len(mem.archive_path.read_text(encoding="utf-8").splitlines()) == 7
+
+
+def test_page_seeks_through_the_sparse_index(monkeypatch):
+    monkeypatch.setattr(memory, "INDEX_STRIDE", 4)
+    mem = SessionMemory("T1", window=3)
+    _fill(mem, 40)
+    assert mem.archived == 37 and len(mem._index) == 10
+    expected = [f"message {i}" for i in range(37)]
+    for offset in (0, 3, 4, 5, 15, 36):
+        for limit in (1, 4, 9, 50):
+            assert [t.content for t in mem.page(offset, limit)] == expected[offset:offset + limit], (offset, limit)
+    assert mem.page(37) == [] and mem.page(0, 0) == []
+
+
+def test_evicted_turns_are_compacted_into_bounded_summaries():
+    batches = []
+
+    def summarizer(turns):
+        batches.append([t.content for t in turns])
+        return f"{len(turns)} turns from {turns[0].content}"
+
+    mem = SessionMemory("T1", window=2, summarizer=summarizer, compact_batch=3, max_summaries=2)
+    _fill(mem, 2 + 3 * 4 + 1)
+    assert batches[0] == ["message 0", "message 1", "message 2"]
+    assert len(batches) == 4 and [t.content for t in mem._pending] == ["message 12"]
+    # Over the cap, the oldest summaries are merged
+    assert len(mem.summaries) == 2
+    assert mem.summaries[0] == "3 turns from message 0; 3 turns from message 3; 3 turns from message 6"
+    mem.summaries = ["x" * 500] * 3
+    mem.compact()
+    assert len(mem.summaries[0]) == 600 and mem._pending == []
+
+
+def test_resume_restores_window_summaries_and_archive(sessions: Path, monkeypatch):
+    monkeypatch.setattr(memory, "INDEX_STRIDE", 4)
+    mem = SessionMemory("T1", window=3, compact_batch=5)
+    _fill(mem, 20)
+    mem.persist_summary({"status": "Validated"})
+    assert json.loads((sessions / "T1" / "memory.json").read_text(encoding="utf-8"))["archived_turns"] == 17
+
+    again = SessionMemory("T1", window=3, compact_batch=5)
+    assert list(again.turns) == list(mem.turns)
+    assert again.summaries == mem.summaries and again._pending == mem._pending
+    assert (again.archived, again._index) == (mem.archived, mem._index)
+    assert again.page(9, 3) == mem.page(9, 3)
+    # Resuming twice replaces, never duplicates
+    again.resume()
+    assert list(again.turns) == list(mem.turns) and again.archived == 17
+
+
+def test_archive_changed_elsewhere_rebuilds_the_index(sessions: Path, monkeypatch):
+    monkeypatch.setattr(memory, "INDEX_STRIDE", 4)
+    mem = SessionMemory("T1", window=2)
+    _fill(mem, 10)
+    mem.persist_summary({})
+    with mem.archive_path.open("a", encoding="utf-8") as f:
+        f.write(json.dumps(_turn(99).to_dict()) + "\n")
+    again = SessionMemory("T1", window=2)
+    assert again.archived == 9 and len(again._index) == 3
+    assert again.page(8, 5)[0].content == "message 99"
+
+
+def test_memory_can_defer_loading_until_resume(sessions: Path):
+    mem = SessionMemory("T1", window=3)
+    _fill(mem, 2)
+    mem.persist_summary({})
+    lazy = SessionMemory("T1", window=3, resume=False)
+    assert not lazy.turns
+    lazy.resume()
+    assert [t.content for t in lazy.turns] == ["message 0", "message 1"]
+
+
+def test_context_is_bounded_and_prefers_the_newest_turns():
+    mem = SessionMemory("T1", window=20, compact_batch=5)
+    for i in range(60):
+        mem.record_turn(ConversationTurn("user", f"turn {i} " + "x" * 80))
+    context = mem.context(2000)
+    assert len(context) <= 2000
+    lines = context.splitlines()
+    assert lines[-1].startswith("user: turn 59 ")
+    assert any(line.startswith("earlier: ") for line in lines)
+    assert "turn 0 " not in "\n".join(line for line in lines if line.startswith("user: "))
+    assert SessionMemory("T2").context() == ""
+
+
+def test_reflect_stays_within_the_context_budget():
+    mem = SessionMemory("T1", window=50)
+    for i in range(200):
+        mem.record_turn(ConversationTurn("user", f"incident update {i} " + "y" * 200))
+    reasoner = LLMReasoner(max_context_chars=2000)
+    prefix = "Reasoned on domain=healthcare: "
+    out = reasoner.reflect("What changed?", domain="healthcare", memory=mem)
+    assert out.startswith(prefix) and out.endswith("\nWhat changed?")
+    assert len(out) - len(prefix) <= 2000
+    assert "incident update 199 " in out
+    # An oversized prompt keeps its newest text and leaves no room for context
+    out = reasoner.reflect("z" * 5000 + "END", memory=mem)
+    assert len(out) - len("Reasoned on domain=general: ") == 2000 and out.endswith("END")
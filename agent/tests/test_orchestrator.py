@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import shutil
+import uuid
+from pathlib import Path
+
+import pytest
+
+from agent.core.governor import ResourceGovernor
+from agent.core.latency import LatencyStore
+from agent.core.locking import LOCKS_DIR
+from agent.core.memory import SESSIONS_DIR
+from agent.core.orchestrator import FDEOrchestrator, OrchestratorConfig
+from agent.core.state_machine import StateLog
+from agent.tools.registry import ToolRegistry
+
+
+def _registry() -> ToolRegistry:
+    registry = ToolRegistry()
+    for name in ("shell", "http", "git"):
+        registry.register(name, "read", lambda step: {"status": "ok", "stdout": "done", "stderr": "", "meta": {"code": 0}})
+    return registry
+
+
+@pytest.fixture
+def orchestrator(tmp_path: Path):
+    ticket = f"test-orch-{uuid.uuid4().hex[:8]}"
+    orch = FDEOrchestrator(OrchestratorConfig(ticket_id=ticket), governor=ResourceGovernor(), registry=_registry(),
+                           state_log=StateLog(tmp_path / "transitions.jsonl"))
+    orch.latency = LatencyStore(tmp_path / "latency.json")
+    yield orch
+    shutil.rmtree(SESSIONS_DIR / ticket, ignore_errors=True)
+    (LOCKS_DIR / f"{ticket}.lock").unlink(missing_ok=True)
+
+
+@pytest.mark.parametrize("use_async", [False, True])
+def test_run_task_summary_is_plain_json(orchestrator: FDEOrchestrator, use_async: bool):
+    task = "Sync patient records"
+    summary = asyncio.run(orchestrator.run_task_async(task)) if use_async else orchestrator.run_task(task)
+    assert summary["plan"] and summary["executed"]
+    assert all(type(p) is dict for p in summary["plan"])
+    assert all(type(r) is dict for r in summary["executed"])
+    assert json.loads(json.dumps(summary)) == summary
+    assert summary["run_id"] == orchestrator.run_id
+    persisted = json.loads((SESSIONS_DIR / orchestrator.config.ticket_id / "summary.json").read_text(encoding="utf-8"))
+    assert persisted["executed"] == summary["executed"]
+
+
+def test_fedramp_task_without_a_target_is_not_blocked_by_fips(orchestrator: FDEOrchestrator):
+    summary = orchestrator.run_task("prepare fedramp rollout")
+    fips = [c for c in summary["preflight"]["checks"] if c["probe"] == "fips_mode"]
+    assert [c["status"] for c in fips] == ["manual"]
+    assert summary["preflight"]["ok"]
+    assert summary["status"] == "Validated"
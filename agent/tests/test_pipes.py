@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+import hashlib
+from pathlib import Path
+
+import pytest
+
+from agent.core.planner import PlanStep
+from agent.tools.pipes import PREFIX_BYTES
+from agent.tools.registry import default_registry
+
+
+@pytest.mark.parametrize("use_async", [False, True])
+@pytest.mark.parametrize("max_parallel", [1, 3])
+def test_shell_output_is_piped_into_the_next_step(tmp_path: Path, make_executor, run_steps, use_async: bool, max_parallel: int):
+    steps = [
+        PlanStep("produce", "shell", "printf 'a\\nb\\nc\\n'"),
+        PlanStep("unrelated", "shell", "echo hi"),
+        PlanStep("count", "shell", "wc -l", input_from=0),
+    ]
+    producer, _, consumer = run_steps(make_executor(max_parallel=max_parallel), steps, use_async)
+    path = str(tmp_path / "pipes" / "step-0.out")
+    assert (producer.status, producer.stdout) == ("ok", "a\nb\nc\n")
+    assert producer.meta["pipe"] == {"path": path, "bytes": 6, "sha256": hashlib.sha256(b"a\nb\nc\n").hexdigest()}
+    assert (consumer.status, consumer.stdout.strip()) == ("ok", "3")
+    assert consumer.meta["input"] == {"from": 0, "path": path}
+    # Only steps something reads from get a pipe file
+    assert sorted(p.name for p in (tmp_path / "pipes").iterdir()) == ["step-0.out"]
+
+
+@pytest.mark.parametrize("use_async", [False, True])
+def test_large_output_keeps_exact_bytes_and_a_redacted_prefix(tmp_path: Path, make_executor, run_steps, use_async: bool):
+    size = 4 * PREFIX_BYTES
+    steps = [
+        PlanStep("produce", "shell", f"echo 'password = hunter2hunter2'; head -c {size} /dev/zero | tr '\\0' x"),
+        PlanStep("count", "shell", "wc -c", input_from=0),
+        PlanStep("find secret", "shell", "grep -c hunter2hunter2", input_from=0),
+    ]
+    producer, count, grep = run_steps(make_executor(), steps, use_async)
+    data = (tmp_path / "pipes" / "step-0.out").read_bytes()
+    assert producer.meta["pipe"]["bytes"] == len(data) == size + len("password = hunter2hunter2\n")
+    assert producer.meta["truncated"] and len(producer.stdout) < len(data)
+    assert "hunter2" not in producer.stdout and producer.meta["redacted"]
+    # The consumer reads the unredacted file, not the step's stdout
+    assert int(count.stdout) == len(data)
+    assert grep.stdout.strip() == "1"
+
+
+def test_git_output_is_piped_into_shell(make_executor):
+    steps = [PlanStep("head", "git", ["rev-parse", "HEAD"]), PlanStep("length", "shell", "wc -c", input_from=0)]
+    head, length = make_executor().execute(steps)
+    assert head.status == "ok" and head.meta["pipe"]["bytes"] == 41
+    assert length.stdout.strip() == "41"
+
+
+@pytest.mark.parametrize("use_async", [False, True])
+def test_tools_without_pipe_support_hand_over_their_stdout(make_executor, run_steps, use_async: bool):
+    registry = default_registry(ticket_id="test-pipes")
+    registry.register("greet", "read", lambda step: {"status": "ok", "stdout": f"hello {step.args}", "stderr": ""})
+    steps = [PlanStep("greet", "greet", "world"), PlanStep("shout", "shell", "tr a-z A-Z", input_from=0)]
+    greet, shout = run_steps(make_executor(registry), steps, use_async)
+    assert greet.meta["pipe"]["sha256"] == hashlib.sha256(b"hello world").hexdigest()
+    assert shout.stdout == "HELLO WORLD"
+
+
+@pytest.mark.parametrize("use_async", [False, True])
+def test_stale_pipe_files_never_feed_a_run(tmp_path: Path, make_executor, run_steps, use_async: bool):
+    stale = tmp_path / "pipes" / "step-0.out"
+    stale.parent.mkdir()
+    stale.write_text("left over from an earlier run")
+    # The producer is prose, so it never writes its pipe file
+    steps = [PlanStep("explain"), PlanStep("consume", "shell", "cat", input_from=0)]
+    _, consumer = run_steps(make_executor(), steps, use_async)
+    assert (consumer.status, consumer.stderr) == ("skipped", "blocked: no output from step 0")
+    assert not stale.exists()
+
+
+@pytest.mark.parametrize("use_async", [False, True])
+def test_consumers_of_failed_or_later_steps_are_blocked(make_executor, run_steps, use_async: bool):
+    steps = [
+        PlanStep("fail", "shell", "echo partial; exit 1"),
+        PlanStep("after failure", "shell", "cat", input_from=0),
+        PlanStep("from the future", "shell", "cat", input_from=3),
+        PlanStep("produce", "shell", "echo late"),
+    ]
+    fail, after, future, late = run_steps(make_executor(), steps, use_async)
+    assert fail.status == "failed(code=1)"
+    assert after.status == "skipped" and after.stderr.startswith("blocked:")
+    assert (future.status, future.stderr) == ("skipped", "blocked: no output from step 3")
+    # A later step read by nobody earlier is not a producer
+    assert late.status == "ok" and "pipe" not in late.meta
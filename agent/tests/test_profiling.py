@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+import asyncio
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+
+from agent import fde_runner
+from agent.core.planner import PlanStep
+from agent.core.profiling import Profiler
+from agent.tools.registry import ToolRegistry
+
+
+def test_sampler_survives_worker_threads_entering_and_leaving_phases(tmp_path: Path):
+    profiler = Profiler("sample", interval=0.0002)
+
+    def work(_):
+        for _ in range(200):
+            with profiler.phase("step", snapshot=False):
+                with profiler.phase("tool:shell", snapshot=False):
+                    time.sleep(0)
+
+    try:
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            list(pool.map(work, range(8)))
+        assert profiler._sampler.is_alive()
+    finally:
+        summary = profiler.finish(out_dir=tmp_path)
+    assert summary["phases"]["step"]["calls"] == 1600
+    assert summary["phases"]["tool:shell"]["calls"] == 1600
+    assert profiler._stacks == {}
+
+
+def test_profile_is_rejected_with_batch(monkeypatch, capsys):
+    monkeypatch.setattr(sys, "argv", ["fde_runner", "--batch", "tasks.json", "--profile"])
+    with pytest.raises(SystemExit) as exit_info:
+        fde_runner.main()
+    assert exit_info.value.code == 2
+    assert "--batch" in capsys.readouterr().err
+
+
+def test_async_runs_profile_tool_calls(tmp_path: Path, make_executor, run_steps):
+    async def nap(step):
+        await asyncio.sleep(0.02)
+        return {"status": "ok", "stdout": "", "stderr": ""}
+
+    registry = ToolRegistry()
+    registry.register("nap", "read", lambda step: {"status": "ok", "stdout": "", "stderr": ""}, async_handler=nap)
+    registry.register("spin", "read", lambda step: {"status": "ok", "stdout": str(sum(range(10000))), "stderr": ""})
+    profiler = Profiler("sample", interval=0.001)
+    executor = make_executor(registry, max_parallel=4, profiler=profiler)
+    steps = [PlanStep(f"nap {i}", "nap") for i in range(3)] + [PlanStep(f"spin {i}", "spin") for i in range(3)]
+    try:
+        assert all(r.status == "ok" for r in run_steps(executor, steps, use_async=True))
+    finally:
+        summary = profiler.finish(out_dir=tmp_path)
+    assert summary["phases"]["tool:nap"]["calls"] == 3
+    assert summary["phases"]["tool:nap"]["max_ms"] >= 20
+    # Sync tools run on worker threads, inside a regular phase
+    assert summary["phases"]["tool:spin"]["calls"] == 3
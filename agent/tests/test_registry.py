@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from agent.core.planner import PlanStep
+from agent.tools.base import BaseTool
+from agent.tools.registry import ToolCapabilities, ToolRegistry, default_registry
+
+
+class EchoTool(BaseTool):
+    name = "echo"
+    permission = "read"
+    capabilities = ToolCapabilities(max_concurrency=2, idempotent=True, timeout=5, retries=2)
+
+    def run(self, args=None) -> dict:
+        return {"status": "ok", "stdout": str(args), "stderr": "", "meta": {"tool": self.name}}
+
+
+class Flaky:
+    """Handler that fails with ``status`` the first ``failures`` calls."""
+
+    def __init__(self, failures: int, status: str = "failed(timeout)"):
+        self.failures = failures
+        self.status = status
+        self.calls = 0
+
+    def __call__(self, step) -> dict:
+        self.calls += 1
+        if self.calls <= self.failures:
+            return {"status": self.status, "stdout": "", "stderr": "try again"}
+        return {"status": "ok", "stdout": "done", "stderr": ""}
+
+
+def test_register_tool_uses_declared_name_permission_and_capabilities():
+    registry = ToolRegistry()
+    registry.register_tool(EchoTool())
+    reg = registry.get("echo")
+    assert reg.permission == "read"
+    assert reg.capabilities.retries == 2 and reg.capabilities.idempotent
+    assert reg.async_handler is not None
+    assert "echo" in registry and registry.names() == ["echo"]
+    assert registry.lookup(None) is None and registry.lookup("missing") is None
+
+
+def test_default_registry_has_the_builtin_tools():
+    registry = default_registry(ticket_id="test-registry")
+    assert {"shell", "http", "git"} <= set(registry.names())
+    assert registry.get("shell").permission == "exec"
+
+
+@pytest.mark.parametrize("use_async", [False, True])
+def test_executor_dispatches_through_the_registry(make_executor, use_async: bool):
+    registry = ToolRegistry()
+    registry.register_tool(EchoTool())
+    executor = make_executor(registry)
+    step = PlanStep("say hi", "echo", "hi")
+    result = asyncio.run(executor.execute_step_async(step)) if use_async else executor.execute_step(step)
+    assert (result.status, result.stdout) == ("ok", "hi")
+    assert result.meta["tool"] == "echo" and "duration_ms" in result.meta
+
+
+def test_new_tool_types_only_need_registering(make_executor):
+    registry = default_registry(ticket_id="test-registry")
+    registry.register("upper", "read", lambda step: {"status": "ok", "stdout": str(step.args).upper(), "stderr": ""})
+    results = make_executor(registry).execute([PlanStep("shout", "upper", "hey"), PlanStep("shell", "shell", "echo hi")])
+    assert [(r.status, r.stdout.strip()) for r in results] == [("ok", "HEY"), ("ok", "hi")]
+
+
+def test_unknown_and_non_executable_steps_are_skipped(make_executor):
+    results = make_executor(ToolRegistry()).execute([PlanStep("note"), PlanStep("mystery", "teleport", "x")])
+    assert [(r.status, r.stderr) for r in results] == [("skipped", "non-executable step"), ("skipped", "Unknown command: teleport")]
+
+
+@pytest.mark.parametrize("idempotent,failures,status,calls,final", [
+    # Idempotent tools get capabilities.retries extra attempts on transient failures
+    (True, 2, "failed(timeout)", 3, "ok"),
+    (True, 5, "failed(exception)", 3, "failed(exception)"),
+    # Non-idempotent tools and real answers are never retried
+    (False, 1, "failed(timeout)", 1, "failed(timeout)"),
+    (True, 1, "failed(code=1)", 1, "failed(code=1)"),
+])
+def test_retries_follow_capabilities(make_executor, idempotent: bool, failures: int, status: str, calls: int, final: str):
+    handler = Flaky(failures, status)
+    registry = ToolRegistry()
+    registry.register("flaky", "read", handler, ToolCapabilities(idempotent=idempotent, retries=2))
+    result = make_executor(registry).execute_step(PlanStep("flaky", "flaky"))
+    assert handler.calls == calls
+    assert result.status == final
+    assert result.meta.get("attempts", 1) == calls
+
+
+def test_handler_exceptions_become_failed_results(make_executor):
+    def boom(step):
+        raise RuntimeError("no route to host")
+
+    registry = ToolRegistry()
+    registry.register("boom", "read", boom)
+    result = make_executor(registry).execute_step(PlanStep("boom", "boom"))
+    assert (result.status, result.stderr) == ("failed(exception)", "no route to host")
@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+import asyncio
+import time
+
+import pytest
+
+from agent.core.latency import _measured_ms
+from agent.core.memory import SESSIONS_DIR
+from agent.core.planner import PlanStep
+from agent.core.simulation import LatencyModel, SimProfile, simulated_registry
+from agent.tests import load_sim
+
+FAST = {name: SimProfile(LatencyModel("fixed", median_ms=1.0)) for name in ("shell", "http", "git")}
+
+
+def _call(registry, name: str) -> dict:
+    return registry.get(name).handler(PlanStep(name, name))
+
+
+def test_simulated_tools_fail_like_the_real_ones():
+    broken = {name: SimProfile(LatencyModel("fixed", median_ms=0.0), error_rate=1.0) for name in ("shell", "http", "git")}
+    registry = simulated_registry(broken, seed=1)
+    assert [_call(registry, n)["status"] for n in ("shell", "http", "git")] == ["failed(code=1)", "failed(status=503)", "failed(code=1)"]
+    # A simulated timeout holds its slot for the tool's whole timeout
+    hung = simulated_registry({"http": SimProfile(LatencyModel("fixed", median_ms=0.0), timeout_rate=1.0, timeout=0.05)})
+    start = time.perf_counter()
+    res = _call(hung, "http")
+    assert res["status"] == "failed(timeout)" and time.perf_counter() - start >= 0.05
+
+
+def test_simulated_latency_and_output_follow_the_profile():
+    registry = simulated_registry({"git": SimProfile(LatencyModel("fixed", median_ms=5.0), output_bytes=10)})
+    res = asyncio.run(registry.get("git").async_handler(PlanStep("status", "git")))
+    assert res == {"status": "ok", "stdout": "x" * 10, "stderr": "", "meta": {"simulated": True, "latency_ms": 5.0}}
+    # Same seed, same draws
+    jittery = {"shell": SimProfile(LatencyModel("lognormal", median_ms=0.1, sigma=1.0))}
+
+    def draws(seed: int) -> list:
+        registry = simulated_registry(jittery, seed=seed)
+        return [_call(registry, "shell")["meta"]["latency_ms"] for _ in range(5)]
+
+    assert draws(7) == draws(7) != draws(8)
+
+
+@pytest.mark.parametrize("use_async", [False, True])
+def test_load_sim_completes_simulated_tickets(use_async: bool):
+    report = load_sim.run(tickets=6, concurrency=3, profiles=FAST, seed=1, limits=False, use_async=use_async)
+    assert report["ticket_status"] == {"Validated": 6}
+    assert report["step_status"] == {"ok": 30}
+    assert set(report["step_latency_ms"]) == {"shell", "http", "git"}
+    assert report["step_latency_ms"]["http"]["p50"] == 1.0
+    assert report["ticket_latency_ms"]["p50"] > 0
+    # Synthetic tickets leave nothing behind
+    assert not list(SESSIONS_DIR.glob("sim-*"))
+
+
+@pytest.mark.parametrize("use_async", [False, True])
+def test_load_sim_cancellation(use_async: bool):
+    slow = {name: SimProfile(LatencyModel("fixed", median_ms=40.0)) for name in ("shell", "http", "git")}
+    report = load_sim.run(tickets=8, concurrency=2, profiles=slow, limits=False, cancel_after=0.06, use_async=use_async)
+    assert sum(report["ticket_status"].values()) == 8
+    assert report["ticket_status"].get("Cancelled", 0) >= 6
+    # Tickets that were running skip their remaining steps
+    assert report["step_status"].get("skipped(cancelled)", 0) > 0
+
+
+def test_simulated_calls_stay_out_of_the_latency_history(make_executor):
+    executor = make_executor(simulated_registry(FAST))
+    result = executor.execute_step(PlanStep("banner", "shell", "echo hi"))
+    assert result.status == "ok" and "duration_ms" in result.meta
+    assert _measured_ms(result) is None
@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import pytest
+
+from agent.core import state_machine
+from agent.core.state_machine import TRANSITIONS, DeploymentState, DeploymentStateMachine, StateEvent, StateLog
+
+S = DeploymentState
+
+
+@pytest.fixture
+def log(tmp_path: Path) -> StateLog:
+    return StateLog(tmp_path / "transitions.jsonl")
+
+
+@pytest.mark.parametrize("source", list(S))
+@pytest.mark.parametrize("target", list(S))
+def test_transition_table_is_enforced(log: StateLog, source: DeploymentState, target: DeploymentState):
+    if source is not S.Idle:
+        log.append(StateEvent("T1", S.Idle.name, source.name, 1.0))
+    machine = DeploymentStateMachine("T1", log)
+    if target in TRANSITIONS[source]:
+        machine.set_state(target, "test")
+        assert machine.current_state is target
+    else:
+        with pytest.raises(ValueError, match=f"invalid transition {source.name} -> {target.name}"):
+            machine.set_state(target)
+        assert machine.current_state is source
+
+
+def test_every_state_can_get_back_to_idle():
+    for state in S:
+        seen, frontier = {state}, [state]
+        while frontier:
+            for nxt in TRANSITIONS[frontier.pop()]:
+                if nxt not in seen:
+                    seen.add(nxt)
+                    frontier.append(nxt)
+        assert S.Idle in seen, state
+
+
+def test_logs_share_state_and_stuck_lists_oldest_first(log: StateLog):
+    other = StateLog(log.path)
+    for ticket, at in (("A", 100.0), ("B", 200.0), ("C", 290.0)):
+        log.append(StateEvent(ticket, "Idle", "Planning", at))
+    log.append(StateEvent("B", "Planning", "Executing", 250.0))
+    other.refresh()
+    assert other.state_of("B") is S.Executing
+    assert other.tickets_in(S.Planning) == ["A", "C"]
+    assert other.counts() == {"Planning": 2, "Executing": 1}
+    stuck = other.stuck(older_than=30, now=300.0)
+    assert [(t, s) for t, s, _ in stuck] == [("A", S.Planning), ("B", S.Executing)]
+    assert [e.target for e in other.history("B")] == ["Planning", "Executing"]
+
+
+def test_new_log_replays_only_lines_after_the_snapshot(log: StateLog, monkeypatch):
+    monkeypatch.setattr(state_machine, "SNAPSHOT_EVERY", 10)
+    for i in range(25):
+        log.append(StateEvent(f"T{i % 5}", "Idle", "Planning" if i < 20 else "Executing", float(i)))
+    snapshot = json.loads(log.snapshot_path.read_text(encoding="utf-8"))
+    assert snapshot["offset"] < log.path.stat().st_size
+
+    parsed = []
+    real = StateEvent.from_dict
+    monkeypatch.setattr(StateEvent, "from_dict", classmethod(lambda cls, d: parsed.append(d) or real(d)))
+    fresh = StateLog(log.path)
+    assert len(parsed) == 5
+    assert fresh.current == log.current
+    assert {s: list(t) for s, t in fresh.by_state.items()} == {s: list(t) for s, t in log.by_state.items()}
+
+
+def test_snapshot_of_another_log_is_ignored(log: StateLog, monkeypatch):
+    monkeypatch.setattr(state_machine, "SNAPSHOT_EVERY", 2)
+    for i in range(4):
+        log.append(StateEvent(f"T{i}", "Idle", "Planning", float(i)))
+    # The log is replaced by a shorter one; the snapshot no longer lines up with it
+    log.path.write_text(json.dumps({"ticket_id": "X", "source": "Idle", "target": "Planning", "at": 1.0}) + "\n", encoding="utf-8")
+    fresh = StateLog(log.path)
+    assert list(fresh.current) == ["X"]
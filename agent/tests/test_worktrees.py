@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+
+from agent.tools.git_ops import GitTool
+from agent.tools.worktrees import WorktreePool, release_worktrees
+
+
+def _git(cwd: Path, *args: str) -> str:
+    return subprocess.run(["git", "-c", "user.name=t", "-c", "user.email=t@example.com", *args],
+                          cwd=str(cwd), check=True, capture_output=True, text=True).stdout.strip()
+
+
+@pytest.fixture
+def repo(tmp_path: Path) -> Path:
+    repo = tmp_path / "repo"
+    repo.mkdir()
+    _git(repo, "init", "-q")
+    (repo / "README.md").write_text("hello\n", encoding="utf-8")
+    _git(repo, "add", "README.md")
+    _git(repo, "commit", "-q", "-m", "init")
+    return repo
+
+
+def test_concurrent_leases_for_one_ticket_share_a_ready_checkout(repo: Path, tmp_path: Path):
+    pool = WorktreePool(repo, root=tmp_path / "pool")
+    with ThreadPoolExecutor(max_workers=8) as workers:
+        paths = list(workers.map(lambda _: pool.lease("T1"), range(8)))
+    assert len(set(paths)) == 1
+    # Every caller got the path only once the checkout existed
+    assert (paths[0] / "README.md").read_text(encoding="utf-8") == "hello\n"
+    pool.release("T1")
+    assert pool.leased() == {}
+
+
+def test_tickets_get_separate_worktrees_and_reuse_released_ones(repo: Path, tmp_path: Path):
+    pool = WorktreePool(repo, root=tmp_path / "pool")
+    with ThreadPoolExecutor(max_workers=4) as workers:
+        paths = dict(zip("ABCD", workers.map(pool.lease, "ABCD")))
+    assert len(set(paths.values())) == 4
+    (paths["A"] / "scratch.txt").write_text("x", encoding="utf-8")
+    pool.release("A")
+    reused = pool.lease("E")
+    assert reused == paths["A"]
+    # Released worktrees come back cleaned
+    assert not (reused / "scratch.txt").exists()
+    for t in "BCDE":
+        pool.release(t)
+
+
+def test_failed_checkout_is_reported_to_waiting_callers(tmp_path: Path):
+    repo = tmp_path / "empty"
+    repo.mkdir()
+    _git(repo, "init", "-q")
+    pool = WorktreePool(repo, root=tmp_path / "pool")
+    # No commits: HEAD cannot be resolved, so every caller must see the failure
+    with ThreadPoolExecutor(max_workers=4) as workers:
+        futures = [workers.submit(pool.lease, "T1") for _ in range(4)]
+    for f in futures:
+        with pytest.raises(RuntimeError):
+            f.result()
+    assert pool.leased() == {}
+
+
+def test_pool_lives_under_the_git_dir(repo: Path):
+    pool = WorktreePool(repo)
+    assert pool.root == (repo / ".git" / "fde-worktrees").resolve()
+    path = pool.lease("T1")
+    try:
+        assert _git(repo, "status", "--porcelain", "--ignored") == ""
+    finally:
+        pool.release("T1")
+    assert path.parent == pool.root
+
+
+def test_git_steps_see_the_users_checkout_unless_worktrees_are_on(repo: Path):
+    (repo / "README.md").write_text("changed\n", encoding="utf-8")
+    plain = GitTool(ticket_id="T1", repo=str(repo)).run(["status", "--porcelain"])
+    assert plain["stdout"].strip() == "M README.md"
+    assert "worktree" not in (plain.get("meta") or {})
+
+    pooled = GitTool(ticket_id="T2", repo=str(repo), worktrees=True).run(["status", "--porcelain"])
+    try:
+        assert pooled["status"] == "ok" and pooled["stdout"] == ""
+        assert Path(pooled["meta"]["worktree"]).is_relative_to((repo / ".git").resolve())
+    finally:
+        release_worktrees("T2")
@@ -2,3 +2,5 @@ from .base import BaseTool, ToolResult
 from .shell import ShellTool
 from .http_client import HttpTool
 from .git_ops import GitTool
+from .registry import ToolRegistry, ToolRegistration, ToolCapabilities, default_registry
+from .redaction import Redactor, redact
@@ -1,10 +1,13 @@
 from __future__ import annotations
 
+import asyncio
 from dataclasses import dataclass
 from typing import Any, Optional
 
+from .registry import ToolCapabilities
 
-@dataclass
+
+@dataclass(slots=True)
 class ToolResult:
     status: str
     stdout: str = ""
@@ -12,13 +15,26 @@ class ToolResult:
 
 
 class BaseTool:
-    def __init__(self, ticket_id: Optional[str] = None, audit_log: Optional[str] = None):
+    name: str = ""
+    permission: str = ""
+    capabilities: ToolCapabilities = ToolCapabilities()
+
+    def __init__(self, ticket_id: Optional[str] = None, audit_log: Optional[str] = None, cwd: Optional[str] = None):
         self.ticket_id = ticket_id
         self.audit_log = audit_log
+        self.cwd = cwd
 
     def _record(self, entry: dict[str, Any]) -> None:
         # In production, append to audit log; here it's a no-op
         pass
 
     def run(self, *args, **kwargs) -> dict:
-        raise NotImplementedError
\ No newline at end of file
+        raise NotImplementedError
+
+    def invoke(self, step: Any) -> dict:
+        """Registry entry point: map a plan step onto this tool's call signature."""
+        return self.run(step.args)
+
+    async def invoke_async(self, step: Any) -> dict:
+        """Coroutine entry point; tools without native async I/O run invoke() on a thread."""
+        return await asyncio.to_thread(self.invoke, step)
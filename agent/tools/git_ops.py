@@ -1,18 +1,89 @@
 from __future__ import annotations
 
+import asyncio
 import subprocess
-from typing import Optional, List
+from pathlib import Path
+from typing import Any, Optional, List
 
 from .base import BaseTool
+from .pipes import pipe_files, piped_output
+from .redaction import redact_output
+from .registry import ToolCapabilities
+from .shell import communicate
+from .worktrees import pool_for
 
 
 class GitTool(BaseTool):
-    def run(self, args: Optional[List[str]] = None) -> dict:
+    """Runs git in the repository, or in the ticket's own leased worktree of it.
+
+    ``worktrees`` is off by default, so git steps see the user's working tree.
+    With it on (the fleet's default) and a ticket id, concurrent tickets never
+    share a working tree or index lock. Each worktree is a detached checkout
+    of HEAD, and uncommitted changes and detached commits are discarded when
+    the orchestrator returns the lease.
+    """
+    name = "git"
+    permission = "vcs"
+    capabilities = ToolCapabilities(max_concurrency=4, idempotent=False, timeout=120)
+
+    def __init__(self, ticket_id: Optional[str] = None, audit_log: Optional[str] = None, cwd: Optional[str] = None,
+                 repo: Optional[str] = None, worktrees: bool = False):
+        super().__init__(ticket_id=ticket_id, audit_log=audit_log, cwd=cwd)
+        self.repo = repo
+        self.worktrees = worktrees
+
+    def _checkout(self) -> Optional[Path]:
+        if not (self.ticket_id and self.worktrees):
+            return None
+        pool = pool_for(Path(self.repo or Path.cwd()))
+        return pool.lease(self.ticket_id) if pool else None
+
+    def run(self, args: Optional[List[str]] = None, timeout: Optional[float] = None,
+            stdin: Optional[str] = None, stdout: Optional[str] = None) -> dict:
         if not args:
             return {"status": "skipped", "stdout": "", "stderr": "no git args provided"}
         try:
-            proc = subprocess.run(["git", *args], capture_output=True, text=True)
+            worktree = self._checkout()
+        except Exception as e:
+            return {"status": "failed(worktree)", "stdout": "", "stderr": str(e)}
+        cwd = str(worktree) if worktree else self.repo
+        try:
+            with pipe_files(stdin, stdout) as (fin, fout):
+                proc = subprocess.run(["git", *args], cwd=cwd, stdin=fin, stdout=fout or subprocess.PIPE, stderr=subprocess.PIPE,
+                                      timeout=timeout or self.capabilities.timeout)
             status = "ok" if proc.returncode == 0 else f"failed(code={proc.returncode})"
-            return {"status": status, "stdout": proc.stdout, "stderr": proc.stderr}
+            res = piped_output(status, stdout, proc.stderr) if stdout else redact_output(status, proc.stdout, proc.stderr)
+            if worktree:
+                res["meta"] = dict(res.get("meta") or {}, worktree=str(worktree))
+            return res
+        except subprocess.TimeoutExpired as e:
+            return {"status": "failed(timeout)", "stdout": "", "stderr": f"timed out after {e.timeout}s"}
+        except Exception as e:
+            return {"status": "failed(exception)", "stdout": "", "stderr": str(e)}
+
+    async def run_async(self, args: Optional[List[str]] = None, timeout: Optional[float] = None,
+                        stdin: Optional[str] = None, stdout: Optional[str] = None) -> dict:
+        if not args:
+            return {"status": "skipped", "stdout": "", "stderr": "no git args provided"}
+        try:
+            # Leasing may create or reset a worktree, which is slow blocking git work
+            worktree = await asyncio.to_thread(self._checkout)
+        except Exception as e:
+            return {"status": "failed(worktree)", "stdout": "", "stderr": str(e)}
+        cwd = str(worktree) if worktree else self.repo
+        try:
+            with pipe_files(stdin, stdout) as (fin, fout):
+                proc = await asyncio.create_subprocess_exec("git", *args, cwd=cwd, stdin=fin, stdout=fout or asyncio.subprocess.PIPE,
+                                                            stderr=asyncio.subprocess.PIPE)
+                res = await communicate(proc, timeout or self.capabilities.timeout, stdout)
         except Exception as e:
             return {"status": "failed(exception)", "stdout": "", "stderr": str(e)}
+        if worktree and res["status"] != "failed(timeout)":
+            res["meta"] = dict(res.get("meta") or {}, worktree=str(worktree))
+        return res
+
+    def invoke(self, step: Any) -> dict:
+        return self.run(step.args, stdin=step.stdin_path, stdout=step.stdout_path)
+
+    async def invoke_async(self, step: Any) -> dict:
+        return await self.run_async(step.args, stdin=step.stdin_path, stdout=step.stdout_path)
@@ -1,23 +1,194 @@
 from __future__ import annotations
 
+import asyncio
+import hashlib
+import os
+import tempfile
 import requests
-from typing import Optional, Any
+from pathlib import Path
+from typing import Any, BinaryIO, Optional
 
 from .base import BaseTool
+from .json_stream import StreamingJsonCheck
+from .pipes import pipe_files, pipe_meta
+from .redaction import Redactor, redact
+from .registry import ToolCapabilities
+
+try:
+    import httpx
+except ImportError:  # optional: async requests fall back to a thread
+    httpx = None
+
+ARTIFACTS_DIR = Path(__file__).resolve().parent.parent / "artifacts"
 
 
 class HttpTool(BaseTool):
-    def request(self, method: str = "GET", url: Optional[str] = None, data: Optional[Any] = None) -> dict:
+    name = "http"
+    permission = "network"
+    capabilities = ToolCapabilities(max_concurrency=16, idempotent=False, timeout=10)
+    # Only about this much of the body is kept in stdout, redacted; the rest is hashed (and spooled on request)
+    body_prefix_bytes = 64 * 1024
+    chunk_size = 64 * 1024
+
+    def __init__(self, ticket_id: Optional[str] = None, audit_log: Optional[str] = None, cwd: Optional[str] = None,
+                 body_prefix_bytes: Optional[int] = None, spool_dir: Optional[Path] = None):
+        super().__init__(ticket_id=ticket_id, audit_log=audit_log, cwd=cwd)
+        if body_prefix_bytes is not None:
+            self.body_prefix_bytes = body_prefix_bytes
+        self.spool_dir = Path(spool_dir) if spool_dir else ARTIFACTS_DIR / (ticket_id or "default") / "spool"
+
+    def request(self, method: str = "GET", url: Optional[str] = None, data: Optional[Any] = None, timeout: Optional[float] = None,
+                schema: Optional[dict] = None, spool: bool = False, stdin: Optional[str] = None, stdout: Optional[str] = None) -> dict:
+        """One request; ``stdin`` is a pipe file streamed as the body instead of ``data``, ``stdout`` receives the full response body."""
+        if not url:
+            return {"status": "skipped", "stdout": "", "stderr": "no url provided"}
+        try:
+            with pipe_files(stdin, stdout) as (fin, fout):
+                payload = {"data": fin} if fin else {"json": data}
+                resp = requests.request(method=method, url=url, timeout=timeout or self.capabilities.timeout, stream=True, **payload)
+                with resp:
+                    return self._consume(resp, method, url, schema, spool, fout)
+        except requests.Timeout as e:
+            return {"status": "failed(timeout)", "stdout": "", "stderr": redact(str(e))}
+        except Exception as e:
+            return {"status": "failed(exception)", "stdout": "", "stderr": redact(str(e))}
+
+    def _consume(self, resp: requests.Response, method: str, url: str, schema: Optional[dict], spool: bool, pipe: Optional[BinaryIO]) -> dict:
+        """Stream the body once: keep a prefix, hash everything, optionally spool and pipe, check schema as bytes arrive."""
+        body = _Body(self, schema, spool, pipe)
+        try:
+            for chunk in resp.iter_content(chunk_size=self.chunk_size):
+                if body.feed(chunk):
+                    break
+        finally:
+            body.close()
+        return body.result(resp.status_code, resp.headers.get("Content-Type"), resp.encoding, method, url)
+
+    async def request_async(self, method: str = "GET", url: Optional[str] = None, data: Optional[Any] = None, timeout: Optional[float] = None,
+                            schema: Optional[dict] = None, spool: bool = False, stdin: Optional[str] = None, stdout: Optional[str] = None) -> dict:
+        """request() without blocking the event loop: native with httpx installed, otherwise on a thread."""
+        if httpx is None:
+            return await asyncio.to_thread(self.request, method, url, data, timeout, schema, spool, stdin, stdout)
         if not url:
             return {"status": "skipped", "stdout": "", "stderr": "no url provided"}
         try:
-            resp = requests.request(method=method, url=url, json=data, timeout=10)
-            status = "ok" if resp.status_code < 400 else f"failed(status={resp.status_code})"
-            return {
-                "status": status,
-                "stdout": resp.text,
-                "stderr": "",
-                "meta": {"status_code": resp.status_code, "url": url, "method": method.upper()},
-            }
+            with pipe_files(stdin, stdout) as (fin, fout):
+                payload = {"content": _read_chunks(fin, self.chunk_size)} if fin else {"json": data}
+                async with httpx.AsyncClient(timeout=timeout or self.capabilities.timeout) as client:
+                    async with client.stream(method, url, **payload) as resp:
+                        body = _Body(self, schema, spool, fout)
+                        try:
+                            async for chunk in resp.aiter_bytes(self.chunk_size):
+                                if body.feed(chunk):
+                                    break
+                        finally:
+                            body.close()
+                        return body.result(resp.status_code, resp.headers.get("Content-Type"), resp.encoding, method, url)
+        except httpx.TimeoutException as e:
+            return {"status": "failed(timeout)", "stdout": "", "stderr": redact(str(e))}
         except Exception as e:
-            return {"status": "failed(exception)", "stdout": "", "stderr": str(e)}
+            return {"status": "failed(exception)", "stdout": "", "stderr": redact(str(e))}
+
+    def invoke(self, step: Any) -> dict:
+        return self.request(method=step.method or "GET", url=step.url, data=step.args, schema=step.schema, spool=step.spool,
+                            stdin=step.stdin_path, stdout=step.stdout_path)
+
+    async def invoke_async(self, step: Any) -> dict:
+        return await self.request_async(method=step.method or "GET", url=step.url, data=step.args, schema=step.schema, spool=step.spool,
+                                        stdin=step.stdin_path, stdout=step.stdout_path)
+
+
+async def _read_chunks(fh: BinaryIO, size: int):
+    """A pipe file as an async request body, read off the event loop."""
+    while chunk := await asyncio.to_thread(fh.read, size):
+        yield chunk
+
+
+class _Body:
+    """One streamed response body: bounded redacted prefix, sha256, optional spool/pipe file and schema check.
+
+    The prefix is redacted as chunks arrive. Reading continues a redactor
+    holdback past the limit, so a secret straddling the limit is caught
+    whole. The spool file and sha256 keep the exact bytes sent.
+    """
+
+    def __init__(self, tool: HttpTool, schema: Optional[dict], spool: bool, pipe: Optional[BinaryIO] = None):
+        self.tool = tool
+        # Open pipe file (owned by the caller) that receives every byte, for a later step's input
+        self.pipe = pipe
+        self.digest = hashlib.sha256()
+        self.size = 0
+        self.prefix = bytearray()
+        self.redactor = Redactor(binary=True)
+        limit = tool.body_prefix_bytes
+        self.window = limit + self.redactor.holdback if limit > 0 else 0
+        self.fed = 0
+        self.check = StreamingJsonCheck(schema) if schema else None
+        self.error: Optional[str] = None
+        self.aborted = False
+        self.fh = self.tmp = None
+        if spool:
+            tool.spool_dir.mkdir(parents=True, exist_ok=True)
+            fd, self.tmp = tempfile.mkstemp(dir=tool.spool_dir, suffix=".part")
+            self.fh = os.fdopen(fd, "wb")
+
+    def feed(self, chunk: bytes) -> bool:
+        """Take one chunk; True means stop reading (the schema check already failed)."""
+        self.size += len(chunk)
+        self.digest.update(chunk)
+        if self.fed < self.window:
+            part = chunk[:self.window - self.fed]
+            self.fed += len(part)
+            self.prefix += self.redactor.feed(part)
+        if self.fh:
+            self.fh.write(chunk)
+        if self.pipe:
+            self.pipe.write(chunk)
+        if self.check and (error := self.check.feed(chunk)):
+            self.error = error
+            self.aborted = True
+        return self.aborted
+
+    def close(self) -> None:
+        # Cut short, the held-back tail may be the start of a secret, so it goes
+        self.prefix += self.redactor.close(drop_tail=self.size > self.fed)
+        if self.check and self.error is None and not self.aborted:
+            self.error = self.check.finish()
+        if self.fh:
+            self.fh.close()
+            self.fh = None
+
+    def result(self, status_code: int, content_type: Optional[str], encoding: Optional[str], method: str, url: str) -> dict:
+        meta = {
+            "status_code": status_code,
+            "url": redact(url),
+            "method": method.upper(),
+            "content_type": content_type,
+            "bytes": self.size,
+            "sha256": self.digest.hexdigest(),
+            "truncated": self.size > self.fed,
+        }
+        if self.redactor.counts:
+            meta["redacted"] = self.redactor.counts
+        if self.tmp:
+            if self.error is None:
+                final = self.tool.spool_dir / f"{meta['sha256']}.body"
+                os.replace(self.tmp, final)
+                meta["spool_path"] = str(final)
+            else:
+                os.unlink(self.tmp)
+        if self.pipe:
+            meta["pipe"] = pipe_meta(self.pipe.name, self.size, meta["sha256"])
+        if self.aborted:
+            # Failed fast: the hash and byte count only cover what was read
+            meta["aborted"] = True
+
+        status = "ok" if status_code < 400 else f"failed(status={status_code})"
+        if self.error is not None and status == "ok":
+            status = "failed(schema)"
+        return {
+            "status": status,
+            "stdout": self.prefix.decode(encoding or "utf-8", errors="replace"),
+            "stderr": f"schema: {self.error}" if self.error else "",
+            "meta": meta,
+        }
@@ -0,0 +1,202 @@
+"""
+Incremental JSON shape check for streamed HTTP bodies.
+
+Supports the subset of JSON Schema that can be decided without buffering the
+document: top-level ``type``, top-level ``required`` keys and
+``properties.<key>.type``. The scanner works on raw bytes (JSON structure is
+ASCII, and UTF-8 continuation bytes never collide with it). It jumps between
+structural characters with a regex, so it never has to look at every byte in
+Python.
+"""
+from __future__ import annotations
+
+import json
+import re
+from itertools import accumulate
+from typing import Any, Dict, Optional, Set
+
+_STRUCT = re.compile(rb'["{}\[\]:,]')
+_STRING_STOP = re.compile(rb'["\\]')
+_NON_WS = re.compile(rb"[^ \t\r\n]")
+# Below the top level only depth matters: skip whole strings, stop on brackets.
+# Group 1 marks a closed string, group 2 a chunk that ends mid-escape.
+_NESTED = re.compile(rb'[\[\]{}]|"[^"\\]*(?:\\.[^"\\]*)*(?:(")|(\\)?\Z)', re.S)
+_CLOSED_STRING = re.compile(rb'"[^"\\]*(?:\\.[^"\\]*)*"', re.S)
+_NOT_BRACKET = bytes(b for b in range(256) if b not in b"[]{}")
+_DEPTH_DELTA = [0] * 256
+for _b in b"[{":
+    _DEPTH_DELTA[_b] = 1
+for _b in b"]}":
+    _DEPTH_DELTA[_b] = -1
+
+_TYPE_OF = {
+    ord("{"): "object", ord("["): "array", ord('"'): "string",
+    ord("t"): "boolean", ord("f"): "boolean", ord("n"): "null",
+}
+_ROOT = object()
+
+
+def _json_type(byte: int) -> str:
+    if byte in _TYPE_OF:
+        return _TYPE_OF[byte]
+    if byte == ord("-") or ord("0") <= byte <= ord("9"):
+        return "number"
+    return "invalid"
+
+
+def _decode_key(raw: bytes) -> str:
+    """A captured key's text; only keys containing escapes go through the JSON decoder."""
+    if b"\\" in raw:
+        try:
+            return json.loads(b'"' + raw + b'"')
+        except ValueError:
+            pass
+    return raw.decode("utf-8", errors="replace")
+
+
+def _type_ok(expected: Any, actual: str) -> bool:
+    allowed = expected if isinstance(expected, list) else [expected]
+    if actual == "number" and "integer" in allowed:
+        return True
+    return actual in allowed
+
+
+class StreamingJsonCheck:
+    def __init__(self, schema: Dict[str, Any]):
+        self.schema = schema or {}
+        self.properties: Dict[str, Any] = self.schema.get("properties") or {}
+        self.required: Set[str] = set(self.schema.get("required") or [])
+        self.seen: Set[str] = set()
+        self.depth = 0
+        self.root_type: Optional[str] = None
+        self._in_string = False
+        self._escape = False
+        self._capture: Optional[bytearray] = None
+        self._expect_key = False
+        self._await: Any = _ROOT
+        self._key: Optional[str] = None
+
+    def _on_value(self, byte: int) -> Optional[str]:
+        actual = _json_type(byte)
+        if self._await is _ROOT:
+            self.root_type = actual
+            if actual == "invalid":
+                return "body is not JSON"
+            expected = self.schema.get("type")
+            if expected and not _type_ok(expected, actual):
+                return f"expected top-level {expected}, got {actual}"
+        else:
+            expected = (self.properties.get(self._await) or {}).get("type")
+            if expected and not _type_ok(expected, actual):
+                return f"expected '{self._await}' to be {expected}, got {actual}"
+        self._await = None
+        return None
+
+    def feed(self, chunk: bytes) -> Optional[str]:
+        """Consume the next chunk; returns an error message as soon as the body is known to violate the schema."""
+        i, n = 0, len(chunk)
+        if self._escape and n:
+            if self._capture is not None:
+                self._capture += chunk[:1]
+            self._escape = False
+            i = 1
+        while i < n:
+            if self.depth > 1 and not self._in_string:
+                i = self._skip_nested(chunk, i)
+                continue
+            if self._await is not None:
+                m = _NON_WS.search(chunk, i)
+                if not m:
+                    return None
+                i = m.start()
+                err = self._on_value(chunk[i])
+                if err:
+                    return err
+            if self._in_string:
+                m = _STRING_STOP.search(chunk, i)
+                if not m:
+                    if self._capture is not None:
+                        self._capture += chunk[i:]
+                    return None
+                j = m.start()
+                if self._capture is not None:
+                    self._capture += chunk[i:j]
+                if chunk[j] == ord("\\"):
+                    if j + 1 < n:
+                        if self._capture is not None:
+                            self._capture += chunk[j:j + 2]
+                        i = j + 2
+                    else:
+                        if self._capture is not None:
+                            self._capture += chunk[j:j + 1]
+                        self._escape = True
+                        i = n
+                    continue
+                self._in_string = False
+                if self._capture is not None:
+                    self._key = _decode_key(bytes(self._capture))
+                    self.seen.add(self._key)
+                    self._capture = None
+                i = j + 1
+                continue
+            m = _STRUCT.search(chunk, i)
+            if not m:
+                return None
+            c = chunk[m.start()]
+            i = m.end()
+            if c == ord('"'):
+                self._in_string = True
+                if self.depth == 1 and self.root_type == "object" and self._expect_key:
+                    self._capture = bytearray()
+                    self._expect_key = False
+            elif c in (ord("{"), ord("[")):
+                self.depth += 1
+                if self.depth == 1:
+                    self._expect_key = c == ord("{")
+            elif c in (ord("}"), ord("]")):
+                self.depth -= 1
+            elif self.depth == 1 and self.root_type == "object":
+                if c == ord(":"):
+                    self._await = self._key
+                elif c == ord(","):
+                    self._expect_key = True
+        return None
+
+    def _skip_nested(self, chunk: bytes, i: int) -> int:
+        """Consume nested values until the scan returns to the top level or the chunk ends."""
+        # Common case: the rest of the chunk stays nested, so settle it with C-level passes
+        rest = _CLOSED_STRING.sub(b"", chunk[i:] if i else chunk)
+        # Any quote left opens a string that runs past the end of the chunk
+        q = rest.find(b'"')
+        steps = list(accumulate(map(_DEPTH_DELTA.__getitem__, rest[:q if q >= 0 else len(rest)].translate(None, _NOT_BRACKET))))
+        if not steps or self.depth + min(steps) > 1:
+            self.depth += steps[-1] if steps else 0
+            if q >= 0:
+                tail = rest[q + 1:]
+                self._in_string = True
+                self._escape = (len(tail) - len(tail.rstrip(b"\\"))) % 2 == 1
+            return len(chunk)
+        for m in _NESTED.finditer(chunk, i):
+            c = chunk[m.start()]
+            if c == ord('"'):
+                if m.group(1) is None:
+                    self._in_string = True
+                    self._escape = m.group(2) is not None
+                    return len(chunk)
+            elif c in (ord("{"), ord("[")):
+                self.depth += 1
+            else:
+                self.depth -= 1
+                if self.depth <= 1:
+                    return m.end()
+        return len(chunk)
+
+    def finish(self) -> Optional[str]:
+        if self.root_type is None:
+            return "empty body"
+        if self.depth != 0 or self._in_string:
+            return "truncated JSON document"
+        missing = sorted(self.required - self.seen)
+        if missing:
+            return f"missing required keys: {', '.join(missing)}"
+        return None
@@ -0,0 +1,65 @@
+"""
+Step-to-step pipes.
+
+A plan step with ``input_from`` reads an earlier step's output. The executor
+gives the producer a pipe file under ``artifacts/<ticket>/pipes/`` and
+hands the same path to the consumer. Tools attach these files straight to a
+subprocess's stdout/stdin, or stream them as an HTTP body, so piped data
+never passes through a Python string. The file keeps the exact bytes, like
+an HTTP spool. The step result carries a redacted prefix plus the file's
+size and sha256.
+"""
+from __future__ import annotations
+
+import hashlib
+from contextlib import ExitStack, contextmanager
+from pathlib import Path
+from typing import BinaryIO, Iterator, Optional, Tuple
+
+from .redaction import Redactor, redact
+
+# Only about this much of piped output is kept in the step's stdout
+PREFIX_BYTES = 64 * 1024
+CHUNK_BYTES = 64 * 1024
+
+
+@contextmanager
+def pipe_files(stdin: Optional[str], stdout: Optional[str]) -> Iterator[Tuple[Optional[BinaryIO], Optional[BinaryIO]]]:
+    """Open a step's input pipe for reading and its output pipe for writing (either may be None)."""
+    with ExitStack() as stack:
+        fin = stack.enter_context(open(stdin, "rb")) if stdin else None
+        fout = None
+        if stdout:
+            Path(stdout).parent.mkdir(parents=True, exist_ok=True)
+            fout = stack.enter_context(open(stdout, "wb"))
+        yield fin, fout
+
+
+def pipe_meta(path: str, size: int, sha256: str) -> dict:
+    return {"path": path, "bytes": size, "sha256": sha256}
+
+
+def piped_output(status: str, path: str, stderr: bytes, prefix_bytes: int = PREFIX_BYTES) -> dict:
+    """A tool result whose stdout went to a pipe file: redacted prefix as stdout, ``meta.pipe`` describes the file."""
+    digest = hashlib.sha256()
+    redactor = Redactor(binary=True)
+    window = prefix_bytes + redactor.holdback
+    prefix = bytearray()
+    size = 0
+    with open(path, "rb") as f:
+        while chunk := f.read(CHUNK_BYTES):
+            digest.update(chunk)
+            if size < window:
+                prefix += redactor.feed(chunk[:window - size])
+            size += len(chunk)
+    prefix += redactor.close(drop_tail=size > window)
+    err = redact(stderr, redactor.counts)
+    meta = {"pipe": pipe_meta(path, size, digest.hexdigest()), "truncated": size > window}
+    if redactor.counts:
+        meta["redacted"] = redactor.counts
+    return {
+        "status": status,
+        "stdout": prefix.decode(errors="replace"),
+        "stderr": err.decode(errors="replace"),
+        "meta": meta,
+    }
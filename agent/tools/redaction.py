@@ -0,0 +1,196 @@
+"""
+Secret redaction for tool output.
+
+Every pattern is compiled into one alternation, so output is scanned once no
+matter how many kinds of secret are known. A match is replaced with
+``[REDACTED:<kind>]``. For key/value style secrets the label is kept and
+only the value goes.
+
+Each alternative starts with a single literal character (its anchor). That
+lets the regex engine skip through the text in C, stopping only at anchor
+characters. Anchors are picked to be rare: ``k`` for key/token, ``w`` for
+password, ``J`` for a JWT's ``eyJ``. Whatever comes before the anchor is
+checked with a lookbehind. Every pattern has a bounded length, so the
+streaming Redactor holds back just ``HOLDBACK`` characters per chunk and
+still catches a secret split across two chunks.
+"""
+from __future__ import annotations
+
+import re
+from typing import AnyStr, Dict, Generic, Optional, Tuple
+
+_KV = r"[\"']?[ \t]{0,8}[:=][ \t]{0,8}[\"']?"
+_VALUE = r"[^\s\"',;&]{4,256}"
+
+# (kind, anchors, lead, pattern). ``pattern`` continues the match after an
+# anchor character; ``lead`` characters before the anchor (already checked
+# by a lookbehind) are redacted as well. A ``label`` group is kept in the
+# output. Every quantifier is bounded: HOLDBACK must cover the longest match.
+PATTERNS: Tuple[Tuple[str, str, int, str], ...] = (
+    ("private_key", "B", 5, r"(?<=-----B)EGIN [A-Z ]{0,32}PRIVATE KEY-----[\s\S]{0,4096}?-----END [A-Z ]{0,32}PRIVATE KEY-----"),
+    ("aws_access_key", "A", 0, r"(?<!\w.)(?:KIA|SIA)[0-9A-Z]{16}\b"),
+    ("google_api_key", "A", 0, r"(?<!\w.)Iza[0-9A-Za-z_-]{35}"),
+    ("github_token", "g", 0, r"(?<!\w.)(?:h[pousr]_[A-Za-z0-9]{36,255}|ithub_pat_[A-Za-z0-9_]{22,255})\b"),
+    ("slack_token", "x", 0, r"(?<!\w.)ox[abposr]-[A-Za-z0-9-]{10,250}"),
+    ("stripe_key", "k", 1, r"(?<=\b[rs]k)_(?:live|test)_[A-Za-z0-9]{16,99}\b"),
+    ("jwt", "J", 2, r"(?<=\beyJ)[A-Za-z0-9_-]{8,1536}\.eyJ[A-Za-z0-9_-]{8,1536}\.[A-Za-z0-9_-]{0,512}"),
+    ("bearer", "Bb", 0, r"(?<!\w.)(?P<label>earer[ \t]{1,8})[A-Za-z0-9._~+/=-]{16,2048}"),
+    ("url_password", ":", 0, r"(?P<label>//[^\s/:@]{1,128}:)[^\s/@]{1,256}(?=@)"),
+    # password / passwd / pwd, api_key / access_key, *token, *secret
+    ("credential", "wW", 0, rf"(?P<label>(?i:(?<=passw)(?:or)?d|(?<=pw)d){_KV}){_VALUE}"),
+    ("credential", "kK", 0, rf"(?P<label>(?i:(?<=tok)en|(?:(?<=api[_-]k)|(?<=apik)|(?<=access[_-]k)|(?<=accessk))ey){_KV}){_VALUE}"),
+    ("credential", "cC", 0, rf"(?P<label>(?i:(?<=sec)ret){_KV}){_VALUE}"),
+    ("mrn", "Mm", 0, r"(?<!\w.)(?P<label>(?i:(?<=m)rn|(?<=m)edical record (?:number|no\.?))[\s:#-]{0,4})[A-Za-z]{0,3}\d{6,12}\b"),
+    ("ssn", "-", 3, r"(?<=\b\d{3}-)\d{2}-\d{4}\b"),
+    # Card brands start with 2-6; matches must also pass _is_card()
+    ("pan", "23456", 0, r"(?<![\w.].)(?:[ -]?\d){12,18}\b(?!\.\d)"),
+)
+HOLDBACK = 4352
+# Already-emitted text that must stay visible: the longest lookbehind (plus
+# lead), and the window searched for a card keyword before a card number
+CONTEXT = 48
+
+# Issuer prefix and length pairs of the major card brands, matched against the bare digits
+_CARD_NUMBER = re.compile(r"""
+    4(?:\d{12}|\d{15}|\d{18})                                    # Visa: 13, 16 or 19
+  | (?:5[1-5]\d\d|222[1-9]|22[3-9]\d|2[3-6]\d\d|27[01]\d|2720)\d{12}  # Mastercard: 16
+  | 3[47]\d{13}                                                 # Amex: 15
+  | (?:6011|64[4-9]\d|65\d\d)\d{12,15}                          # Discover: 16-19
+  | 62\d{14,17}                                                 # UnionPay: 16-19
+  | 35(?:2[89]|[3-8]\d)\d{12,15}                                # JCB: 16-19
+  | (?:30[0-5]\d|3[689]\d\d)\d{10,15}                           # Diners: 14-19
+""", re.X)
+# A card number is only redacted when one of these comes shortly before it, so
+# order ids, trace ids and timestamps that happen to pass Luhn are left alone
+_CARD_WORDS = r"(?i:card|credit|debit|visa|master[ _-]?card|amex|american express|discover|diners|unionpay|(?<![a-z])(?:pan|ccn?|jcb)(?![a-z]))"
+_CARD_WORDS_TEXT = re.compile(_CARD_WORDS)
+_CARD_WORDS_BYTES = re.compile(_CARD_WORDS.encode("ascii"))
+
+
+def _compile(binary: bool):
+    alternatives = []
+    groups: Dict[str, Tuple[str, int, Optional[str]]] = {}
+    for kind, anchors, lead, pattern in PATTERNS:
+        for anchor in anchors:
+            name = f"{kind}_{len(groups)}"
+            label = f"{name}_label" if "(?P<label>" in pattern else None
+            body = pattern.replace("(?P<label>", f"(?P<{label}>") if label else pattern
+            alternatives.append(f"{re.escape(anchor)}(?P<{name}>{body})")
+            groups[name] = (kind, lead, label)
+    source = "|".join(alternatives)
+    return re.compile(source.encode("ascii") if binary else source, re.ASCII), groups
+
+
+_TEXT, _GROUPS = _compile(False)
+_BYTES, _ = _compile(True)
+# Text this close to a feed's cut stays held back: a match anchored after the cut redacts it as lead
+_MAX_LEAD = max(lead for _, _, lead, _ in PATTERNS)
+
+
+def _is_card(text: AnyStr, begin: int, match: AnyStr) -> bool:
+    """A known brand's prefix and length, a valid Luhn digit, and a card keyword just before."""
+    digits = "".join(ch for ch in (match.decode("ascii") if isinstance(match, bytes) else match) if ch.isdigit())
+    if not (_CARD_NUMBER.fullmatch(digits) and _luhn(digits)):
+        return False
+    words = _CARD_WORDS_BYTES if isinstance(text, bytes) else _CARD_WORDS_TEXT
+    return words.search(text, max(0, begin - CONTEXT), begin) is not None
+
+
+def _luhn(digits: str) -> bool:
+    total = 0
+    for i, ch in enumerate(reversed(digits)):
+        d = ord(ch) - 48
+        if i % 2:
+            d = d * 2 - 9 if d > 4 else d * 2
+        total += d
+    return total % 10 == 0
+
+
+class Redactor(Generic[AnyStr]):
+    """Streaming redaction over str or bytes chunks.
+
+    feed() returns the redacted text that is safe to emit. It keeps back a
+    tail that could still be the start of a secret. close() flushes that tail.
+    ``counts`` tallies redactions by kind.
+    """
+
+    def __init__(self, binary: bool = False, holdback: int = HOLDBACK):
+        self.binary = binary
+        self.pattern = _BYTES if binary else _TEXT
+        self.holdback = holdback
+        self.counts: Dict[str, int] = {}
+        empty = b"" if binary else ""
+        self._tail = empty
+        # Raw text just before the tail, so lookbehinds still see across the cut
+        self._context = empty
+
+    def _mark(self, kind: str) -> AnyStr:
+        mark = f"[REDACTED:{kind}]"
+        return mark.encode("ascii") if self.binary else mark
+
+    def _scan(self, text: AnyStr, start: int, cut: int, keep: int = 0) -> Tuple[AnyStr, int]:
+        """Redact matches in ``text[start:]`` that begin before ``cut``; returns (output, where it ends in ``text``).
+
+        Unless a match runs past it, output stops ``keep`` characters short of ``cut``.
+        """
+        out = []
+        pos = start
+        for m in self.pattern.finditer(text, start):
+            begin = m.start()
+            if begin >= cut:
+                break
+            kind, lead, label = _GROUPS[m.lastgroup]
+            if kind == "pan" and not _is_card(text, begin, m.group(0)):
+                continue
+            self.counts[kind] = self.counts.get(kind, 0) + 1
+            out.append(text[pos:max(pos, begin - lead)])
+            if label:
+                out.append(text[begin:m.end(label)])
+            out.append(self._mark(kind))
+            pos = m.end()
+        end = max(pos, cut - keep)
+        out.append(text[pos:end])
+        return text[:0].join(out), end
+
+    def feed(self, chunk: AnyStr) -> AnyStr:
+        text = self._context + self._tail + chunk
+        start = len(self._context)
+        # A match beginning before the cut is at most HOLDBACK long, so it ends inside ``text``
+        out, end = self._scan(text, start, len(text) - self.holdback, _MAX_LEAD)
+        self._context = text[max(0, end - CONTEXT):end]
+        self._tail = text[end:]
+        return out
+
+    def close(self, drop_tail: bool = False) -> AnyStr:
+        """Flush the held-back tail; ``drop_tail`` discards it instead (output cut short mid-stream)."""
+        text = self._context + self._tail
+        start = len(self._context)
+        self._context = self._tail = text[:0]
+        if drop_tail:
+            return text[:0]
+        return self._scan(text, start, len(text))[0]
+
+
+def redact(text: AnyStr, counts: Optional[Dict[str, int]] = None) -> AnyStr:
+    """Redact a complete str or bytes value in one pass."""
+    if not text:
+        return text
+    r: Redactor = Redactor(binary=isinstance(text, bytes))
+    out = r._scan(text, 0, len(text))[0]
+    if counts is not None:
+        for kind, n in r.counts.items():
+            counts[kind] = counts.get(kind, 0) + n
+    return out
+
+
+def redact_output(status: str, stdout: bytes, stderr: bytes) -> dict:
+    """A tool result from raw process output, redacted before it is decoded; ``meta.redacted`` counts removals."""
+    counts: Dict[str, int] = {}
+    res = {
+        "status": status,
+        "stdout": redact(stdout, counts).decode(errors="replace"),
+        "stderr": redact(stderr, counts).decode(errors="replace"),
+    }
+    if counts:
+        res["meta"] = {"redacted": counts}
+    return res
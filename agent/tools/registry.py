@@ -1,20 +1,73 @@
-from dataclasses import dataclass
-from typing import Callable
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+
+@dataclass(frozen=True)
+class ToolCapabilities:
+    """Static execution traits a tool declares to the engine."""
+    max_concurrency: Optional[int] = None
+    idempotent: bool = False
+    timeout: Optional[float] = None
+    # Extra attempts on timeout/exception; only honoured for idempotent tools
+    retries: int = 0
 
 
 @dataclass
 class ToolRegistration:
     name: str
     permission: str
-    handler: Callable
+    handler: Callable[[Any], Dict[str, Any]]
+    capabilities: ToolCapabilities = field(default_factory=ToolCapabilities)
+    # Coroutine variant of handler; without one, async callers run handler on a thread
+    async_handler: Optional[Callable[[Any], Awaitable[Dict[str, Any]]]] = None
 
 
 class ToolRegistry:
     def __init__(self) -> None:
         self._registry: dict[str, ToolRegistration] = {}
 
-    def register(self, name: str, permission: str, handler: Callable) -> None:
-        self._registry[name] = ToolRegistration(name=name, permission=permission, handler=handler)
+    def register(self, name: str, permission: str, handler: Callable, capabilities: Optional[ToolCapabilities] = None,
+                 async_handler: Optional[Callable] = None) -> None:
+        self._registry[name] = ToolRegistration(
+            name=name,
+            permission=permission,
+            handler=handler,
+            capabilities=capabilities or ToolCapabilities(),
+            async_handler=async_handler,
+        )
+
+    def register_tool(self, tool: Any) -> None:
+        """Register a BaseTool subclass under its declared name and capabilities."""
+        self.register(tool.name, tool.permission, tool.invoke, tool.capabilities, getattr(tool, "invoke_async", None))
 
     def get(self, name: str) -> ToolRegistration:
         return self._registry[name]
+
+    def lookup(self, name: Optional[str]) -> Optional[ToolRegistration]:
+        return self._registry.get(name) if name else None
+
+    def names(self) -> list[str]:
+        return list(self._registry)
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._registry
+
+
+def default_registry(ticket_id: Optional[str] = None, audit_log: Optional[str] = None, workdir: Optional[str] = None,
+                     worktrees: bool = False) -> ToolRegistry:
+    """Registry with the built-in shell, http and git tools.
+
+    ``workdir`` isolates shell steps; git steps target the repository, or with
+    ``worktrees`` the ticket's own detached worktree of it.
+    """
+    from .shell import ShellTool
+    from .http_client import HttpTool
+    from .git_ops import GitTool
+
+    registry = ToolRegistry()
+    registry.register_tool(ShellTool(ticket_id=ticket_id, audit_log=audit_log, cwd=workdir))
+    registry.register_tool(HttpTool(ticket_id=ticket_id, audit_log=audit_log))
+    registry.register_tool(GitTool(ticket_id=ticket_id, audit_log=audit_log, worktrees=worktrees))
+    return registry
@@ -1,18 +1,68 @@
 from __future__ import annotations
 
+import asyncio
 import subprocess
-from typing import Optional
+from typing import Any, Optional
 
 from .base import BaseTool
+from .pipes import pipe_files, piped_output
+from .redaction import redact_output
+from .registry import ToolCapabilities
 
 
 class ShellTool(BaseTool):
-    def run(self, command: Optional[str] = None) -> dict:
+    name = "shell"
+    permission = "exec"
+    capabilities = ToolCapabilities(max_concurrency=8, idempotent=False, timeout=300)
+
+    def run(self, command: Optional[str] = None, timeout: Optional[float] = None,
+            stdin: Optional[str] = None, stdout: Optional[str] = None) -> dict:
+        """Run ``command``; ``stdin``/``stdout`` are pipe files connected directly to the process."""
         if not command:
             return {"status": "skipped", "stdout": "", "stderr": "no command provided"}
         try:
-            proc = subprocess.run(command, shell=True, capture_output=True, text=True)
+            with pipe_files(stdin, stdout) as (fin, fout):
+                proc = subprocess.run(command, shell=True, cwd=self.cwd, stdin=fin, stdout=fout or subprocess.PIPE, stderr=subprocess.PIPE,
+                                      timeout=timeout or self.capabilities.timeout)
             status = "ok" if proc.returncode == 0 else f"failed(code={proc.returncode})"
-            return {"status": status, "stdout": proc.stdout, "stderr": proc.stderr}
+            return piped_output(status, stdout, proc.stderr) if stdout else redact_output(status, proc.stdout, proc.stderr)
+        except subprocess.TimeoutExpired as e:
+            return {"status": "failed(timeout)", "stdout": "", "stderr": f"timed out after {e.timeout}s"}
+        except Exception as e:
+            return {"status": "failed(exception)", "stdout": "", "stderr": str(e)}
+
+    async def run_async(self, command: Optional[str] = None, timeout: Optional[float] = None,
+                        stdin: Optional[str] = None, stdout: Optional[str] = None) -> dict:
+        if not command:
+            return {"status": "skipped", "stdout": "", "stderr": "no command provided"}
+        try:
+            with pipe_files(stdin, stdout) as (fin, fout):
+                proc = await asyncio.create_subprocess_shell(command, cwd=self.cwd, stdin=fin, stdout=fout or asyncio.subprocess.PIPE,
+                                                             stderr=asyncio.subprocess.PIPE)
+                return await communicate(proc, timeout or self.capabilities.timeout, stdout)
         except Exception as e:
             return {"status": "failed(exception)", "stdout": "", "stderr": str(e)}
+
+    def invoke(self, step: Any) -> dict:
+        return self.run(step.args, stdin=step.stdin_path, stdout=step.stdout_path)
+
+    async def invoke_async(self, step: Any) -> dict:
+        return await self.run_async(step.args, stdin=step.stdin_path, stdout=step.stdout_path)
+
+
+async def communicate(proc: asyncio.subprocess.Process, timeout: Optional[float], pipe: Optional[str] = None) -> dict:
+    """Collect an asyncio subprocess's output as a redacted tool result; kills it on timeout.
+
+    With ``pipe``, stdout went to that file and is summarized from it instead.
+    """
+    try:
+        out, err = await asyncio.wait_for(proc.communicate(), timeout)
+    except asyncio.TimeoutError:
+        proc.kill()
+        await proc.wait()
+        return {"status": "failed(timeout)", "stdout": "", "stderr": f"timed out after {timeout}s"}
+    status = "ok" if proc.returncode == 0 else f"failed(code={proc.returncode})"
+    if pipe:
+        # Hashing a large pipe file is blocking work
+        return await asyncio.to_thread(piped_output, status, pipe, err)
+    return redact_output(status, out, err)
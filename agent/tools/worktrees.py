@@ -0,0 +1,210 @@
+"""
+Pooled ``git worktree`` checkouts, one lease per ticket.
+
+Every worktree of a repository shares its object store, so a lease costs a
+checkout rather than a clone, and each ticket gets its own HEAD, index and
+index.lock. Released worktrees are reset, cleaned and detached (freeing any
+branch the ticket created), then handed to the next ticket.
+"""
+from __future__ import annotations
+
+import shutil
+import subprocess
+import threading
+from pathlib import Path
+from typing import BinaryIO, Dict, List, Optional, Tuple
+
+from ..core.locking import TicketLock, try_lock_file, unlock_file
+
+# Under the repository's git dir, so the user's status, clean and commits never see the pool
+POOL_DIR_NAME = "fde-worktrees"
+
+
+def _git(cwd: Path, *args: str, timeout: float = 120) -> str:
+    proc = subprocess.run(["git", *args], cwd=str(cwd), capture_output=True, text=True, timeout=timeout)
+    if proc.returncode != 0:
+        raise RuntimeError(f"git {' '.join(args)}: {proc.stderr.strip() or proc.returncode}")
+    return proc.stdout.strip()
+
+
+def repo_root(path: Path) -> Optional[Path]:
+    try:
+        return Path(_git(path, "rev-parse", "--show-toplevel")).resolve()
+    except (OSError, RuntimeError, subprocess.TimeoutExpired):
+        return None
+
+
+class _Lease:
+    """One ticket's worktree; ``ready`` is set once the checkout exists (or failed with ``error``)."""
+    __slots__ = ("path", "fh", "ready", "error")
+
+    def __init__(self, path: Path, fh: BinaryIO):
+        self.path = path
+        self.fh = fh
+        self.ready = threading.Event()
+        self.error: Optional[BaseException] = None
+
+
+class WorktreePool:
+    """Detached worktrees of one repository, leased per ticket.
+
+    Each worktree is guarded by an OS file lock while leased, so several
+    runner processes can share one pool directory. ``git worktree`` add,
+    remove and prune rewrite the repository's shared worktree metadata, so
+    they run one at a time; checkouts inside leased worktrees run in
+    parallel. At most ``max_idle`` worktrees are kept for reuse; surplus
+    ones are removed on release.
+    """
+
+    def __init__(self, repo: Path, root: Optional[Path] = None, max_idle: int = 8):
+        self.repo = Path(repo)
+        if root is None:
+            # --git-common-dir may be relative to the repository; a worktree shares its main checkout's pool
+            root = (self.repo / _git(self.repo, "rev-parse", "--git-common-dir")).resolve() / POOL_DIR_NAME
+        self.root = Path(root)
+        self.max_idle = max(0, max_idle)
+        self._leases: Dict[str, _Lease] = {}
+        self._lock = threading.Lock()
+        self._admin_lock = TicketLock(".worktree-admin", lock_dir=self.root)
+        # Forget worktrees whose directories were deleted out from under git
+        self._worktree("prune")
+
+    def _worktree(self, *args: str) -> str:
+        with self._admin_lock:
+            return _git(self.repo, "worktree", *args)
+
+    def _remove(self, path: Path) -> None:
+        try:
+            self._worktree("remove", "--force", str(path))
+        except (OSError, RuntimeError, subprocess.TimeoutExpired):
+            shutil.rmtree(path, ignore_errors=True)
+            try:
+                self._worktree("prune")
+            except (OSError, RuntimeError, subprocess.TimeoutExpired):
+                pass
+
+    def _candidates(self) -> List[Path]:
+        leased = {lease.path for lease in self._leases.values()}
+        return sorted(p for p in self.root.glob("wt*") if p.is_dir() and p not in leased) if self.root.exists() else []
+
+    def _claim(self) -> Tuple[Path, BinaryIO, bool]:
+        """An idle worktree (or a fresh path for a new one) with its lock held."""
+        for path in self._candidates():
+            fh = try_lock_file(path.with_suffix(".lease"))
+            if fh is not None:
+                return path, fh, False
+        n = 0
+        while True:
+            path = self.root / f"wt{n}"
+            if not path.exists():
+                fh = try_lock_file(path.with_suffix(".lease"))
+                if fh is not None and not path.exists():
+                    return path, fh, True
+                if fh is not None:
+                    unlock_file(fh)
+            n += 1
+
+    def lease(self, ticket_id: str) -> Path:
+        """The ticket's worktree, checked out at the repository's current HEAD.
+
+        Concurrent calls for one ticket share the lease; all but the first
+        wait until its checkout exists.
+        """
+        with self._lock:
+            held = self._leases.get(ticket_id)
+            if held is None:
+                path, fh, new = self._claim()
+                held = self._leases[ticket_id] = _Lease(path, fh)
+                owner = True
+            else:
+                owner = False
+        if not owner:
+            held.ready.wait()
+            if held.error is not None:
+                raise RuntimeError(f"worktree for {ticket_id} could not be prepared: {held.error}")
+            return held.path
+        try:
+            self._prepare(held.path, new)
+            return held.path
+        except BaseException as e:
+            held.error = e
+            self._drop(ticket_id)
+            raise
+        finally:
+            held.ready.set()
+
+    def _prepare(self, path: Path, new: bool) -> None:
+        base = _git(self.repo, "rev-parse", "HEAD")
+        if not new:
+            try:
+                _git(path, "checkout", "--detach", "--force", "-q", base)
+                _git(path, "clean", "-fdxq")
+                return
+            except RuntimeError:
+                # Not a usable worktree any more; replace it
+                self._remove(path)
+        self._worktree("add", "--detach", "-q", str(path), base)
+
+    def release(self, ticket_id: str) -> None:
+        """Reset and clean the ticket's worktree and return it to the pool."""
+        with self._lock:
+            held = self._leases.get(ticket_id)
+            idle = len(self._candidates())
+        if held is None:
+            return
+        # A checkout still being prepared finishes before it is reset
+        held.ready.wait()
+        if held.error is not None:
+            return
+        path = held.path
+        try:
+            if idle >= self.max_idle:
+                self._remove(path)
+            else:
+                _git(path, "reset", "--hard", "-q")
+                _git(path, "clean", "-fdxq")
+                _git(path, "checkout", "--detach", "-q")
+        except (OSError, RuntimeError, subprocess.TimeoutExpired):
+            self._remove(path)
+        finally:
+            self._drop(ticket_id)
+
+    def _drop(self, ticket_id: str) -> None:
+        with self._lock:
+            held = self._leases.pop(ticket_id, None)
+        if held is not None:
+            unlock_file(held.fh)
+
+    def leased(self) -> Dict[str, Path]:
+        with self._lock:
+            return {t: lease.path for t, lease in self._leases.items()}
+
+
+# Process-wide: every ticket touching a repository leases from the same pool
+_pools: Dict[Path, Optional[WorktreePool]] = {}
+_pools_lock = threading.Lock()
+
+
+def pool_for(path: Path) -> Optional[WorktreePool]:
+    """Pool for the repository containing ``path``; None when it is not a git checkout."""
+    path = Path(path).resolve()
+    with _pools_lock:
+        if path in _pools:
+            return _pools[path]
+    root = repo_root(path)
+    with _pools_lock:
+        if path not in _pools:
+            pool = None
+            if root is not None:
+                existing = next((p for p in _pools.values() if p is not None and p.repo == root), None)
+                pool = existing or WorktreePool(root)
+            _pools[path] = pool
+        return _pools[path]
+
+
+def release_worktrees(ticket_id: str) -> None:
+    """Return every worktree the ticket leased, across repositories."""
+    with _pools_lock:
+        pools = {id(p): p for p in _pools.values() if p is not None}
+    for pool in pools.values():
+        pool.release(ticket_id)